@@ -0,0 +1,207 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+from utils.logging_utils import setup_logging
+from compiler.model_compiler import MANIFEST_FILE_NAME, write_output_manifest
+
+logger = setup_logging("genesys_optimizer.artifact_store")
+
+class ArtifactStore:
+    """
+    Content-addressed store of finished compiler output directories.
+
+    An artifact is keyed by a hash of everything that determines the compiler's
+    output - the model file, the hardware config file, the tiling config and the
+    fuse flag - so identical compiles are served from the store across runs and
+    experiments. The store keeps to a size budget by evicting the least recently
+    used artifacts, never one that is being copied out by a hit. Hits only
+    refresh last-used times in memory; the index is written when an artifact
+    is stored or evicted and at close().
+
+    The index is only locked within one process: runs sharing a store
+    directory at the same time can overwrite each other's index entries and
+    evict artifacts another run is copying, so give concurrent runs separate
+    store directories.
+    """
+
+    def __init__(self, store_dir="compile_artifacts", max_bytes=20 * 1024 ** 3):
+        """
+        Initialize the store.
+
+        Args:
+            store_dir: Directory to keep the artifacts in
+            max_bytes: Size budget for all stored artifacts
+        """
+        self.store_dir = os.path.abspath(store_dir)
+        self.objects_dir = os.path.join(self.store_dir, "objects")
+        self.index_file = os.path.join(self.store_dir, "index.json")
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        # (path, size, mtime) -> content hash, so a model is only read once per run
+        self.file_hashes = {}
+        self.index = {}
+        # Key -> number of hits copying the artifact out, which eviction leaves alone
+        self.in_use = {}
+        # Last-used times changed by hits since the index was last saved
+        self.dirty = False
+
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self._load_index()
+        logger.info(f"Artifact store at {self.store_dir} with {len(self.index)} artifacts "
+                    f"({self.total_bytes() / 1024 ** 2:.1f} MB)")
+
+    def _load_index(self):
+        """Load the index, dropping entries whose artifact is gone."""
+        if os.path.exists(self.index_file):
+            try:
+                with open(self.index_file, 'r') as f:
+                    self.index = json.load(f)
+            except (json.JSONDecodeError, IOError) as e:
+                logger.warning(f"Failed to load artifact index ({self.index_file}): {str(e)}")
+                self.index = {}
+        self.index = {key: entry for key, entry in self.index.items()
+                      if os.path.isdir(os.path.join(self.objects_dir, key))}
+
+    def _save_index(self):
+        """Save the index atomically."""
+        temp_file = f"{self.index_file}.tmp"
+        try:
+            with open(temp_file, 'w') as f:
+                json.dump(self.index, f, indent=2)
+            os.replace(temp_file, self.index_file)
+            self.dirty = False
+        except (IOError, OSError) as e:
+            logger.error(f"Failed to save artifact index to {self.index_file}: {str(e)}")
+
+    def _hash_file(self, path):
+        stat = os.stat(path)
+        file_id = (path, stat.st_size, stat.st_mtime_ns)
+        if file_id not in self.file_hashes:
+            digest = hashlib.sha256()
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(chunk)
+            self.file_hashes[file_id] = digest.hexdigest()
+        return self.file_hashes[file_id]
+
+    def compute_key(self, model_path, config_path, tiling_config=None, fuse=False):
+        """
+        Compute the artifact key of a compile.
+
+        Args:
+            model_path: Path to the model ONNX file
+            config_path: Path to the hardware config file
+            tiling_config: Tiling configuration dictionary
+            fuse: Whether the model is compiled with fusion
+
+        Returns:
+            Hex digest identifying the compiler output
+        """
+        inputs = {
+            "model": self._hash_file(os.path.abspath(model_path)),
+            "config": self._hash_file(os.path.abspath(config_path)) if config_path else None,
+            "tiling": tiling_config or {},
+            "fuse": bool(fuse)
+        }
+        return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode()).hexdigest()
+
+    def total_bytes(self):
+        """Get the total size of all stored artifacts."""
+        return sum(entry["size"] for entry in self.index.values())
+
+    def fetch(self, key, target_dir, experiment_name):
+        """
+        Materialize a stored artifact as a compiler output directory.
+
+        Args:
+            key: Artifact key from compute_key
+            target_dir: Output directory to create
+            experiment_name: Experiment the output is for
+
+        Returns:
+            True on a hit, False if the artifact isn't stored
+        """
+        with self.lock:
+            if key not in self.index:
+                return False
+            self.index[key]["last_used"] = time.time()
+            self.dirty = True
+            # Pin the artifact so a concurrent put() can't evict it mid-copy
+            self.in_use[key] = self.in_use.get(key, 0) + 1
+
+        try:
+            if os.path.exists(target_dir):
+                shutil.rmtree(target_dir)
+            # Plain copies - the outputs may be rewritten in place by a later compile
+            shutil.copytree(os.path.join(self.objects_dir, key), target_dir)
+        except (IOError, OSError) as e:
+            logger.warning(f"Failed to restore artifact {key[:8]} to {target_dir}: {str(e)}")
+            # Leave no half-copied output behind for the compile that replaces the hit
+            shutil.rmtree(target_dir, ignore_errors=True)
+            return False
+        finally:
+            with self.lock:
+                self.in_use[key] -= 1
+                if not self.in_use[key]:
+                    del self.in_use[key]
+
+        write_output_manifest(target_dir, experiment_name)
+        logger.info(f"Artifact store hit {key[:8]} for {experiment_name}")
+        return True
+
+    def put(self, key, source_dir):
+        """
+        Store a finished compiler output directory.
+
+        Args:
+            key: Artifact key from compute_key
+            source_dir: Compiler output directory to store
+
+        Returns:
+            True if the artifact was stored
+        """
+        object_dir = os.path.join(self.objects_dir, key)
+        temp_dir = f"{object_dir}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            shutil.copytree(source_dir, temp_dir, ignore=shutil.ignore_patterns(MANIFEST_FILE_NAME))
+            size = sum(os.path.getsize(os.path.join(root, name))
+                       for root, _, files in os.walk(temp_dir) for name in files)
+            with self.lock:
+                if key in self.index:
+                    # Someone else stored the same compile first
+                    shutil.rmtree(temp_dir)
+                    return True
+                if os.path.exists(object_dir):
+                    shutil.rmtree(object_dir)
+                os.rename(temp_dir, object_dir)
+                self.index[key] = {"size": size, "last_used": time.time()}
+                self._evict()
+                self._save_index()
+            return True
+        except (IOError, OSError) as e:
+            logger.warning(f"Failed to store artifact {key[:8]} from {source_dir}: {str(e)}")
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            return False
+
+    def _evict(self):
+        """Remove least recently used artifacts until the store is within its budget. Callers hold the lock."""
+        total = self.total_bytes()
+        for key in sorted(self.index, key=lambda k: self.index[k]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            if key in self.in_use:
+                # Being copied out by a hit - evicted by a later put if still over budget
+                continue
+            total -= self.index[key]["size"]
+            del self.index[key]
+            shutil.rmtree(os.path.join(self.objects_dir, key), ignore_errors=True)
+            logger.info(f"Evicted artifact {key[:8]} from the artifact store")
+
+    def close(self):
+        """Save last-used times refreshed by hits since the last index save."""
+        with self.lock:
+            if self.dirty:
+                self._save_index()
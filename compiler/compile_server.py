@@ -0,0 +1,372 @@
+"""
+Long-lived compiler service.
+
+Instead of starting a fresh compile-genesys process (and paying for interpreter
+startup and compiler imports) for every candidate, a CompilerService keeps a few
+server processes alive. Each server loads its backend once and then answers
+requests sent over a pipe:
+
+    request:  {"id": int, "command": "compile" | "ping" | "shutdown",
+               "experiment_name": str, "tiling_config": dict}
+    response: {"id": int, "status": "ok" | "error", "output_dir": str | None,
+               "error": str | None, "compile_time": float}
+
+GenesysCompileBackend runs the real compiler in-process and parses the prepared
+model once, handing the compiler a copy of it for every request instead of
+re-reading the ONNX file; the compiler still lowers the graph and reads the arch
+config per request. LocalCompileBackend is
+a stand-in that derives outputs from an already compiled template directory, so
+the protocol can be exercised without the compiler installed.
+"""
+
+import os
+import sys
+import json
+import glob
+import time
+import queue
+import contextlib
+import shutil
+import itertools
+import threading
+import multiprocessing
+from utils.logging_utils import setup_logging
+from compiler.model_compiler import (
+    MANIFEST_FILE_NAME,
+    write_tiling_config,
+    build_compile_args,
+    clear_output_manifest,
+    finalize_compile_output,
+    read_output_manifest,
+    write_output_manifest
+)
+
+logger = setup_logging("genesys_optimizer.compile_server")
+
+COMPILER_ENTRY_POINT = "compile-genesys"
+
+# sys.argv and the onnx loaders are process-global, so in-process compiles take turns
+_compile_lock = threading.Lock()
+
+class GenesysCompileBackend:
+    """
+    Compiles candidates by calling the compile-genesys entry point inside the server process.
+
+    The prepared model is parsed once in load(); while a request runs, onnx.load
+    of the model path returns a copy of it instead of reading the file again.
+    """
+
+    def __init__(self, model_path, config_path, output_dir="genesys_compiler_output", fuse=False):
+        """
+        Args:
+            model_path: Path to the prepared model ONNX file
+            config_path: Path to the hardware config file
+            output_dir: Directory the compiler writes its outputs to
+            fuse: Whether to pass -f to the compiler
+        """
+        self.model_path = os.path.abspath(model_path)
+        self.config_path = os.path.abspath(config_path) if config_path else None
+        self.output_dir = output_dir
+        self.fuse = fuse
+        self.entry_point = None
+        # Parsed prepared model, shared by every request
+        self.model = None
+
+    def load(self):
+        """Import the compiler and parse the prepared model once. Raises if the compiler can't be loaded."""
+        from importlib.metadata import entry_points
+        matches = list(entry_points(group="console_scripts", name=COMPILER_ENTRY_POINT))
+        if not matches:
+            raise RuntimeError(f"No console script named {COMPILER_ENTRY_POINT} is installed")
+        self.entry_point = matches[0].load()
+
+        try:
+            import onnx
+        except ImportError:
+            logger.warning("The onnx package is not installed, every compile re-reads the model")
+            return
+        self.model = onnx.load(self.model_path)
+
+    @contextlib.contextmanager
+    def _cached_model(self):
+        """Serve the compiler's onnx.load of the prepared model from the parsed copy."""
+        if self.model is None:
+            yield
+            return
+
+        import onnx
+        original_load, original_load_model = onnx.load, onnx.load_model
+
+        def load(f, *args, **kwargs):
+            if isinstance(f, (str, os.PathLike)) and os.path.abspath(f) == self.model_path:
+                # The compiler may rewrite the graph, so it gets a copy
+                model = onnx.ModelProto()
+                model.CopyFrom(self.model)
+                return model
+            return original_load_model(f, *args, **kwargs)
+
+        onnx.load = onnx.load_model = load
+        try:
+            yield
+        finally:
+            onnx.load, onnx.load_model = original_load, original_load_model
+
+    def compile(self, experiment_name, tiling_config=None):
+        """
+        Compile one candidate.
+
+        Returns:
+            Absolute path to the output directory
+
+        Raises:
+            RuntimeError: If the compiler fails
+        """
+        tiling_file_path = write_tiling_config(experiment_name, tiling_config) if tiling_config else None
+        clear_output_manifest(self.model_path, self.config_path, experiment_name, self.output_dir)
+
+        argv = [COMPILER_ENTRY_POINT] + build_compile_args(self.model_path, self.config_path, experiment_name,
+                                                           tiling_file_path, self.fuse)
+        with _compile_lock, self._cached_model():
+            saved_argv = sys.argv
+            sys.argv = argv
+            try:
+                self.entry_point()
+            except SystemExit as e:
+                if e.code not in (None, 0):
+                    raise RuntimeError(f"{COMPILER_ENTRY_POINT} exited with code {e.code}")
+            finally:
+                sys.argv = saved_argv
+
+        full_output_dir = finalize_compile_output(self.model_path, self.config_path, experiment_name,
+                                                  self.output_dir)
+        if full_output_dir is None:
+            raise RuntimeError(f"Compiled output for {experiment_name} not found")
+        return full_output_dir
+
+class LocalCompileBackend:
+    """
+    Stand-in backend that needs no compiler.
+
+    Each compile copies a completed compile output (the template) under the new
+    experiment name and writes the requested tile_splits into the layer JSONs.
+    """
+
+    def __init__(self, template_dir, output_dir="genesys_compiler_output"):
+        """
+        Args:
+            template_dir: A compiled output directory with a manifest, e.g. the baseline compile
+            output_dir: Directory to write the derived outputs to
+        """
+        self.template_dir = os.path.abspath(template_dir)
+        self.output_dir = os.path.abspath(output_dir)
+        self.prefix = None
+
+    def load(self):
+        """Read the template's manifest to learn its {model}_{hw}_ prefix."""
+        manifest = read_output_manifest(self.template_dir)
+        if manifest is None:
+            raise RuntimeError(f"Template {self.template_dir} has no compile manifest")
+        dir_name = os.path.basename(self.template_dir)
+        template_exp = manifest["experiment_name"]
+        if not dir_name.endswith(template_exp):
+            raise RuntimeError(f"Template {dir_name} does not end with its experiment name {template_exp}")
+        self.prefix = dir_name[:len(dir_name) - len(template_exp)]
+
+    def compile(self, experiment_name, tiling_config=None):
+        """Derive the output directory of a candidate from the template."""
+        target_dir = os.path.join(self.output_dir, f"{self.prefix}{experiment_name}")
+        if os.path.exists(target_dir):
+            shutil.rmtree(target_dir)
+        shutil.copytree(self.template_dir, target_dir, ignore=shutil.ignore_patterns(MANIFEST_FILE_NAME))
+
+        for json_file in glob.glob(os.path.join(target_dir, "*", "*_json.json")):
+            with open(json_file, "r") as f:
+                layer_json = json.load(f)
+            for program in layer_json.get("program", []):
+                key = f"{program.get('operation')}_{program.get('instance_id')}"
+                if tiling_config and key in tiling_config:
+                    program["tile_splits"] = tiling_config[key]["1"]
+            with open(json_file, "w") as f:
+                json.dump(layer_json, f, indent=4)
+
+        write_output_manifest(target_dir, experiment_name)
+        return target_dir
+
+def _serve(conn, backend):
+    """Request loop of a compiler server process."""
+    load_error = None
+    try:
+        backend.load()
+    except Exception as e:
+        # Keep serving so the client gets the error instead of a dead pipe
+        load_error = f"Failed to load compiler backend: {str(e)}"
+
+    while True:
+        try:
+            request = conn.recv()
+        except (EOFError, OSError):
+            break
+
+        command = request.get("command")
+        response = {"id": request.get("id"), "status": "ok", "output_dir": None, "error": None,
+                    "compile_time": 0.0}
+
+        if command == "shutdown":
+            conn.send(response)
+            break
+        elif load_error:
+            response.update(status="error", error=load_error, unavailable=True)
+        elif command == "ping":
+            pass
+        elif command == "compile":
+            start_time = time.time()
+            try:
+                response["output_dir"] = backend.compile(request["experiment_name"], request.get("tiling_config"))
+            except Exception as e:
+                response.update(status="error", error=f"{type(e).__name__}: {str(e)}")
+            response["compile_time"] = time.time() - start_time
+        else:
+            response.update(status="error", error=f"Unknown command: {command}")
+
+        conn.send(response)
+
+    conn.close()
+
+class CompilerService:
+    """
+    Client side of the compiler servers.
+
+    Requests are handed to whichever server is idle, so up to num_workers
+    candidates compile at the same time. A server that stops answering within
+    the timeout is killed and replaced.
+    """
+
+    def __init__(self, backend, num_workers=1, timeout=600, max_retries=1):
+        """
+        Start the server processes and wait until they have loaded the backend.
+
+        Args:
+            backend: GenesysCompileBackend or LocalCompileBackend to run in every server
+            num_workers: Number of server processes
+            timeout: Maximum seconds to wait for a single request
+            max_retries: Attempts per compile request
+        """
+        self.backend = backend
+        self.num_workers = max(1, num_workers)
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.context = multiprocessing.get_context("spawn")
+        self.processes = {}
+        self.idle = queue.Queue()
+        self.request_ids = itertools.count()
+        self.id_lock = threading.Lock()
+        self.available = True
+
+        for _ in range(self.num_workers):
+            self.idle.put(self._start_server())
+
+        # Every server has to load the backend before it answers the ping
+        self.available = all(self.ping() for _ in range(self.num_workers))
+        if self.available:
+            logger.info(f"Started compiler service with {self.num_workers} servers")
+        else:
+            logger.warning("Compiler service unavailable, compiles will fall back to compile-genesys processes")
+
+    def _start_server(self):
+        parent_conn, child_conn = self.context.Pipe()
+        process = self.context.Process(target=_serve, args=(child_conn, self.backend), daemon=True)
+        process.start()
+        child_conn.close()
+        self.processes[parent_conn] = process
+        return parent_conn
+
+    def _replace_server(self, conn):
+        process = self.processes.pop(conn)
+        process.terminate()
+        process.join(5)
+        conn.close()
+        return self._start_server()
+
+    def _request(self, command, **fields):
+        """Send a request to an idle server and wait for its response (None on timeout)."""
+        with self.id_lock:
+            request_id = next(self.request_ids)
+        request = dict(fields, id=request_id, command=command)
+
+        conn = self.idle.get()
+        response = None
+        try:
+            conn.send(request)
+            if conn.poll(self.timeout):
+                response = conn.recv()
+                if response.get("id") != request_id:
+                    logger.error(f"Compiler server answered request {response.get('id')} instead of {request_id}")
+                    response = None
+            else:
+                logger.error(f"Compiler server timed out after {self.timeout}s on {command}")
+        except (EOFError, OSError) as e:
+            logger.error(f"Compiler server connection failed: {str(e)}")
+
+        if response is None:
+            # The server is stuck or out of sync - replace it
+            conn = self._replace_server(conn)
+        self.idle.put(conn)
+        return response
+
+    def ping(self):
+        """Check that a server is alive and has its backend loaded."""
+        response = self._request("ping")
+        if response is None:
+            return False
+        if response["status"] != "ok":
+            logger.warning(f"Compiler server error: {response['error']}")
+            return False
+        return True
+
+    def compile(self, experiment_name, tiling_config=None):
+        """
+        Compile a candidate on a warm server.
+
+        Args:
+            experiment_name: Name of the experiment
+            tiling_config: Tiling configuration dictionary
+
+        Returns:
+            Absolute path to the compiled output directory, or None if compilation failed
+        """
+        if not self.available:
+            return None
+
+        for i in range(self.max_retries):
+            response = self._request("compile", experiment_name=experiment_name, tiling_config=tiling_config)
+            if response is not None and response["status"] == "ok":
+                logger.info(f"Compiled {experiment_name} in {response['compile_time']:.2f}s")
+                return response["output_dir"]
+
+            error = response["error"] if response else "no response"
+            logger.warning(f"Compile attempt {i+1}/{self.max_retries} for {experiment_name} failed: {error}")
+            if response is not None and response.get("unavailable"):
+                self.available = False
+                break
+        return None
+
+    def close(self):
+        """Shut the servers down."""
+        for conn, process in list(self.processes.items()):
+            try:
+                conn.send({"id": None, "command": "shutdown"})
+                conn.poll(5)
+            except (EOFError, OSError):
+                pass
+            process.join(5)
+            if process.is_alive():
+                process.terminate()
+            conn.close()
+        self.processes.clear()
+        logger.info("Compiler service stopped")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
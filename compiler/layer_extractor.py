@@ -24,7 +24,7 @@ def get_hardware_config_from_config_path(config_path):
             return "genesys16x16"
     return None
 
-def find_output_dir(base_dir, model_name, exp_name, config_path=None):
+def find_output_dir(base_dir, model_name, exp_name, config_path=None, log_missing=True):
     """
     Find the correct output directory, accounting for hardware configuration.
     
@@ -33,6 +33,7 @@ def find_output_dir(base_dir, model_name, exp_name, config_path=None):
         model_name: Name of the model
         exp_name: Experiment name
         config_path: Path to the hardware configuration file
+        log_missing: Whether to log an error if the directory doesn't exist
         
     Returns:
         Path to the output directory if found, otherwise None
@@ -58,7 +59,8 @@ def find_output_dir(base_dir, model_name, exp_name, config_path=None):
     if matches:
         return matches[0]
     
-    logger.error(f"Output directory does not exist: {os.path.join(base_dir, f'{model_name}_{exp_name}')}")
+    if log_missing:
+        logger.error(f"Output directory does not exist: {os.path.join(base_dir, f'{model_name}_{exp_name}')}")
     return None
 
 def extract_layers_info(output_dir: str, layer_name:str) -> list:
@@ -107,7 +109,8 @@ def extract_layers_info(output_dir: str, layer_name:str) -> list:
                     "dimensions":     dimensions,
                     "iterable_dimensions":   dimensions,
                     "tile_splits": tile_splits,
-                    "tiling_key": f"{operation}_{instance_id}"
+                    "tiling_key": f"{operation}_{instance_id}",
+                    "operands": extract_operands(op)
                 }
             
     except json.JSONDecodeError as e:
@@ -118,6 +121,53 @@ def extract_layers_info(output_dir: str, layer_name:str) -> list:
         return None
     
 
+def extract_operands(op: dict) -> list:
+    """Summarize the operands of a layer program: shapes, data widths and where they are buffered.
+
+    Args:
+        op (dict): Program entry of a layer JSON
+
+    Returns:
+        list: One dict per operand with name, unique_name (the graph tensor it came from), kind ("input"/"intermediate"/"output"), dtype,
+            bits, shape_symbols, data_path and the per-level tiling
+    """
+    operands = []
+    for kind, key in (("input", "inputs"), ("intermediate", "intermediate"), ("output", "outputs")):
+        for operand in op.get(key, []):
+            dtype = operand.get("dtype", "")
+            width = "".join(ch for ch in dtype if ch.isdigit())
+            operands.append({
+                "name": operand.get("name"),
+                "unique_name": operand.get("unique_name"),
+                "kind": kind,
+                "dtype": dtype,
+                "bits": int(width) if width else 8,
+                "shape_symbols": operand.get("shape_symbols", {}),
+                "data_path": operand.get("data_path", []),
+                "tiling": operand.get("tiling", {})
+            })
+    return operands
+
+def load_arch_config(output_dir: str) -> dict:
+    """Load the architecture config the compiler wrote into an output directory.
+
+    Args:
+        output_dir (str): Compiler output directory containing *_arch_cfg.json
+
+    Returns:
+        dict: Architecture parameters (ARRAY_N, IBUF_DEPTH, ...) or None if not found
+    """
+    arch_files = sorted(glob.glob(os.path.join(output_dir, "*_arch_cfg*.json")))
+    if not arch_files:
+        logger.error(f"No architecture config found in {output_dir}")
+        return None
+    try:
+        with open(arch_files[0], "r") as f:
+            return json.load(f)
+    except (json.JSONDecodeError, IOError) as e:
+        logger.error(f"Error reading architecture config {arch_files[0]}: {e}")
+        return None
+
 def get_all_layers(output_dir: str) -> dict:
     """Get all layers from the output directory.
 
@@ -1,9 +1,11 @@
 import os
 import json
 import time
+import shutil
 import subprocess
 import threading
 from utils.logging_utils import setup_logging
+from compiler.layer_extractor import find_output_dir, get_hardware_config_from_config_path, extract_layers_info
 
 logger = setup_logging("genesys_optimizer.compiler")
 
@@ -12,6 +14,59 @@ logger = setup_logging("genesys_optimizer.compiler")
 MAX_CONCURRENT_COMPILES = 4  # Adjust based on your system's capabilities
 compile_semaphore = threading.Semaphore(MAX_CONCURRENT_COMPILES)
 
+def set_max_concurrent_compiles(max_compiles):
+    """Resize the limit on concurrent compiles, e.g. to match the compile stage of the pipeline."""
+    global compile_semaphore
+    compile_semaphore = threading.Semaphore(max(1, max_compiles))
+
+# Written into an output directory once the compiler process has exited, so
+# consumers can tell a finished output apart from one still being written
+MANIFEST_FILE_NAME = ".compile_manifest.json"
+
+def write_output_manifest(full_output_dir, experiment_name):
+    """
+    Record the layers and files of a finished compiler output directory.
+    
+    Args:
+        full_output_dir: Absolute path to the compiler output directory
+        experiment_name: Name of the experiment that produced the output
+        
+    Returns:
+        Path to the manifest file, or None if it could not be written
+    """
+    layers = {}
+    for entry in sorted(os.listdir(full_output_dir)):
+        layer_dir = os.path.join(full_output_dir, entry)
+        if os.path.isdir(layer_dir):
+            layers[entry] = sorted(os.listdir(layer_dir))
+    
+    manifest = {
+        "experiment_name": experiment_name,
+        "completed_at": time.time(),
+        "layers": layers
+    }
+    
+    manifest_path = os.path.join(full_output_dir, MANIFEST_FILE_NAME)
+    try:
+        # Write to temporary file first so readers never see a partial manifest
+        temp_file = f"{manifest_path}.tmp"
+        with open(temp_file, "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(temp_file, manifest_path)
+        return manifest_path
+    except (IOError, OSError) as e:
+        logger.error(f"Failed to write output manifest {manifest_path}: {str(e)}")
+        return None
+
+def read_output_manifest(full_output_dir):
+    """Read the manifest of a finished compiler output directory, or None if there is none."""
+    manifest_path = os.path.join(full_output_dir, MANIFEST_FILE_NAME)
+    try:
+        with open(manifest_path, "r") as f:
+            return json.load(f)
+    except (IOError, OSError, json.JSONDecodeError):
+        return None
+
 def prepare_model(model_path, max_retries = 0) -> bool:
     """Prepare the model for compilation.
 
@@ -45,44 +100,111 @@ def prepare_model(model_path, max_retries = 0) -> bool:
     return False
 
 
-def compile_model(model_path, config_path, experiment_name, tiling_config=None, fuse=False, max_retries = 1) -> bool:
-    """Compile the model after the model has been prepared for compilation."""
+def write_tiling_config(experiment_name, tiling_config):
+    """
+    Write a tiling configuration to the tiling_config directory.
+    
+    Args:
+        experiment_name: Name of the experiment the tiling is for
+        tiling_config: Tiling configuration dictionary
+        
+    Returns:
+        Absolute path to the tiling config file
+    """
+    # Create an absolute path to tiling_config directory
+    tiling_config_dir = os.path.abspath("tiling_config")
+    
+    # create the tiling_config dir if needed - exist_ok since parallel workers race on it
+    os.makedirs(tiling_config_dir, exist_ok=True)
+
+    # Use absolute path for the tiling config file
+    tiling_file_name = f"tiling_{experiment_name}.json"
+    tiling_file_path = os.path.join(tiling_config_dir, tiling_file_name)
+    
+    with open(tiling_file_path, "w") as f:
+        json.dump(tiling_config, f, indent=4)
+    return tiling_file_path
+
+def build_compile_args(model_path, config_path, experiment_name, tiling_file_path=None, fuse=False):
+    """Build the compile-genesys arguments (without the program name) for an experiment."""
+    args = ["-m", model_path]
+    if config_path:
+        args.extend(["-c", config_path])
+    args.extend(["-e", experiment_name])
+    if tiling_file_path:
+        # Use absolute path in the command
+        args.extend(["-t", tiling_file_path])
+    if fuse:
+        # if fuse is true add -f to the command
+        args.append("-f")
+    return args
+
+def clear_output_manifest(model_path, config_path, experiment_name, output_dir="genesys_compiler_output"):
+    """Drop the manifest of any previous compile so the output isn't treated as ready early."""
+    model_name = os.path.basename(model_path).split('.')[0]
+    previous_output_dir = find_output_dir(os.path.abspath(output_dir), model_name, experiment_name, config_path,
+                                          log_missing=False)
+    if previous_output_dir and os.path.exists(os.path.join(previous_output_dir, MANIFEST_FILE_NAME)):
+        os.remove(os.path.join(previous_output_dir, MANIFEST_FILE_NAME))
+
+def finalize_compile_output(model_path, config_path, experiment_name, output_dir="genesys_compiler_output"):
+    """
+    Mark a finished compile's output directory ready by writing its manifest.
+    
+    Returns:
+        Absolute path to the output directory, or None if it could not be found
+    """
+    model_name = os.path.basename(model_path).split('.')[0]
+    full_output_dir = find_output_dir(os.path.abspath(output_dir), model_name, experiment_name, config_path)
+    if full_output_dir:
+        write_output_manifest(full_output_dir, experiment_name)
+    else:
+        logger.warning(f"Compiled output for {experiment_name} not found, no manifest written")
+    return full_output_dir
+
+def get_output_dir_path(model_path, config_path, experiment_name, output_dir="genesys_compiler_output"):
+    """Get the absolute path the compiler writes an experiment's output to."""
+    model_name = os.path.basename(model_path).split('.')[0]
+    hardware_config = get_hardware_config_from_config_path(config_path)
+    if hardware_config:
+        dir_name = f"{model_name}_{hardware_config}_{experiment_name}"
+    else:
+        dir_name = f"{model_name}_{experiment_name}"
+    return os.path.join(os.path.abspath(output_dir), dir_name)
+
+def compile_model(model_path, config_path, experiment_name, tiling_config=None, fuse=False, max_retries = 1,
+                  output_dir="genesys_compiler_output", artifact_store=None) -> bool:
+    """Compile the model after the model has been prepared for compilation.
+
+    Once the compiler process has exited successfully, a manifest is written
+    into the experiment's output directory to mark it ready for simulation.
+    With an artifact_store, a compile of the same model, config and tiling is
+    restored from the store instead of running the compiler again.
+    """
+    model_path = os.path.abspath(model_path)
+    config_path = os.path.abspath(config_path) if config_path else None
+
+    if not os.path.exists(model_path):
+        logger.error(f"Model path does not exist: {model_path}")
+        return False
+
+    artifact_key = None
+    if artifact_store is not None:
+        artifact_key = artifact_store.compute_key(model_path, config_path, tiling_config, fuse)
+        target_dir = get_output_dir_path(model_path, config_path, experiment_name, output_dir)
+        if artifact_store.fetch(artifact_key, target_dir, experiment_name):
+            return True
+
     # Use semaphore to limit concurrent compilations
     with compile_semaphore:
-        model_path = os.path.abspath(model_path)
-        config_path = os.path.abspath(config_path) if config_path else None
-
-        if not os.path.exists(model_path):
-            logger.error(f"Model path does not exist: {model_path}")
-            return False
-        
-        if config_path:
-            cmd = ["compile-genesys", "-m", model_path, "-c", config_path, "-e", experiment_name]
-        else:
-            cmd = ["compile-genesys", "-m", model_path, "-e", experiment_name]
-        
         tiling_file_path = None
-        # Create an absolute path to tiling_config directory
-        tiling_config_dir = os.path.abspath("tiling_config")
-        
-        # check if tiling_config dir exists if not create it
-        if not os.path.exists(tiling_config_dir):
-            os.makedirs(tiling_config_dir)
-
         if tiling_config:
-            # Use absolute path for the tiling config file
-            tiling_file_name = f"tiling_{experiment_name}.json"
-            tiling_file_path = os.path.join(tiling_config_dir, tiling_file_name)
-            
-            with open(tiling_file_path, "w") as f:
-                json.dump(tiling_config, f, indent=4)
-            
-            # Use absolute path in the command
-            cmd.extend(["-t", tiling_file_path])
-
-        if fuse:
-            # if fuse is true add -f to the command
-            cmd.append("-f")
+            tiling_file_path = write_tiling_config(experiment_name, tiling_config)
+        
+        cmd = ["compile-genesys"] + build_compile_args(model_path, config_path, experiment_name,
+                                                       tiling_file_path, fuse)
+        
+        clear_output_manifest(model_path, config_path, experiment_name, output_dir)
         
         success = False
         for i in range(max_retries):
@@ -105,11 +227,241 @@ def compile_model(model_path, config_path, experiment_name, tiling_config=None,
                     logger.error(f" Failed to compile the model after {max_retries} attempts.")
         
         if success:
-            # After successful compilation, wait longer to ensure output directory is properly created
-            # before letting the semaphore go
-            completion_wait = 3.0  # Increased from 1.0 to 3.0 seconds
-            logger.info(f"Compilation successful. Waiting {completion_wait} seconds for file writing to complete...")
-            time.sleep(completion_wait)
+            # The compiler has exited, so its output is complete - mark it ready
+            full_output_dir = finalize_compile_output(model_path, config_path, experiment_name, output_dir)
+            if artifact_key is not None and full_output_dir:
+                artifact_store.put(artifact_key, full_output_dir)
             return True
         return False
 
+
+
+# Serialises extraction of per-layer ONNX models so that concurrent workers
+# optimizing the same layer don't write the same file at the same time
+_layer_model_lock = threading.Lock()
+
+# Layers whose single-layer compile can't stand in for the full model - their
+# candidates go straight to full compiles
+_full_compile_layers = set()
+
+def _normalize_tensor_name(name):
+    """Normalize a graph tensor name the way the compiler spells it in unique_name ("/a/b_output_0" -> "a_b_output_0")."""
+    return name.replace("/", "_").lstrip("_")
+
+def find_layer_node(nodes, layer_info):
+    """
+    Find the graph node a compiled layer was generated from.
+
+    The compiler doesn't number its layers by graph node - nodes can be expanded
+    into several layers or folded away - so the layer is matched through the
+    unique_name of its outputs in the default output, which is the graph tensor
+    name with "/" replaced and an operand suffix ("_Y") appended.
+
+    Args:
+        nodes: Nodes of the prepared model's graph
+        layer_info: Layer information from the default output, with its operands
+
+    Returns:
+        The node whose outputs are the layer's outputs, or None if there is no such node
+    """
+    layer_outputs = set()
+    for operand in layer_info.get("operands", []):
+        if operand.get("kind") == "output" and operand.get("unique_name"):
+            unique_name = _normalize_tensor_name(operand["unique_name"])
+            layer_outputs.add(unique_name)
+            layer_outputs.add(unique_name.rsplit("_", 1)[0])
+    if not layer_outputs:
+        return None
+
+    for node in nodes:
+        if any(name and _normalize_tensor_name(name) in layer_outputs for name in node.output):
+            return node
+    return None
+
+def extract_layer_model(model_path, layer_name, layer_info, layer_model_dir="layer_models"):
+    """
+    Extract the ONNX node behind a compiled layer into a standalone single-node model.
+
+    The node is found through the layer's output tensor names in the default
+    output (see find_layer_node). The extracted model is written once per layer
+    and reused by every candidate for that layer.
+
+    Args:
+        model_path: Path to the prepared ONNX model
+        layer_name: Name of the layer directory in the default output (e.g. "layer3_conv_bias4")
+        layer_info: Layer information from the default output
+        layer_model_dir: Directory to store the extracted single-layer models
+
+    Returns:
+        Path to the single-layer model, or None if it could not be extracted
+    """
+    model_path = os.path.abspath(model_path)
+    model_name = os.path.basename(model_path).split('.')[0]
+    layer_model_dir = os.path.abspath(layer_model_dir)
+    layer_model_path = os.path.join(layer_model_dir, f"{model_name}_{layer_name}.onnx")
+
+    with _layer_model_lock:
+        if os.path.exists(layer_model_path):
+            return layer_model_path
+
+        try:
+            import onnx
+            import onnx.utils
+        except ImportError:
+            logger.error("The onnx package is required for single-layer compilation")
+            return None
+
+        try:
+            model = onnx.load(model_path)
+            node = find_layer_node(model.graph.node, layer_info)
+            if node is None:
+                logger.warning(f"No graph node produces the outputs of {layer_name}")
+                return None
+
+            initializers = {init.name for init in model.graph.initializer}
+            input_names = [name for name in node.input if name and name not in initializers]
+            output_names = [name for name in node.output if name]
+
+            os.makedirs(layer_model_dir, exist_ok=True)
+            onnx.utils.extract_model(model_path, layer_model_path, input_names, output_names)
+            logger.info(f"Extracted single-layer model for {layer_name} from node {node.name}: {layer_model_path}")
+            return layer_model_path
+        except Exception as e:
+            logger.error(f"Failed to extract single-layer model for {layer_name}: {str(e)}")
+            if os.path.exists(layer_model_path):
+                os.remove(layer_model_path)
+            return None
+
+def read_single_layer_output(layer_output_dir):
+    """Get the layer information of a single-layer compile, or None if it didn't compile to exactly one layer."""
+    compiled_layers = [d for d in os.listdir(layer_output_dir)
+                       if os.path.isdir(os.path.join(layer_output_dir, d))]
+    if len(compiled_layers) != 1:
+        logger.warning(f"Expected exactly one layer in {layer_output_dir}, found {len(compiled_layers)}")
+        return None
+    return extract_layers_info(layer_output_dir, compiled_layers[0])
+
+def assemble_layer_output(layer_output_dir, target_dir, model_name, layer_name, operation, instance_id):
+    """
+    Move a single-layer compiler output into a minimal output directory for the simulator.
+
+    The single-layer model compiles its only layer as layer0_<operation>1, so the
+    layer directory and its codelet files are renamed back to the names used in
+    the full model's output.
+
+    Args:
+        layer_output_dir: Compiler output directory of the single-layer model
+        target_dir: Minimal output directory to create
+        model_name: Name of the full model
+        layer_name: Name of the layer in the full model (e.g. "layer3_conv_bias4")
+        operation: Compiler operation name of the layer
+        instance_id: Instance id of the layer in the full model
+
+    Returns:
+        Path to the minimal output directory, or None on failure
+    """
+    compiled_layers = [d for d in os.listdir(layer_output_dir)
+                       if os.path.isdir(os.path.join(layer_output_dir, d))]
+    if len(compiled_layers) != 1:
+        logger.error(f"Expected exactly one layer in {layer_output_dir}, found {len(compiled_layers)}")
+        return None
+
+    if os.path.exists(target_dir):
+        shutil.rmtree(target_dir)
+    os.makedirs(target_dir)
+
+    # Arch config and any other top-level files are shared by all layers
+    for file_name in os.listdir(layer_output_dir):
+        src = os.path.join(layer_output_dir, file_name)
+        if os.path.isfile(src) and file_name != MANIFEST_FILE_NAME:
+            suffix = file_name.split("_arch_cfg", 1)
+            dst_name = f"{model_name}_arch_cfg{suffix[1]}" if len(suffix) == 2 else file_name
+            shutil.copy2(src, os.path.join(target_dir, dst_name))
+
+    src_prefix = f"{operation}1_"
+    dst_prefix = f"{operation}{instance_id}_"
+    src_layer_dir = os.path.join(layer_output_dir, compiled_layers[0])
+    dst_layer_dir = os.path.join(target_dir, layer_name)
+    os.makedirs(dst_layer_dir)
+    for file_name in os.listdir(src_layer_dir):
+        dst_name = file_name
+        if file_name.startswith(src_prefix):
+            dst_name = dst_prefix + file_name[len(src_prefix):]
+        os.replace(os.path.join(src_layer_dir, file_name), os.path.join(dst_layer_dir, dst_name))
+
+    shutil.rmtree(layer_output_dir, ignore_errors=True)
+    write_output_manifest(target_dir, os.path.basename(target_dir))
+    return target_dir
+
+def compile_layer(model_path, config_path, experiment_name, layer_name, layer_info, tile_splits,
+                  output_dir="genesys_compiler_output", max_retries=1, artifact_store=None):
+    """
+    Compile only a single layer of the model with the given tile splits.
+
+    Instead of regenerating every codelet in the model, the graph node behind the
+    layer is extracted into a single-node model, compiled on its own and placed
+    into a minimal output directory that only contains that layer. The layer must
+    come out with the operation and dimensions it has in the default output and
+    with the requested tile splits; otherwise the whole model is compiled, so a
+    candidate's metric always belongs to the layer the full model compiles.
+
+    Args:
+        model_path: Path to the prepared model file
+        config_path: Path to the hardware configuration file
+        experiment_name: Name of the experiment
+        layer_name: Name of the layer in the default output (e.g. "layer3_conv_bias4")
+        layer_info: Dictionary containing layer information from the default output
+        tile_splits: Tile splits to compile the layer with
+        output_dir: Base directory the compiler writes its output to
+        max_retries: Maximum number of compilation attempts
+        artifact_store: Optional ArtifactStore used when the whole model is compiled
+
+    Returns:
+        Path to the output directory, or None if compilation failed
+    """
+    operation = layer_info["operation"]
+    instance_id = layer_info.get("instance_id", 1)
+    model_name = os.path.basename(model_path).split('.')[0]
+    target_dir = get_output_dir_path(model_path, config_path, experiment_name, output_dir)
+
+    layer_key = (os.path.abspath(model_path), layer_name)
+    layer_model_path = None
+    if layer_key not in _full_compile_layers:
+        layer_model_path = extract_layer_model(model_path, layer_name, layer_info)
+        if layer_model_path is None:
+            logger.warning(f"Single-layer compilation unavailable for {layer_name}, compiling the whole model")
+            _full_compile_layers.add(layer_key)
+
+    layer_output_dir = None
+    if layer_model_path is not None:
+        # The extracted node is the first (and only) layer of the single-layer model
+        layer_tiling_config = {f"{operation}_1": {"1": dict(tile_splits)}}
+        if compile_model(layer_model_path, config_path, experiment_name, tiling_config=layer_tiling_config,
+                         max_retries=max_retries, output_dir=output_dir):
+            layer_model_name = os.path.basename(layer_model_path).split('.')[0]
+            layer_output_dir = find_output_dir(os.path.abspath(output_dir), layer_model_name, experiment_name,
+                                               config_path)
+
+    if layer_output_dir is not None:
+        compiled_info = read_single_layer_output(layer_output_dir)
+        if (compiled_info is None or compiled_info["operation"] != operation
+                or compiled_info["dimensions"] != layer_info["dimensions"]):
+            logger.warning(f"Single-layer model of {layer_name} compiles to a different layer than the default "
+                           f"output, compiling the whole model instead")
+            _full_compile_layers.add(layer_key)
+        elif any(compiled_info["tile_splits"].get(dim) != split for dim, split in tile_splits.items()):
+            logger.warning(f"Single-layer compile of {layer_name} has tile_splits {compiled_info['tile_splits']} "
+                           f"instead of {dict(tile_splits)}, compiling the whole model instead")
+        else:
+            try:
+                return assemble_layer_output(layer_output_dir, target_dir, model_name, layer_name,
+                                             operation, instance_id)
+            except OSError as e:
+                logger.error(f"Failed to assemble single-layer output for {layer_name}: {str(e)}")
+        shutil.rmtree(layer_output_dir, ignore_errors=True)
+
+    tiling_config = {layer_info["tiling_key"]: {"1": dict(tile_splits)}}
+    if not compile_model(model_path, config_path, experiment_name, tiling_config=tiling_config,
+                         max_retries=max_retries, output_dir=output_dir, artifact_store=artifact_store):
+        return None
+    return target_dir
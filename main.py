@@ -14,15 +14,31 @@ import time
 from pathlib import Path
 
 from utils.logging_utils import setup_logging
-from compiler.model_compiler import prepare_model, compile_model
+from compiler.model_compiler import prepare_model, compile_model, set_max_concurrent_compiles
 from compiler.layer_extractor import (
     get_all_layers, 
     filter_layers_by_pattern, 
     filter_layers_by_operation,
     extract_layers_info, 
-    find_output_dir
+    find_output_dir,
+    load_arch_config
 )
-from optimizer.layer_optimizer import optimize_layers_parallel, build_final_tiling_config
+from simulator.sim_pool import SimulatorPool
+from compiler.compile_server import CompilerService, GenesysCompileBackend
+from compiler.artifact_store import ArtifactStore
+from simulator.eval_cache import EvaluationCache
+from simulator.simulator import set_max_concurrent_runs
+from optimizer.layer_optimizer import (
+    optimize_layers_parallel,
+    optimize_layers_packed,
+    build_final_tiling_config
+)
+from optimizer.async_engine import optimize_layers_async
+from optimizer.cost_model import CostModel
+from optimizer.surrogate import SurrogateModel
+from optimizer.early_stopping import EarlyStopping
+from optimizer.checkpoint import CheckpointManager
+from optimizer.cache import OptimizationCache
 
 def parse_arguments():
     """Parse command line arguments."""
@@ -63,6 +79,69 @@ def parse_arguments():
                         help='Directory to store layer cache files')
     parser.add_argument('--clear_cache', action='store_true',
                         help='Clear the layer cache before starting')
+    parser.add_argument('--single_layer_compile', action='store_true',
+                        help='Compile only the layer being optimized for each candidate instead of the whole model')
+    parser.add_argument('--pack_layers', action='store_true',
+                        help='Evaluate one candidate of every layer per compile+simulate run')
+    parser.add_argument('--sim_backend', type=str, default='subprocess', choices=['subprocess', 'pool'],
+                        help='Run each simulation in a fresh process or on a pool of warm simulator workers')
+    parser.add_argument('--sim_pool_workers', type=int, default=None,
+                        help='Number of warm simulator workers for --sim_backend pool (default: number of CPUs)')
+    parser.add_argument('--compiler_backend', type=str, default='subprocess', choices=['subprocess', 'daemon'],
+                        help='Run compile-genesys per candidate, or keep warm compiler servers running (daemon)')
+    parser.add_argument('--compiler_workers', type=int, default=4,
+                        help='Number of compiler servers for --compiler_backend daemon')
+    parser.add_argument('--artifact_dir', type=str, default='compile_artifacts',
+                        help='Directory of the content-addressed store of finished compiler outputs')
+    parser.add_argument('--artifact_store_gb', type=float, default=20.0,
+                        help='Size budget of the compile artifact store in GB (least recently used evicted first)')
+    parser.add_argument('--disable_artifact_store', action='store_true',
+                        help='Always run the compiler instead of reusing identical compiles')
+    parser.add_argument('--disable_eval_cache', action='store_true',
+                        help='Always simulate instead of reusing metrics of identical layer instruction streams')
+    parser.add_argument('--compile_stage_workers', type=int, default=None,
+                        help='Number of compile workers in the compile/simulate pipeline (default: derived from max_workers)')
+    parser.add_argument('--sim_stage_workers', type=int, default=None,
+                        help='Number of simulate workers in the compile/simulate pipeline (default: derived from max_workers)')
+    parser.add_argument('--stage_queue_size', type=int, default=None,
+                        help='Capacity of the queue between the compile and simulate stages (default: 2 x simulate workers)')
+    parser.add_argument('--task_queue_size', type=int, default=None,
+                        help='Capacity of the queue candidates are streamed through to the compile workers (default: 4 x compile workers)')
+    parser.add_argument('--layer_quantum', type=int, default=1,
+                        help='Candidates streamed from a layer before moving to the next one (0 = one layer at a time)')
+    parser.add_argument('--engine', type=str, default='threads', choices=['threads', 'async'],
+                        help='Drive candidates with worker threads, or with asyncio subprocesses from a single thread')
+    parser.add_argument('--compile_timeout', type=int, default=600,
+                        help='Seconds before a compiler process is killed (async engine)')
+    parser.add_argument('--sim_timeout', type=int, default=90,
+                        help='Seconds before a simulator process is killed (async engine)')
+    parser.add_argument('--cost_model', action='store_true',
+                        help='Rank all candidates with the analytical cost model and only evaluate the '
+                             'max_configs_per_layer best predicted ones')
+    parser.add_argument('--disable_buffer_filter', action='store_true',
+                        help='Queue candidates even if their tiles exceed the on-chip buffers of the arch config')
+    parser.add_argument('--alignment', type=str, default=None, choices=['restrict', 'reorder'],
+                        help='Only try splits whose tiles fill whole array rows/columns and SIMD lanes (restrict), '
+                             'or try those first (reorder)')
+    parser.add_argument('--surrogate', action='store_true',
+                        help='Pick sampled candidates with a surrogate model trained on past evaluations '
+                             'instead of at random')
+    parser.add_argument('--search_strategy', type=str, default='sample', choices=['sample', 'bayesian', 'local', 'evolutionary'],
+                        help='How candidates are chosen: a fixed sample of max_configs_per_layer candidates, '
+                             'Bayesian optimization that picks each next candidate from the results so far, '
+                             'hill climbing over neighbouring split factors, or a genetic search '
+                             '(budget: max_configs_per_layer)')
+    parser.add_argument('--population_size', type=int, default=16,
+                        help='Configurations per generation of the evolutionary search')
+    parser.add_argument('--generations', type=int, default=10,
+                        help='Generations of the evolutionary search')
+    parser.add_argument('--early_stop_patience', type=int, default=None,
+                        help='Stop a layer after this many results without improving its best')
+    parser.add_argument('--early_stop_min_delta', type=float, default=0.0,
+                        help='Relative improvement (e.g. 0.01 = 1%%) a result needs to reset the patience')
+    parser.add_argument('--early_stop_bound', type=float, default=None,
+                        help='Stop a layer once its best is within this fraction (e.g. 0.05 = 5%%) of the '
+                             'cost model lower bound over its candidates')
     
     args = parser.parse_args()
     
@@ -111,11 +190,22 @@ def main():
     else:
         logger.info("Layer similarity caching is DISABLED")
     
+    # Reuse finished compiles of identical (model, config, tiling) inputs across runs
+    artifact_store = None
+    if not args.disable_artifact_store:
+        artifact_store = ArtifactStore(args.artifact_dir, max_bytes=int(args.artifact_store_gb * 1024 ** 3))
+    
+    # Reuse simulator metrics of candidates that compile to identical instructions
+    eval_cache = None
+    if not args.disable_eval_cache:
+        eval_cache = EvaluationCache(model_name, args.cache_dir)
+    
     # Step 1: Compile the model with default settings
     exp_name = "default"
     logger.info("Step 1: Preparing and compiling model with default settings")
     prepare_model(args.model_path, max_retries=args.compile_retries)
-    compile_success = compile_model(args.model_path, args.config_path, experiment_name=exp_name, max_retries=args.compile_retries)
+    compile_success = compile_model(args.model_path, args.config_path, experiment_name=exp_name, max_retries=args.compile_retries,
+                                   output_dir=args.output_dir, artifact_store=artifact_store)
     
     if not compile_success:
         logger.error("Initial compilation failed after all retries. Exiting.")
@@ -159,24 +249,179 @@ def main():
         else:
             logger.warning(f"Skipping layer {layer} - couldn't extract info")
     
+    # Pre-rank candidates from the arch config the default compile wrote
+    cost_model = None
+    if args.cost_model:
+        cost_model = CostModel.from_output_dir(default_output_dir)
+        if cost_model is None:
+            logger.warning("No architecture config for the cost model, falling back to the default candidate generation")
+    
+    # Prune candidates whose tiles don't fit the on-chip buffers before they are queued
+    arch_config = None
+    if not args.disable_buffer_filter:
+        arch_config = cost_model.arch_config if cost_model is not None else load_arch_config(default_output_dir)
+    if args.alignment:
+        logger.info(f"Using {args.alignment} alignment of split factors to the array geometry")
+    
+    # Learn from every evaluation so far, including the best results of earlier runs
+    surrogate = None
+    if args.surrogate:
+        surrogate = SurrogateModel(model_name, args.cache_dir)
+        surrogate.load_past_results(
+            layers_info,
+            checkpoint_results=CheckpointManager(model_name, os.path.abspath(args.checkpoint_dir)).load_checkpoint(),
+            optimization_cache=OptimizationCache(model_name, args.cache_dir) if args.enable_caching else None
+        )
+    
+    # Adaptive strategies pick each next candidate from the results so far
+    search_strategy = None if args.search_strategy == 'sample' else args.search_strategy
+    search_options = None
+    if search_strategy:
+        logger.info(f"Using the {search_strategy} search strategy with a budget of "
+                    f"{args.max_configs_per_layer} configurations per layer")
+    if search_strategy == 'evolutionary':
+        search_options = {"population_size": args.population_size, "generations": args.generations}
+    
+    # Stop searching layers once they have converged
+    early_stopping = None
+    if args.early_stop_patience or args.early_stop_bound is not None:
+        bound_model = None
+        if args.early_stop_bound is not None:
+            bound_model = cost_model or CostModel.from_output_dir(default_output_dir)
+        early_stopping = EarlyStopping(patience=args.early_stop_patience, min_delta=args.early_stop_min_delta,
+                                       bound_tolerance=args.early_stop_bound, cost_model=bound_model,
+                                       metric=args.metric)
+    
+    # Start warm simulator workers if requested - the subprocess path stays as a fallback
+    sim_pool = None
+    if args.sim_backend == 'pool':
+        sim_pool = SimulatorPool(args.sim_path, num_workers=args.sim_pool_workers)
+    
+    # Start warm compiler servers if requested - fall back to compile-genesys processes if they can't load
+    compiler_service = None
+    if args.compiler_backend == 'daemon' and not args.single_layer_compile:
+        backend = GenesysCompileBackend(args.model_path, args.config_path, output_dir=args.output_dir)
+        compiler_service = CompilerService(backend, num_workers=args.compiler_workers,
+                                           max_retries=args.compile_retries)
+        if not compiler_service.available:
+            compiler_service.close()
+            compiler_service = None
+    
+    # Size the compile and simulate concurrency limits to the pipeline stages
+    if args.compile_stage_workers:
+        set_max_concurrent_compiles(args.compile_stage_workers)
+    if args.sim_stage_workers:
+        set_max_concurrent_runs(args.sim_stage_workers)
+    
     # Step 4: Optimize layers in parallel
-    logger.info(f"Step 4: Optimizing {len(layers_info)} layers in parallel with {args.max_workers or 'auto'} workers")
-    optimization_results = optimize_layers_parallel(
-        model_path=args.model_path,
-        layers_info=layers_info,
-        output_dir=args.output_dir,
-        sim_path=args.sim_path,
-        metric=args.metric,
-        max_configs_per_layer=args.max_configs_per_layer,
-        compile_retries=args.compile_retries,
-        sim_retries=args.sim_retries,
-        max_workers=args.max_workers,
-        checkpoint_dir=args.checkpoint_dir,
-        checkpoint_interval=args.checkpoint_interval,
-        enable_caching=args.enable_caching,
-        cache_dir=args.cache_dir,
-        config_path=args.config_path
-    )
+    if args.engine == 'async':
+        logger.info(f"Step 4: Optimizing {len(layers_info)} layers with the asyncio engine")
+        if args.pack_layers or args.single_layer_compile or sim_pool or compiler_service:
+            logger.warning("--pack_layers, --single_layer_compile, --sim_backend pool and --compiler_backend daemon "
+                           "are not used by the asyncio engine")
+        if search_strategy:
+            logger.warning("--search_strategy is not used by the asyncio engine, evaluating a fixed sample")
+        optimization_results = optimize_layers_async(
+            model_path=args.model_path,
+            layers_info=layers_info,
+            output_dir=args.output_dir,
+            sim_path=args.sim_path,
+            metric=args.metric,
+            compile_retries=args.compile_retries,
+            sim_retries=args.sim_retries,
+            checkpoint_dir=args.checkpoint_dir,
+            checkpoint_interval=args.checkpoint_interval,
+            enable_caching=args.enable_caching,
+            cache_dir=args.cache_dir,
+            config_path=args.config_path,
+            max_compiles=args.compile_stage_workers or 4,
+            max_sims=args.sim_stage_workers or 4,
+            compile_timeout=args.compile_timeout,
+            sim_timeout=args.sim_timeout,
+            artifact_store=artifact_store,
+            eval_cache=eval_cache,
+            surrogate=surrogate,
+            early_stopping=early_stopping,
+            max_configs_per_layer=args.max_configs_per_layer,
+            cost_model=cost_model,
+            arch_config=arch_config,
+            alignment=args.alignment,
+            task_queue_size=args.task_queue_size,
+            layer_quantum=args.layer_quantum
+        )
+    elif args.pack_layers:
+        logger.info(f"Step 4: Optimizing {len(layers_info)} layers with packed candidates")
+        optimization_results = optimize_layers_packed(
+            model_path=args.model_path,
+            layers_info=layers_info,
+            output_dir=args.output_dir,
+            sim_path=args.sim_path,
+            metric=args.metric,
+            max_configs_per_layer=args.max_configs_per_layer,
+            compile_retries=args.compile_retries,
+            sim_retries=args.sim_retries,
+            max_workers=args.max_workers,
+            checkpoint_dir=args.checkpoint_dir,
+            checkpoint_interval=args.checkpoint_interval,
+            enable_caching=args.enable_caching,
+            cache_dir=args.cache_dir,
+            config_path=args.config_path,
+            sim_pool=sim_pool,
+            compiler_service=compiler_service,
+            artifact_store=artifact_store,
+            eval_cache=eval_cache,
+            cost_model=cost_model,
+            arch_config=arch_config,
+            alignment=args.alignment,
+            surrogate=surrogate,
+            search_strategy=search_strategy,
+            early_stopping=early_stopping,
+            search_options=search_options
+        )
+    else:
+        logger.info(f"Step 4: Optimizing {len(layers_info)} layers in parallel with {args.max_workers or 'auto'} workers")
+        optimization_results = optimize_layers_parallel(
+            model_path=args.model_path,
+            layers_info=layers_info,
+            output_dir=args.output_dir,
+            sim_path=args.sim_path,
+            metric=args.metric,
+            max_configs_per_layer=args.max_configs_per_layer,
+            compile_retries=args.compile_retries,
+            sim_retries=args.sim_retries,
+            max_workers=args.max_workers,
+            checkpoint_dir=args.checkpoint_dir,
+            checkpoint_interval=args.checkpoint_interval,
+            enable_caching=args.enable_caching,
+            cache_dir=args.cache_dir,
+            config_path=args.config_path,
+            single_layer=args.single_layer_compile,
+            sim_pool=sim_pool,
+            compiler_service=compiler_service,
+            artifact_store=artifact_store,
+            eval_cache=eval_cache,
+            compile_workers=args.compile_stage_workers,
+            sim_workers=args.sim_stage_workers,
+            queue_size=args.stage_queue_size,
+            cost_model=cost_model,
+            arch_config=arch_config,
+            alignment=args.alignment,
+            surrogate=surrogate,
+            search_strategy=search_strategy,
+            early_stopping=early_stopping,
+            search_options=search_options,
+            task_queue_size=args.task_queue_size,
+            layer_quantum=args.layer_quantum
+        )
+    
+    if sim_pool is not None:
+        sim_pool.close()
+    if compiler_service is not None:
+        compiler_service.close()
+    if eval_cache is not None:
+        stats = eval_cache.get_stats()
+        logger.info(f"Evaluation cache: {stats['hits']} hits, {stats['misses']} misses, {stats['entries']} entries")
+        eval_cache.close()
     
     # Step 5: Build final tiling configuration
     logger.info("Step 5: Building final tiling configuration")
@@ -198,7 +443,9 @@ def main():
         config_path=args.config_path,
         experiment_name=final_exp_name,  
         tiling_config=final_tiling_config, 
-        max_retries=args.compile_retries
+        max_retries=args.compile_retries,
+        output_dir=args.output_dir,
+        artifact_store=artifact_store
     )
     
     if compile_success:
@@ -207,6 +454,9 @@ def main():
     else:
         logger.error("Failed to compile model with optimized tiling configuration")
     
+    if artifact_store is not None:
+        artifact_store.close()
+    
     # Report total execution time
     execution_time = time.time() - start_time
     logger.info(f"Total optimization time: {execution_time:.2f} seconds")
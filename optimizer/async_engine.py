@@ -0,0 +1,422 @@
+"""
+asyncio engine for evaluating tiling candidates.
+
+Compiler and simulator runs are asyncio subprocesses, so a single thread
+drives any number of in-flight candidates: each candidate is a coroutine that
+waits on a per-stage semaphore, then on its subprocess, without blocking a
+thread or polling.
+"""
+
+import os
+import time
+import shutil
+import asyncio
+import tempfile
+from utils.logging_utils import setup_logging
+from compiler.model_compiler import (
+    write_tiling_config,
+    build_compile_args,
+    clear_output_manifest,
+    finalize_compile_output,
+    get_output_dir_path
+)
+from simulator.simulator import (
+    SIMULATOR_MODULE,
+    parse_run_output,
+    lookup_cached_metrics,
+    store_cached_metrics
+)
+from optimizer.checkpoint import CheckpointManager
+from optimizer.cache import OptimizationCache
+from optimizer.task_producer import TaskProducer
+
+logger = setup_logging("genesys_optimizer.async_engine")
+
+async def run_process(cmd, timeout, cwd=None):
+    """
+    Run a subprocess, killing it on timeout or cancellation.
+
+    Returns:
+        Tuple of (return code, stdout, stderr)
+
+    Raises:
+        asyncio.TimeoutError: If the process didn't finish in time
+    """
+    process = await asyncio.create_subprocess_exec(
+        *cmd, cwd=cwd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+    except (asyncio.TimeoutError, asyncio.CancelledError):
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+        raise
+    return process.returncode, stdout, stderr
+
+class AsyncEvaluationEngine:
+    """Compiles and simulates candidates as asyncio subprocesses with per-stage concurrency limits."""
+
+    def __init__(self, model_path, config_path, output_dir, sim_path, metric="totCycles",
+                 max_compiles=4, max_sims=4, compile_timeout=600, sim_timeout=90,
+                 compile_retries=1, sim_retries=2, artifact_store=None, eval_cache=None,
+                 compile_command=None, sim_command=None):
+        """
+        Initialize the engine.
+
+        Args:
+            model_path: Path to the model file
+            config_path: Path to the hardware configuration file
+            output_dir: Base output directory
+            sim_path: Path to the simulator
+            metric: Performance metric to extract
+            max_compiles: Maximum number of concurrent compiler processes
+            max_sims: Maximum number of concurrent simulator processes
+            compile_timeout: Seconds before a compiler process is killed
+            sim_timeout: Seconds before a simulator process is killed
+            compile_retries: Maximum number of compilation attempts
+            sim_retries: Maximum number of simulator attempts
+            artifact_store: Optional ArtifactStore to reuse finished compiles from
+            eval_cache: Optional EvaluationCache to reuse metrics of identical instruction streams
+            compile_command: Compiler command prefix (default: compile-genesys)
+            sim_command: Simulator command prefix (default: python3 -m genesys_sim.genesys)
+        """
+        self.model_path = os.path.abspath(model_path)
+        self.config_path = os.path.abspath(config_path) if config_path else None
+        self.output_dir = output_dir
+        self.sim_path = os.path.abspath(sim_path)
+        self.metric = metric
+        self.max_compiles = max_compiles
+        self.max_sims = max_sims
+        self.compile_timeout = compile_timeout
+        self.sim_timeout = sim_timeout
+        self.compile_retries = compile_retries
+        self.sim_retries = sim_retries
+        self.artifact_store = artifact_store
+        self.eval_cache = eval_cache
+        self.compile_command = compile_command or ["compile-genesys"]
+        self.sim_command = sim_command or ["python3", "-m", SIMULATOR_MODULE]
+        self.compile_semaphore = None
+        self.sim_semaphore = None
+
+    async def compile(self, experiment_name, tiling_config=None):
+        """
+        Compile a candidate.
+
+        Returns:
+            Absolute path to the output directory, or None if compilation failed
+        """
+        artifact_key = None
+        if self.artifact_store is not None:
+            artifact_key = self.artifact_store.compute_key(self.model_path, self.config_path, tiling_config)
+            target_dir = get_output_dir_path(self.model_path, self.config_path, experiment_name, self.output_dir)
+            if await asyncio.to_thread(self.artifact_store.fetch, artifact_key, target_dir, experiment_name):
+                return target_dir
+
+        async with self.compile_semaphore:
+            tiling_file_path = write_tiling_config(experiment_name, tiling_config) if tiling_config else None
+            cmd = self.compile_command + build_compile_args(self.model_path, self.config_path, experiment_name,
+                                                            tiling_file_path)
+            clear_output_manifest(self.model_path, self.config_path, experiment_name, self.output_dir)
+
+            for i in range(self.compile_retries):
+                try:
+                    returncode, _, stderr = await run_process(cmd, self.compile_timeout)
+                    if returncode == 0:
+                        break
+                    logger.error(f"Error while compiling {experiment_name}: {stderr.decode(errors='replace')}")
+                except asyncio.TimeoutError:
+                    logger.error(f"Compiling {experiment_name} timed out after {self.compile_timeout}s")
+                if i < self.compile_retries - 1:
+                    await asyncio.sleep(2 ** i)
+            else:
+                return None
+
+        full_output_dir = finalize_compile_output(self.model_path, self.config_path, experiment_name,
+                                                  self.output_dir)
+        if artifact_key is not None and full_output_dir:
+            await asyncio.to_thread(self.artifact_store.put, artifact_key, full_output_dir)
+        return full_output_dir
+
+    async def simulate(self, full_output_dir, layer_names):
+        """
+        Simulate a compiled output.
+
+        Returns:
+            Dictionary mapping each layer name to its metrics, or None if the simulator failed
+        """
+        cached_metrics = {}
+        if self.eval_cache is not None:
+            layer_keys, cached_metrics = lookup_cached_metrics(self.eval_cache, full_output_dir, layer_names)
+            layer_names = [layer_name for layer_name in layer_names if layer_name not in cached_metrics]
+            if not layer_names:
+                return cached_metrics
+
+        async with self.sim_semaphore:
+            model_name = os.path.basename(full_output_dir)
+            run_dir = tempfile.mkdtemp(prefix=f"{model_name}_sim_")
+            output_csv = os.path.join(run_dir, f"{model_name}_simulation_results.csv")
+            cmd = self.sim_command + ["configs/", full_output_dir, "--mode", "perf", "--log_path", output_csv]
+            try:
+                for attempt in range(self.sim_retries):
+                    try:
+                        returncode, _, stderr = await run_process(cmd, self.sim_timeout, cwd=self.sim_path)
+                        if returncode == 0 and os.path.exists(output_csv):
+                            layer_metrics = parse_run_output(output_csv, run_dir, full_output_dir, layer_names)
+                            break
+                        logger.warning(f"Simulator attempt {attempt+1} failed: {stderr.decode(errors='replace')}")
+                    except asyncio.TimeoutError:
+                        logger.warning(f"Simulator attempt {attempt+1} timed out after {self.sim_timeout}s")
+                    if attempt < self.sim_retries - 1:
+                        await asyncio.sleep(2 ** attempt)
+                else:
+                    return None
+            finally:
+                shutil.rmtree(run_dir, ignore_errors=True)
+
+        if self.eval_cache is not None:
+            store_cached_metrics(self.eval_cache, layer_keys, layer_metrics)
+            layer_metrics.update(cached_metrics)
+        return layer_metrics
+
+    async def evaluate(self, task):
+        """
+        Compile and simulate one candidate task.
+
+        Returns:
+            Result dictionary with layer_name, tiling_key, tile_splits and metric_value, or None
+        """
+        layer_name = task['layer_name']
+        tiling_key = task['layer_info']["tiling_key"]
+        # The dict form is only needed from here on, for the tiling JSON and the results
+        tile_splits = task['tile_splits'] = dict(task['tile_splits'])
+        config_idx = task['config_idx']
+        test_exp_name = f"{layer_name}_test_{config_idx}"
+
+        try:
+            test_output_dir = await self.compile(test_exp_name, {tiling_key: {"1": tile_splits}})
+            if test_output_dir is None:
+                logger.warning(f"Compilation failed for {layer_name} configuration {config_idx+1}")
+                return None
+
+            layer_metrics = await self.simulate(test_output_dir, [layer_name])
+            metrics = layer_metrics.get(layer_name) if layer_metrics else None
+            if metrics is None:
+                logger.warning(f"Failed to get metrics for {layer_name} configuration {config_idx+1}")
+                return None
+        except Exception as e:
+            logger.error(f"Error testing {layer_name} configuration {config_idx+1}: {str(e)}")
+            return None
+
+        metric_value = metrics.get(self.metric)
+        if metric_value is None:
+            logger.error(f"Requested metric {self.metric} not found for {layer_name}")
+            return None
+
+        return {
+            'layer_name': layer_name,
+            'tiling_key': tiling_key,
+            'tile_splits': tile_splits,
+            'metric_value': metric_value
+        }
+
+    async def run(self, tasks, on_result=None, skip=None, max_in_flight=None):
+        """
+        Evaluate all tasks concurrently.
+
+        Tasks are pulled from the iterable as earlier ones finish, off the event
+        loop, so a lazily generated search space is never held in memory.
+
+        Args:
+            tasks: Iterable of candidate tasks
+            on_result: Function(task, result) called on the event loop for every result
+            skip: Optional function(task) -> True to drop a task that hasn't started compiling yet
+            max_in_flight: Maximum number of candidates started at once
+                (default: twice the compile and simulate limits)
+
+        Returns:
+            Number of candidates that produced a result
+        """
+        self.compile_semaphore = asyncio.Semaphore(self.max_compiles)
+        self.sim_semaphore = asyncio.Semaphore(self.max_sims)
+        max_in_flight = max_in_flight or 2 * (self.max_compiles + self.max_sims)
+        completed = 0
+
+        async def evaluate_and_report(task):
+            nonlocal completed
+            if skip is not None:
+                # Wait for a compile slot first so the check sees the results of the candidates before it
+                async with self.compile_semaphore:
+                    pass
+                if skip(task):
+                    return
+            result = await self.evaluate(task)
+            if result is not None:
+                completed += 1
+                if on_result is not None:
+                    on_result(task, result)
+
+        tasks = iter(tasks)
+        in_flight = set()
+        try:
+            while True:
+                if len(in_flight) >= max_in_flight:
+                    done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                    for future in done:
+                        future.result()
+                # The iterable may block, e.g. on a producer queue
+                task = await asyncio.to_thread(next, tasks, None)
+                if task is None:
+                    break
+                in_flight.add(asyncio.ensure_future(evaluate_and_report(task)))
+            if in_flight:
+                await asyncio.gather(*in_flight)
+        finally:
+            # Cancelling run() cancels every candidate, which kills their subprocesses
+            pending = [future for future in in_flight if not future.done()]
+            for future in pending:
+                future.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        return completed
+
+def optimize_layers_async(model_path, layers_info, output_dir, sim_path, tasks=None,
+                          metric="totCycles", compile_retries=3, sim_retries=2,
+                          checkpoint_dir="checkpoints", checkpoint_interval=60,
+                          enable_caching=True, cache_dir="layer_cache", config_path=None,
+                          max_compiles=4, max_sims=4, compile_timeout=600, sim_timeout=90,
+                          artifact_store=None, eval_cache=None, engine=None, surrogate=None,
+                          early_stopping=None, max_configs_per_layer=10, cost_model=None, arch_config=None,
+                          alignment=None, task_queue_size=None, layer_quantum=1):
+    """
+    Optimize multiple layers with the asyncio engine.
+
+    Args:
+        model_path: Path to the model file
+        layers_info: List of (layer_name, layer_info) tuples
+        output_dir: Base output directory
+        sim_path: Path to the simulator
+        tasks: Optional list of candidate tasks of the layers; by default the candidates are
+            streamed from a TaskProducer, a few tasks ahead of the engine
+        metric: Performance metric to optimize
+        compile_retries: Maximum number of compilation retry attempts
+        sim_retries: Maximum number of simulator retry attempts
+        checkpoint_dir: Directory to store checkpoint files
+        checkpoint_interval: Interval in seconds between checkpoint saves
+        enable_caching: Whether to store the results in the layer cache
+        cache_dir: Directory to store layer cache files
+        config_path: Path to the hardware configuration file
+        max_compiles: Maximum number of concurrent compiler processes
+        max_sims: Maximum number of concurrent simulator processes
+        compile_timeout: Seconds before a compiler process is killed
+        sim_timeout: Seconds before a simulator process is killed
+        artifact_store: Optional ArtifactStore to reuse finished compiles from
+        eval_cache: Optional EvaluationCache to reuse metrics of identical instruction streams
+        engine: Optional preconfigured AsyncEvaluationEngine
+        surrogate: Optional SurrogateModel to train on the results
+        early_stopping: Optional EarlyStopping rules; a converged layer's candidates that haven't
+            started are dropped and the reason is recorded as "stop_reason" in its result
+        max_configs_per_layer: Maximum number of configurations per layer (negative = exhaustive)
+        cost_model: Optional CostModel to keep only the best predicted candidates of each layer
+        arch_config: Optional architecture config to prune candidates that exceed the buffers
+        alignment: Optional alignment mode ("restrict" or "reorder") for the split factors
+        task_queue_size: Capacity of the queue candidates are streamed through (default: 4 x max_compiles)
+        layer_quantum: Candidates streamed from a layer before moving to the next one
+            (0 = all of a layer's candidates before the next layer)
+
+    Returns:
+        Dictionary mapping layer names to optimization results
+    """
+    model_name = os.path.basename(model_path).split('.')[0]
+
+    checkpoint_manager = CheckpointManager(model_name, os.path.abspath(checkpoint_dir))
+    checkpoint_manager.set_save_interval(checkpoint_interval)
+    results = checkpoint_manager.load_checkpoint()
+    if results:
+        logger.info(f"Resuming optimization from checkpoint with {len(results)} completed layers")
+        layers_info = [(layer_name, layer_info) for layer_name, layer_info in layers_info
+                       if layer_name not in results]
+        if tasks is not None:
+            tasks = [task for task in tasks if task['layer_name'] not in results]
+
+    if engine is None:
+        engine = AsyncEvaluationEngine(
+            model_path, config_path, output_dir, sim_path, metric=metric,
+            max_compiles=max_compiles, max_sims=max_sims,
+            compile_timeout=compile_timeout, sim_timeout=sim_timeout,
+            compile_retries=compile_retries, sim_retries=sim_retries,
+            artifact_store=artifact_store, eval_cache=eval_cache
+        )
+
+    layer_best_configs = {}
+
+    trackers = {}
+    stop_reasons = {}
+    track_layers = early_stopping is not None and early_stopping.enabled
+
+    def layer_stopped(layer_name):
+        return layer_name in trackers and trackers[layer_name].stopped
+
+    producer = None
+    if tasks is None:
+        # Stream the candidates lazily, so an exhaustive search runs in constant memory
+        def start_tracker(layer_name, layer_info, pool):
+            if track_layers:
+                trackers[layer_name] = early_stopping.create_tracker(layer_name, layer_info, pool)
+
+        producer = TaskProducer(layers_info, max_configs_per_layer, cost_model=cost_model, arch_config=arch_config,
+                                alignment=alignment, surrogate=surrogate,
+                                queue_size=task_queue_size or 4 * engine.max_compiles, layer_quantum=layer_quantum,
+                                skip=layer_stopped, on_layer_start=start_tracker)
+        tasks = producer
+    elif track_layers:
+        for layer_name, layer_info in layers_info:
+            layer_configs = [task['tile_splits'] for task in tasks if task['layer_name'] == layer_name]
+            trackers[layer_name] = early_stopping.create_tracker(layer_name, layer_info, layer_configs)
+
+    # Runs on the event loop thread, so no locking is needed
+    def on_result(task, result):
+        layer_name = result['layer_name']
+        metric_value = result['metric_value']
+        if surrogate is not None:
+            surrogate.add_observation(task['layer_info'], result['tile_splits'], metric_value)
+        if layer_name in trackers:
+            stop_reason = trackers[layer_name].update(metric_value)
+            if stop_reason:
+                stop_reasons[layer_name] = stop_reason
+        if layer_name not in layer_best_configs or metric_value < layer_best_configs[layer_name]['best_metric']:
+            logger.info(f"New best configuration for {layer_name} with {metric} = {metric_value}")
+            layer_best_configs[layer_name] = {
+                'best_config': result['tile_splits'],
+                'best_metric': metric_value,
+                'tiling_key': result['tiling_key']
+            }
+            results[layer_name] = layer_best_configs[layer_name]
+            checkpoint_manager.update_layer_result(layer_name, layer_best_configs[layer_name])
+
+    logger.info(f"Evaluating the candidates of {len(layers_info)} layers with the asyncio engine "
+                f"({engine.max_compiles} compiles, {engine.max_sims} simulations at a time)")
+    start_time = time.time()
+    skip = (lambda task: layer_stopped(task['layer_name'])) if track_layers else None
+    try:
+        completed = asyncio.run(engine.run(tasks, on_result, skip=skip))
+    finally:
+        if producer is not None:
+            producer.close()
+    logger.info(f"asyncio engine finished {completed} candidates in {time.time() - start_time:.1f}s")
+
+    for layer_name, stop_reason in stop_reasons.items():
+        if layer_name in results:
+            results[layer_name]['stop_reason'] = stop_reason
+            checkpoint_manager.update_layer_result(layer_name, results[layer_name])
+
+    if enable_caching:
+        optimization_cache = OptimizationCache(model_name, os.path.abspath(cache_dir))
+        layer_infos = dict(layers_info)
+        for layer_name, best_result in layer_best_configs.items():
+            if layer_name in layer_infos:
+                optimization_cache.add_to_cache(layer_infos[layer_name], best_result)
+
+    checkpoint_manager.save_checkpoint(force=True)
+    logger.info(f"Final checkpoint saved with {len(results)} optimized layers")
+    return results
@@ -6,6 +6,32 @@ from utils.logging_utils import setup_logging
 
 logger = setup_logging("genesys_optimizer.cache")
 
+def layer_fingerprint(layer_info):
+    """
+    Generate a fingerprint shared by layers with the same operation and dimensions.
+    
+    Args:
+        layer_info: Dictionary containing layer information
+        
+    Returns:
+        String fingerprint that uniquely identifies layers with the same structure
+    """
+    # Extract key characteristics that determine layer similarity
+    operation = layer_info.get("operation", "")
+    dimensions = layer_info.get("dimensions", {})
+    
+    # Create a dictionary of the layer's key characteristics
+    # This is what determines if two layers are "similar enough" to share optimizations
+    layer_characteristics = {
+        "operation": operation,
+        "dimensions": dimensions,
+        # Exclude instance_id to match similar layers with different IDs
+    }
+    
+    # Convert to a stable string representation and hash it
+    char_str = json.dumps(layer_characteristics, sort_keys=True)
+    return hashlib.md5(char_str.encode()).hexdigest()
+
 class OptimizationCache:
     """
     Caches optimization results for similar layers to avoid redundant optimization.
@@ -73,23 +99,7 @@ class OptimizationCache:
         Returns:
             String fingerprint that uniquely identifies layers with the same structure
         """
-        # Extract key characteristics that determine layer similarity
-        operation = layer_info.get("operation", "")
-        dimensions = layer_info.get("dimensions", {})
-        
-        # Create a dictionary of the layer's key characteristics
-        # This is what determines if two layers are "similar enough" to share optimizations
-        layer_characteristics = {
-            "operation": operation,
-            "dimensions": dimensions,
-            # Exclude instance_id to match similar layers with different IDs
-        }
-        
-        # Convert to a stable string representation and hash it
-        char_str = json.dumps(layer_characteristics, sort_keys=True)
-        fingerprint = hashlib.md5(char_str.encode()).hexdigest()
-        
-        return fingerprint
+        return layer_fingerprint(layer_info)
     
     def get_cached_result(self, layer_info):
         """
@@ -7,6 +7,7 @@ import os
 import json
 import time
 import threading
+from optimizer.tiling_generator import TilingConfig
 from utils.logging_utils import setup_logging
 
 logger = setup_logging("genesys_optimizer.checkpoint")
@@ -15,28 +16,42 @@ class CheckpointManager:
     """
     Manages saving and loading optimization checkpoints.
     
-    Provides periodic saving of checkpoint files to allow resuming optimization
-    if the process is interrupted.
+    Every layer result update is appended as one JSON record to a log, so the
+    cost of an update is proportional to the update rather than to the whole
+    checkpoint. The log is flushed on every record and fsynced in batches, and
+    a background compaction periodically folds it into the snapshot file, after
+    which the folded logs are deleted. Logs are numbered by generation: the
+    snapshot names the first generation it does not cover, and loading replays
+    every log from that generation on.
     """
     
-    def __init__(self, model_name, checkpoint_dir="checkpoints"):
+    def __init__(self, model_name, checkpoint_dir="checkpoints", sync_interval=5.0):
         """
         Initialize the checkpoint manager.
         
         Args:
             model_name: Name of the model being optimized
             checkpoint_dir: Directory to store checkpoint files
+            sync_interval: Seconds between fsyncs of the record log
         """
         self.model_name = model_name
         self.checkpoint_dir = checkpoint_dir
         self.checkpoint_file = os.path.join(checkpoint_dir, f"{model_name}_checkpoint.json")
         self.layer_results = {}
         self.save_interval = 60  # Default: 1 minute (60 seconds) - more frequent than before
+        self.sync_interval = sync_interval
         self.last_save_time = time.time()
+        self.last_sync_time = time.time()
         self.save_timer = None
-        self.lock = threading.Lock()
+        # Guards the results and the record log; compactions serialize on their own lock
+        self.lock = threading.RLock()
+        self.compact_lock = threading.Lock()
         self.saves_count = 0  # Track how many saves have been performed
         
+        # Generation of the record log that updates are appended to
+        self.generation = 0
+        self.log = None
+        
         # Create checkpoint directory if it doesn't exist
         os.makedirs(checkpoint_dir, exist_ok=True)
         
@@ -48,10 +63,34 @@ class CheckpointManager:
         """Set the interval between automatic checkpoint saves."""
         self.save_interval = interval_seconds
         logger.info(f"Checkpoint save interval set to {interval_seconds} seconds")
+    
+    def _log_file(self, generation):
+        return os.path.join(self.checkpoint_dir, f"{self.model_name}_checkpoint.{generation}.log")
+    
+    def _log_generations(self):
+        """Get the generations of the record logs on disk in ascending order."""
+        prefix = f"{self.model_name}_checkpoint."
+        generations = []
+        for f in os.listdir(self.checkpoint_dir):
+            if f.startswith(prefix) and f.endswith(".log"):
+                generation = f[len(prefix):-len(".log")]
+                if generation.isdigit():
+                    generations.append(int(generation))
+        return sorted(generations)
+    
+    def _close_log(self):
+        if self.log is not None:
+            self.log.flush()
+            os.fsync(self.log.fileno())
+            self.log.close()
+            self.log = None
         
     def update_layer_result(self, layer_name, result):
         """
-        Update the result for a given layer and save immediately.
+        Update the result for a given layer and append it to the record log.
+        
+        Compacts the log into the snapshot in the background once the save
+        interval has passed.
         
         Args:
             layer_name: Name of the layer
@@ -60,11 +99,21 @@ class CheckpointManager:
         with self.lock:
             self.layer_results[layer_name] = result
             
-            # Save on every layer completion for maximum safety
-            self.save_checkpoint()
+            try:
+                if self.log is None:
+                    self.log = open(self._log_file(self.generation), 'a')
+                self.log.write(json.dumps({"layer": layer_name, "result": result}) + "\n")
+                self.log.flush()
+                if time.time() - self.last_sync_time >= self.sync_interval:
+                    os.fsync(self.log.fileno())
+                    self.last_sync_time = time.time()
+            except (IOError, OSError) as e:
+                logger.error(f"Failed to append checkpoint record for {layer_name}: {str(e)}")
+        
+        self.save_checkpoint(background=True)
     
     def _rotate_checkpoints(self):
-        """Rotate checkpoint files to maintain a history."""
+        """Keep the current snapshot as a backup before it is replaced."""
         # Maximum number of backups to keep
         max_backups = 5
         
@@ -73,11 +122,14 @@ class CheckpointManager:
         backup_file = os.path.join(self.backup_dir, f"{self.model_name}_checkpoint_{timestamp}.json")
         
         try:
-            if os.path.exists(self.checkpoint_file):
-                # Copy current checkpoint to backup
-                with open(self.checkpoint_file, 'r') as src:
-                    with open(backup_file, 'w') as dst:
-                        dst.write(src.read())
+            if os.path.exists(self.checkpoint_file) and not os.path.exists(backup_file):
+                # The snapshot is replaced by a new file rather than rewritten, so a
+                # hardlink keeps the old contents without copying them
+                try:
+                    os.link(self.checkpoint_file, backup_file)
+                except OSError:
+                    # No hardlinks on this filesystem, move it aside as the new one is about to take its place
+                    os.replace(self.checkpoint_file, backup_file)
                 
                 # Get list of backup files and keep only the most recent
                 backup_files = sorted([
@@ -92,12 +144,72 @@ class CheckpointManager:
         except Exception as e:
             logger.warning(f"Failed to rotate checkpoint backups: {str(e)}")
     
-    def save_checkpoint(self, force=False):
+    def _compact(self):
+        """Fold the record logs into a new snapshot and delete them."""
+        with self.compact_lock:
+            # Only the copy and the switch to a new log generation block the updates
+            with self.lock:
+                layer_results = {name: dict(result) if isinstance(result, dict) else result
+                                 for name, result in self.layer_results.items()}
+                self._close_log()
+                self.generation += 1
+                generation = self.generation
+                rotate = self.saves_count % 10 == 0
+            
+            current_time = time.time()
+            
+            # Checkpoint data structure
+            checkpoint_data = {
+                "model_name": self.model_name,
+                "timestamp": current_time,
+                "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "completed_layers": len(layer_results),
+                "layer_results": layer_results,
+                # Logs of this generation and later hold the updates made since
+                "log_generation": generation
+            }
+            
+            # Ensure checkpoint directory exists
+            os.makedirs(self.checkpoint_dir, exist_ok=True)
+            
+            # Write to temporary file first to avoid corrupting existing checkpoint, and
+            # make it durable before the logs it replaces are deleted
+            temp_file = f"{self.checkpoint_file}.tmp"
+            with open(temp_file, 'w') as f:
+                json.dump(checkpoint_data, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            
+            # Every 10 saves, keep the previous snapshot as a backup
+            if rotate:
+                self._rotate_checkpoints()
+            
+            # Replace old checkpoint with new one (atomic operation on most filesystems)
+            os.replace(temp_file, self.checkpoint_file)
+            
+            for old_generation in self._log_generations():
+                if old_generation < generation:
+                    os.remove(self._log_file(old_generation))
+            
+            with self.lock:
+                self.saves_count += 1
+            
+            logger.info(f"Progress checkpoint saved with {len(layer_results)} completed layers")
+    
+    def _compact_in_background(self):
+        try:
+            self._compact()
+        except (IOError, OSError) as e:
+            logger.error(f"Failed to save checkpoint: {str(e)}")
+    
+    def save_checkpoint(self, force=False, background=False):
         """
-        Save the current optimization state to a checkpoint file.
+        Compact the record log into the checkpoint snapshot.
         
         Args:
             force: If True, save immediately regardless of interval timer
+            background: If True, compact in a background thread, skipping the save
+                if a compaction is already running
             
         Returns:
             True if save was successful, False otherwise
@@ -111,78 +223,237 @@ class CheckpointManager:
             elapsed = current_time - self.last_save_time
             
             # Check if enough time has passed since last save or force is True
-            if force or elapsed >= self.save_interval:
-                try:
-                    # Every 10 saves, rotate the checkpoint files
-                    if self.saves_count % 10 == 0:
-                        self._rotate_checkpoints()
-                    
-                    # Ensure checkpoint directory exists
-                    os.makedirs(self.checkpoint_dir, exist_ok=True)
-                    
-                    # Checkpoint data structure
-                    checkpoint_data = {
-                        "model_name": self.model_name,
-                        "timestamp": current_time,
-                        "date": time.strftime("%Y-%m-%d %H:%M:%S"),
-                        "completed_layers": len(self.layer_results),
-                        "layer_results": self.layer_results
-                    }
-                    
-                    # Write to temporary file first to avoid corrupting existing checkpoint
-                    temp_file = f"{self.checkpoint_file}.tmp"
-                    with open(temp_file, 'w') as f:
-                        json.dump(checkpoint_data, f, indent=2)
-                    
-                    # Replace old checkpoint with new one (atomic operation on most filesystems)
-                    os.replace(temp_file, self.checkpoint_file)
-                    
-                    self.last_save_time = current_time
-                    self.saves_count += 1
-                    
-                    logger.info(f"Progress checkpoint saved with {len(self.layer_results)} completed layers")
+            if not force and elapsed < self.save_interval:
+                return True
+            
+            if background:
+                if self.compact_lock.locked():
                     return True
-                except (IOError, OSError) as e:
-                    logger.error(f"Failed to save checkpoint: {str(e)}")
-                    return False
+                self.last_save_time = current_time
+                threading.Thread(target=self._compact_in_background, name="checkpoint-compaction",
+                                 daemon=True).start()
+                return True
             
+            self.last_save_time = current_time
+        
+        try:
+            self._compact()
             return True
+        except (IOError, OSError) as e:
+            logger.error(f"Failed to save checkpoint: {str(e)}")
+            return False
     
     def load_checkpoint(self):
         """
-        Load the latest checkpoint if available.
+        Load the latest checkpoint if available, replaying the record logs after the snapshot.
         
         Returns:
             Dictionary of layer results from checkpoint, or empty dict if no checkpoint
         """
-        if not os.path.exists(self.checkpoint_file):
+        generations = self._log_generations()
+        if not os.path.exists(self.checkpoint_file) and not generations:
             logger.info("No checkpoint file found. Starting fresh optimization.")
             return {}
-            
-        try:
-            with open(self.checkpoint_file, 'r') as f:
-                checkpoint_data = json.load(f)
-                
-            self.layer_results = checkpoint_data.get("layer_results", {})
-            logger.info(f"Loaded checkpoint with {len(self.layer_results)} completed layers from {checkpoint_data.get('date', 'unknown date')}")
-            return self.layer_results
-        except (json.JSONDecodeError, IOError) as e:
-            logger.warning(f"Failed to load checkpoint file: {str(e)}")
-            return {}
+        
+        layer_results = {}
+        snapshot_generation = 0
+        date = "unknown date"
+        if os.path.exists(self.checkpoint_file):
+            try:
+                with open(self.checkpoint_file, 'r') as f:
+                    checkpoint_data = json.load(f)
+                layer_results = checkpoint_data.get("layer_results", {})
+                snapshot_generation = checkpoint_data.get("log_generation", 0)
+                date = checkpoint_data.get("date", date)
+            except (json.JSONDecodeError, IOError) as e:
+                logger.warning(f"Failed to load checkpoint file: {str(e)}")
+        
+        replayed = 0
+        for generation in generations:
+            if generation < snapshot_generation:
+                continue
+            try:
+                with open(self._log_file(generation), 'r') as f:
+                    for line in f:
+                        try:
+                            record = json.loads(line)
+                        except json.JSONDecodeError:
+                            # A record torn by an interrupted write
+                            continue
+                        layer_results[record["layer"]] = record["result"]
+                        replayed += 1
+            except IOError as e:
+                logger.warning(f"Failed to load checkpoint log: {str(e)}")
+        
+        with self.lock:
+            self.layer_results = layer_results
+            # Append to a fresh log rather than after a possibly torn record
+            if generations:
+                self._close_log()
+                self.generation = max(self.generation, generations[-1] + 1)
+        
+        logger.info(f"Loaded checkpoint with {len(self.layer_results)} completed layers from {date} "
+                    f"({replayed} logged updates)")
+        return self.layer_results
         
     def clear_checkpoint(self):
         """
-        Clear the checkpoint file.
+        Clear the checkpoint file and its record logs.
         
         Returns:
             True if successful, False otherwise
         """
-        if os.path.exists(self.checkpoint_file):
+        with self.lock:
+            self._close_log()
             try:
-                os.remove(self.checkpoint_file)
-                logger.info("Checkpoint file cleared")
+                for generation in self._log_generations():
+                    os.remove(self._log_file(generation))
+                if os.path.exists(self.checkpoint_file):
+                    os.remove(self.checkpoint_file)
+                    logger.info("Checkpoint file cleared")
                 return True
             except OSError as e:
                 logger.error(f"Failed to delete checkpoint file: {str(e)}")
                 return False
-        return True
\ No newline at end of file
+
+class CandidateJournal:
+    """
+    Append-only journal of every evaluated candidate.
+    
+    Each line is one JSON record: an evaluated candidate with its layer, tiling
+    configuration, metric and status ("ok" or "failed"), or a "complete" marker
+    once a layer's whole search has finished. Records are flushed as they are
+    written and fsynced at most every `sync_interval` seconds, and a torn last
+    line from an interrupted write is ignored on load, so a resumed run skips
+    exactly the candidates that were evaluated before.
+    """
+    
+    def __init__(self, model_name, checkpoint_dir="checkpoints", sync_interval=5.0):
+        """
+        Initialize the journal.
+        
+        Args:
+            model_name: Name of the model being optimized
+            checkpoint_dir: Directory to store the journal in, next to the checkpoint
+            sync_interval: Seconds between fsyncs of the journal file
+        """
+        self.model_name = model_name
+        self.journal_file = os.path.join(checkpoint_dir, f"{model_name}_journal.jsonl")
+        self.sync_interval = sync_interval
+        # Layer name -> {TilingConfig: metric or None}
+        self.records = {}
+        self.completed = set()
+        self.file = None
+        self.last_sync = time.time()
+        self.lock = threading.Lock()
+        
+        os.makedirs(checkpoint_dir, exist_ok=True)
+    
+    def load(self):
+        """
+        Load the records of earlier runs.
+        
+        Returns:
+            Dictionary mapping layer names to {TilingConfig: metric or None}
+        """
+        self.records = {}
+        self.completed = set()
+        if not os.path.exists(self.journal_file):
+            return self.records
+        
+        skipped = 0
+        with open(self.journal_file, 'r') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    skipped += 1
+                    continue
+                layer_name = record.get("layer")
+                if record.get("status") == "complete":
+                    self.completed.add(layer_name)
+                elif "config" in record:
+                    config = TilingConfig.from_dict(record["config"])
+                    self.records.setdefault(layer_name, {})[config] = record.get("metric")
+        if skipped:
+            logger.warning(f"Ignored {skipped} unreadable journal records in {self.journal_file}")
+        
+        evaluated = sum(len(layer_records) for layer_records in self.records.values())
+        logger.info(f"Loaded journal with {evaluated} evaluated candidates of {len(self.records)} layers "
+                    f"({len(self.completed)} complete)")
+        return self.records
+    
+    def _append(self, record):
+        with self.lock:
+            if self.file is None:
+                self.file = open(self.journal_file, 'a')
+                # Start on a fresh line after a record torn by an interrupted write
+                if self.file.tell() > 0:
+                    with open(self.journal_file, 'rb') as f:
+                        f.seek(-1, os.SEEK_END)
+                        if f.read(1) != b"\n":
+                            self.file.write("\n")
+            self.file.write(json.dumps(record) + "\n")
+            self.file.flush()
+            if time.time() - self.last_sync >= self.sync_interval:
+                os.fsync(self.file.fileno())
+                self.last_sync = time.time()
+    
+    def record(self, layer_name, tile_splits, metric_value, wait_time=None):
+        """
+        Append an evaluated candidate.
+        
+        Args:
+            layer_name: Name of the layer
+            tile_splits: Tiling configuration of the candidate
+            metric_value: Measured metric, or None if the candidate failed
+            wait_time: Optional seconds the candidate's simulation waited for its compiled output
+        """
+        config = TilingConfig.from_dict(tile_splits)
+        with self.lock:
+            self.records.setdefault(layer_name, {})[config] = metric_value
+        record = {
+            "layer": layer_name,
+            "config": config.to_dict(),
+            "metric": metric_value,
+            "status": "ok" if metric_value is not None else "failed"
+        }
+        if wait_time is not None:
+            record["wait_time"] = wait_time
+        self._append(record)
+    
+    def mark_complete(self, layer_name):
+        """Record that a layer's search has finished."""
+        with self.lock:
+            self.completed.add(layer_name)
+        self._append({"layer": layer_name, "status": "complete"})
+    
+    def is_complete(self, layer_name):
+        with self.lock:
+            return layer_name in self.completed
+    
+    def evaluated(self, layer_name):
+        """Get the {TilingConfig: metric or None} records of a layer."""
+        return self.records.get(layer_name, {})
+    
+    def best(self, layer_name):
+        """
+        Get a layer's best journaled candidate.
+        
+        Returns:
+            (config, metric) tuple, or (None, None) if no candidate succeeded
+        """
+        succeeded = [(metric, config) for config, metric in self.evaluated(layer_name).items() if metric is not None]
+        if not succeeded:
+            return None, None
+        metric, config = min(succeeded, key=lambda item: item[0])
+        return config.to_dict(), metric
+    
+    def close(self):
+        """Flush, fsync and close the journal file."""
+        with self.lock:
+            if self.file is not None:
+                self.file.flush()
+                os.fsync(self.file.fileno())
+                self.file.close()
+                self.file = None
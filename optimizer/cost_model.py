@@ -0,0 +1,180 @@
+"""Analytical cost model to pre-rank tiling candidates before compiling them."""
+
+import math
+from compiler.layer_extractor import load_arch_config
+from optimizer.tiling_generator import COMPUTE_LEVELS
+from utils.logging_utils import setup_logging
+
+logger = setup_logging("genesys_optimizer.cost_model")
+
+# The simulator reports totTime(us) = totCycles / 1000
+CLOCK_MHZ = 1000
+
+# Fixed cost of every tile: loop setup, buffer config and DMA latency
+TILE_OVERHEAD_CYCLES = 64
+
+# Arch config key holding the channel bandwidth (bits/cycle) of each on-chip buffer
+BUFFER_CHANNEL_BW = {
+    "IBUF": "IBUF_CHANNEL_BW",
+    "WBUF": "PARAM_BUF_CHANNEL_BW",
+    "BBUF": "PARAM_BUF_CHANNEL_BW",
+    "OBUF": "OBUF_CHANNEL_BW",
+    "VMEM1": "SIMD_CHANNEL_BW",
+    "VMEM2": "SIMD_CHANNEL_BW"
+}
+
+class CostModel:
+    """
+    First-order roofline estimate of a layer's runtime for a tile_splits candidate.
+
+    Each tile of a candidate moves its operands between DRAM and their on-chip
+    buffer over that buffer's channel and is then computed on the systolic array
+    or SIMD unit. Compute is counted in array passes (so tiles smaller than the
+    array are padded), memory in channel cycles (operands re-fetched for every
+    outer split they don't depend on), and the layer takes the larger of the two
+    plus a fixed overhead per tile.
+    """
+
+    def __init__(self, arch_config, clock_mhz=CLOCK_MHZ, tile_overhead=TILE_OVERHEAD_CYCLES):
+        """
+        Initialize the cost model.
+
+        Args:
+            arch_config: Architecture parameters from *_arch_cfg.json
+            clock_mhz: Clock frequency used to convert cycles to microseconds
+            tile_overhead: Fixed cycles charged for every tile
+        """
+        self.arch_config = arch_config
+        self.clock_mhz = clock_mhz
+        self.tile_overhead = tile_overhead
+
+    @classmethod
+    def from_output_dir(cls, output_dir, **kwargs):
+        """
+        Build a cost model from the architecture config in a compiler output directory.
+
+        Args:
+            output_dir: Compiler output directory containing *_arch_cfg.json
+            **kwargs: Passed on to the constructor
+
+        Returns:
+            CostModel, or None if the directory has no readable architecture config
+        """
+        arch_config = load_arch_config(output_dir)
+        if arch_config is None:
+            return None
+        return cls(arch_config, **kwargs)
+
+    def _channel_bw(self, buffer):
+        """Bits per cycle of the channel feeding an on-chip buffer."""
+        key = BUFFER_CHANNEL_BW.get(buffer, "SIMD_CHANNEL_BW")
+        return max(1, self.arch_config.get(key, 512))
+
+    def predict_cycles(self, layer_info, tile_splits):
+        """
+        Predict the cycles a layer takes with the given tile splits.
+
+        Args:
+            layer_info: Layer information including "dimensions" and "operands"
+            tile_splits: Dictionary mapping dimensions to split factors
+
+        Returns:
+            Predicted cycles, or None if the layer has no operand information
+        """
+        operands = layer_info.get("operands")
+        if not operands:
+            return None
+
+        dimensions = layer_info["dimensions"]
+        splits = {dim: max(1, tile_splits.get(dim, 1)) for dim in dimensions}
+        num_tiles = math.prod(splits.values())
+
+        # Tile size of every dimension and the unit extent the compute unit processes per pass
+        tile_dims = {dim: math.ceil(size / splits[dim]) for dim, size in dimensions.items()}
+        unit_dims = {}
+        compute_passes = 1
+        for operand in operands:
+            path = operand["data_path"]
+            for level in COMPUTE_LEVELS:
+                if level in path:
+                    compute_passes = max(compute_passes, path.count(level))
+                    for dim, extent in operand["tiling"].get(level, {}).items():
+                        unit_dims[dim] = max(unit_dims.get(dim, 1), extent)
+
+        tile_compute = math.prod(
+            math.ceil(tile_dims[dim] / unit_dims.get(dim, 1)) for dim in dimensions
+        )
+        compute_cycles = num_tiles * tile_compute * compute_passes
+
+        # DRAM <-> buffer traffic, accumulated per buffer channel
+        channel_bits = {}
+        for operand in operands:
+            path = operand["data_path"]
+            if "DRAM" not in path:
+                continue
+            buffers = [level for level in path if level not in COMPUTE_LEVELS and level != "DRAM"]
+            if not buffers:
+                continue
+
+            shape = operand["shape_symbols"]
+            full_bits = math.prod(shape.values()) * operand["bits"]
+            own_splits = math.prod(splits.get(dim, 1) for dim in shape)
+            other_splits = num_tiles // own_splits
+
+            if own_splits == 1:
+                # The whole operand fits in one tile and stays resident
+                transfers = 1
+            elif operand["kind"] == "output":
+                # Partial results are written back and re-read for every split of a reduced dimension
+                transfers = 2 * other_splits - 1
+            else:
+                transfers = other_splits
+
+            bw_key = buffers[0]
+            channel_bits[bw_key] = channel_bits.get(bw_key, 0) + full_bits * transfers
+
+        memory_cycles = max(
+            (bits / self._channel_bw(buffer) for buffer, bits in channel_bits.items()),
+            default=0
+        )
+
+        return max(compute_cycles, memory_cycles) + num_tiles * self.tile_overhead
+
+    def predict_time_us(self, layer_info, tile_splits):
+        """
+        Predict the runtime of a layer in microseconds.
+
+        Args:
+            layer_info: Layer information including "dimensions" and "operands"
+            tile_splits: Dictionary mapping dimensions to split factors
+
+        Returns:
+            Predicted time in microseconds, or None if it can't be estimated
+        """
+        cycles = self.predict_cycles(layer_info, tile_splits)
+        if cycles is None:
+            return None
+        return cycles / self.clock_mhz
+
+    def rank_configs(self, layer_info, configs, top_k=None):
+        """
+        Order tiling candidates by predicted runtime, fastest first.
+
+        Args:
+            layer_info: Layer information including "dimensions" and "operands"
+            configs: List of tiling configurations
+            top_k: Number of candidates to keep (None = all)
+
+        Returns:
+            List of the top_k predicted configurations; the input order is kept
+            if the layer has no operand information
+        """
+        if not layer_info.get("operands"):
+            logger.warning(f"No operand information for {layer_info.get('tiling_key')}, cannot rank candidates")
+            return configs[:top_k] if top_k is not None else configs
+
+        scored = sorted(configs, key=lambda config: self.predict_cycles(layer_info, config))
+        if top_k is not None:
+            scored = scored[:top_k]
+        logger.info(f"Ranked {len(configs)} candidates with the cost model, keeping {len(scored)}")
+        return scored
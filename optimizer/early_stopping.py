@@ -0,0 +1,181 @@
+"""Per-layer early stopping once a layer's search has converged."""
+
+import random
+import threading
+from utils.logging_utils import setup_logging
+from optimizer.tiling_generator import TilingSpace
+
+logger = setup_logging("genesys_optimizer.early_stopping")
+
+# Metrics the cost model can predict a lower bound for, mapped to the CostModel method
+BOUNDED_METRICS = {
+    "totCycles": "predict_cycles",
+    "totTime(us)": "predict_time_us"
+}
+
+# Candidates the lower bound scans in full; larger pools are sampled
+MAX_BOUND_CANDIDATES = 4096
+
+class EarlyStopping:
+    """
+    Early-stopping rules shared by all layers.
+
+    A layer stops when its last `patience` results didn't improve its best by
+    more than `min_delta` (relative), or when its best is within
+    `bound_tolerance` (relative) of the cost model's lowest prediction over its
+    candidates.
+    """
+
+    def __init__(self, patience=None, min_delta=0.0, bound_tolerance=None, cost_model=None, metric="totCycles"):
+        """
+        Initialize the rules.
+
+        Args:
+            patience: Results without improvement before a layer stops (None = off)
+            min_delta: Relative improvement a result needs to reset the patience
+            bound_tolerance: Stop once the best is within this fraction of the lower bound (None = off)
+            cost_model: CostModel that provides the lower bounds
+            metric: Metric being optimized
+        """
+        self.patience = patience if patience and patience > 0 else None
+        self.min_delta = min_delta
+        self.bound_tolerance = bound_tolerance
+        self.cost_model = cost_model
+        self.metric = metric
+
+        if bound_tolerance is not None and (cost_model is None or metric not in BOUNDED_METRICS):
+            logger.warning(f"No cost model lower bound for metric {metric}, only stopping on patience")
+            self.bound_tolerance = None
+
+    @property
+    def enabled(self):
+        return self.patience is not None or self.bound_tolerance is not None
+
+    def lower_bound(self, layer_info, configs):
+        """
+        Lowest predicted metric of a layer's candidates.
+
+        Pools of up to MAX_BOUND_CANDIDATES are scanned in full. Larger pools,
+        e.g. the exhaustive TilingSpace streamed to the workers, are sampled,
+        and in a TilingSpace the best sample is then improved one dimension at
+        a time, so the bound costs the same however large the space is. For
+        those pools it can lie slightly above the exact minimum.
+
+        Args:
+            layer_info: Layer information including "dimensions" and "operands"
+            configs: List or TilingSpace of the tiling configurations the layer is searched over
+
+        Returns:
+            Predicted metric, or None if there is no bound
+        """
+        if self.bound_tolerance is None or configs is None or not len(configs):
+            return None
+        predict = getattr(self.cost_model, BOUNDED_METRICS[self.metric])
+
+        if len(configs) <= MAX_BOUND_CANDIDATES:
+            sample = configs
+        else:
+            ranks = random.Random(0).sample(range(len(configs)), MAX_BOUND_CANDIDATES)
+            sample = (configs[rank] for rank in ranks)
+
+        best, best_config = None, None
+        for config in sample:
+            prediction = predict(layer_info, config)
+            if prediction is not None and (best is None or prediction < best):
+                best, best_config = prediction, config
+
+        if best is not None and isinstance(configs, TilingSpace) and len(configs) > MAX_BOUND_CANDIDATES:
+            best = self._descend(predict, layer_info, configs, dict(best_config), best)
+        return best
+
+    def _descend(self, predict, layer_info, space, config, best):
+        """Lower a prediction by changing one dimension's split at a time until none helps."""
+        improved = True
+        while improved:
+            improved = False
+            for dim, factors in zip(space.dims, space.factors):
+                for factor in factors:
+                    if factor == config[dim]:
+                        continue
+                    candidate = dict(config, **{dim: factor})
+                    prediction = predict(layer_info, candidate)
+                    if prediction is not None and prediction < best:
+                        best, config, improved = prediction, candidate, True
+        return best
+
+    def create_tracker(self, layer_name, layer_info, configs=None):
+        """
+        Create the convergence tracker of one layer.
+
+        Args:
+            layer_name: Name of the layer
+            layer_info: Layer information including "dimensions" and "operands"
+            configs: List or TilingSpace of the configurations the layer is searched over (for the lower bound)
+
+        Returns:
+            ConvergenceTracker
+        """
+        return ConvergenceTracker(layer_name, self.patience, self.min_delta, self.bound_tolerance,
+                                  self.lower_bound(layer_info, configs))
+
+class ConvergenceTracker:
+    """Tracks one layer's results and decides when it has converged."""
+
+    def __init__(self, layer_name, patience=None, min_delta=0.0, bound_tolerance=None, lower_bound=None):
+        """
+        Initialize the tracker.
+
+        Args:
+            layer_name: Name of the layer
+            patience: Results without improvement before the layer stops (None = off)
+            min_delta: Relative improvement a result needs to reset the patience
+            bound_tolerance: Stop once the best is within this fraction of lower_bound (None = off)
+            lower_bound: Lowest metric the layer is expected to reach
+        """
+        self.layer_name = layer_name
+        self.patience = patience
+        self.min_delta = min_delta
+        self.bound_tolerance = bound_tolerance
+        self.lower_bound = lower_bound
+        self.best_metric = None
+        self.num_results = 0
+        self.since_improvement = 0
+        self.stop_reason = None
+        self.lock = threading.Lock()
+
+    @property
+    def stopped(self):
+        return self.stop_reason is not None
+
+    def update(self, metric_value):
+        """
+        Record a result and check the stopping rules.
+
+        Args:
+            metric_value: Measured metric of a candidate
+
+        Returns:
+            Stopping reason if this result stopped the layer, otherwise None
+        """
+        with self.lock:
+            if self.stop_reason is not None:
+                return None
+            self.num_results += 1
+            if self.best_metric is None or metric_value < self.best_metric * (1 - self.min_delta):
+                self.since_improvement = 0
+            else:
+                self.since_improvement += 1
+            if self.best_metric is None or metric_value < self.best_metric:
+                self.best_metric = metric_value
+
+            if (self.bound_tolerance is not None and self.lower_bound is not None
+                    and self.best_metric <= self.lower_bound * (1 + self.bound_tolerance)):
+                self.stop_reason = (f"best {self.best_metric} within {self.bound_tolerance:.0%} of the "
+                                    f"cost model lower bound {self.lower_bound:.0f}")
+            elif self.patience is not None and self.since_improvement >= self.patience:
+                self.stop_reason = f"no improvement in the last {self.since_improvement} results"
+            else:
+                return None
+
+        logger.info(f"Stopping {self.layer_name} after {self.num_results} results: {self.stop_reason}")
+        return self.stop_reason
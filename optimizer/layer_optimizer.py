@@ -5,19 +5,226 @@ import logging
 import concurrent.futures
 import time
 import queue
-from compiler.model_compiler import compile_model
-from simulator.simulator import run_simulator
-from optimizer.tiling_generator import generate_tiling_configs, generate_all_tiling_configs
-from optimizer.checkpoint import CheckpointManager
-from optimizer.cache import OptimizationCache
+import threading
+from compiler.model_compiler import compile_model, compile_layer
+from simulator.simulator import run_simulator, run_simulator_layers
+from optimizer.tiling_generator import (generate_tiling_configs, generate_all_tiling_configs, iter_tiling_configs,
+                                        TilingSpace, TilingConfig)
+from optimizer.task_producer import TaskProducer
+from optimizer.checkpoint import CheckpointManager, CandidateJournal
+from optimizer.cache import OptimizationCache, layer_fingerprint
+from optimizer.pipeline import CompileSimulatePipeline
+from optimizer.search import SEARCH_STRATEGIES, create_search_strategy, search_state_file, search_in_progress
 from utils.logging_utils import setup_logging
 from compiler.layer_extractor import get_hardware_config_from_config_path, find_output_dir
 
 logger = setup_logging("genesys_optimizer.layer_optimizer")
 
+def generate_layer_configs(layer_info, max_configs, cost_model=None, arch_config=None, alignment=None,
+                           surrogate=None):
+    """
+    Generate the candidates of a layer with the enabled pruning and ranking options.
+    
+    Args:
+        layer_info: Dictionary containing layer information
+        max_configs: Maximum number of configurations (negative = exhaustive)
+        cost_model: Optional CostModel to keep only the best predicted candidates
+        arch_config: Optional architecture config to prune candidates that exceed the buffers
+        alignment: Optional alignment mode ("restrict" or "reorder") for the split factors
+        surrogate: Optional SurrogateModel to sample candidates with
+        
+    Returns:
+        List of tiling configurations
+    """
+    if cost_model is None and arch_config is None and not alignment and surrogate is None:
+        if max_configs < 0:
+            return generate_all_tiling_configs(layer_info)
+        return generate_tiling_configs(layer_info, max_configs)
+    return generate_tiling_configs(layer_info, max_configs, cost_model=cost_model, arch_config=arch_config,
+                                   alignment=alignment, surrogate=surrogate)
+
+def cached_layer_result(layer_info, optimization_cache):
+    """
+    Get the cached result of a similar layer if its configuration is valid for this layer.
+    
+    Args:
+        layer_info: Dictionary containing layer information
+        optimization_cache: OptimizationCache to look the layer up in
+        
+    Returns:
+        Cached optimization result, or None
+    """
+    cached_result = optimization_cache.get_cached_result(layer_info)
+    if not cached_result:
+        return None
+    
+    # Verify the cached configuration is valid for this layer
+    cached_config = cached_result.get("best_config")
+    for dim, value in cached_config.items():
+        if dim not in layer_info["dimensions"] or value > layer_info["dimensions"][dim]:
+            logger.info("Cached configuration is not valid for this layer, proceeding with optimization")
+            return None
+    
+    logger.info(f"Cached configuration is valid for this layer: {cached_config}")
+    return cached_result
+
+def group_identical_layers(layers_info):
+    """
+    Group layers with the same fingerprint (operation and dimensions).
+    
+    Args:
+        layers_info: List of (layer_name, layer_info) tuples
+        
+    Returns:
+        Dictionary mapping the first layer of every group to the (layer_name, layer_info)
+        tuples of all its members, in the order of layers_info
+    """
+    groups = {}
+    for layer_name, layer_info in layers_info:
+        groups.setdefault(layer_fingerprint(layer_info), []).append((layer_name, layer_info))
+    return {members[0][0]: members for members in groups.values()}
+
+def create_layer_searches(layers_info, max_configs, search_strategy, cost_model=None, arch_config=None,
+                          alignment=None, optimization_cache=None, search_options=None, state_dir=None):
+    """
+    Create a search strategy over the candidates of every layer.
+    
+    Args:
+        layers_info: List of (layer_name, layer_info) tuples
+        max_configs: Evaluation budget per layer (negative = all candidates)
+        search_strategy: Strategy name, e.g. "bayesian"
+        cost_model: Optional CostModel to restrict the search to the best predicted candidates
+        arch_config: Optional architecture config to prune candidates that exceed the buffers
+        alignment: Optional alignment mode ("restrict" or "reorder") for the split factors
+        optimization_cache: Optional OptimizationCache whose result for a similar layer seeds the search
+        search_options: Optional dictionary of strategy parameters, e.g. {"population_size": 32}
+        state_dir: Optional directory the strategies that support it save their state to and resume from
+        
+    Returns:
+        Dictionary mapping layer names to SearchStrategy objects
+    """
+    searches = {}
+    for layer_name, layer_info in layers_info:
+        # The cost model keeps a few times the budget so the search still has room to explore
+        pool_size = -1 if cost_model is None or max_configs < 0 else 4 * max_configs
+        candidate_pool = generate_layer_configs(layer_info, pool_size, cost_model=cost_model,
+                                                arch_config=arch_config, alignment=alignment)
+        initial_config = None
+        if optimization_cache is not None:
+            cached_result = optimization_cache.get_cached_result(layer_info)
+            if cached_result:
+                initial_config = cached_result.get("best_config")
+        options = dict(search_options or {})
+        if state_dir and SEARCH_STRATEGIES[search_strategy].checkpointed:
+            options["state_file"] = search_state_file(state_dir, layer_name)
+        searches[layer_name] = create_search_strategy(search_strategy, layer_info, candidate_pool, max_configs,
+                                                      initial_config=initial_config, **options)
+    return searches
+
+def resumable_searches(layers_info, search_strategy, state_dir):
+    """
+    Find the layers whose saved search was interrupted.
+    
+    Args:
+        layers_info: List of (layer_name, layer_info) tuples
+        search_strategy: Strategy name, or None
+        state_dir: Directory the search states are saved in
+        
+    Returns:
+        Set of layer names whose search should resume
+    """
+    if not search_strategy or not SEARCH_STRATEGIES[search_strategy].checkpointed:
+        return set()
+    return {layer_name for layer_name, _ in layers_info
+            if search_in_progress(search_state_file(state_dir, layer_name))}
+
+def search_tasks(layers_info, searches, wakeup):
+    """
+    Lazily propose candidate tasks, one layer at a time in round-robin order.
+    
+    A layer's next candidate is only proposed when a worker asks for a task, so
+    it is picked with every result reported up to then. Interleaving the layers
+    leaves time for a layer's earlier candidates to finish before its next one
+    is proposed, and layers whose strategy waits for results are skipped until
+    they have something to propose.
+    
+    Args:
+        layers_info: List of (layer_name, layer_info) tuples
+        searches: Dictionary mapping layer names to SearchStrategy objects
+        wakeup: threading.Event set whenever a result is observed, waited on while every
+            remaining layer waits for results
+        
+    Yields:
+        Task dictionaries with layer_name, layer_info, tile_splits, config_idx,
+        total_configs, priority and search
+    """
+    active = [(layer_idx, layer_name, layer_info) for layer_idx, (layer_name, layer_info) in enumerate(layers_info)
+              if layer_name in searches]
+    proposed = {layer_name: 0 for _, layer_name, _ in active}
+    while active:
+        wakeup.clear()
+        proposed_any = False
+        for entry in list(active):
+            layer_idx, layer_name, layer_info = entry
+            search = searches[layer_name]
+            tile_splits = search.propose(block=False)
+            if tile_splits is None:
+                if search.finished:
+                    active.remove(entry)
+                continue
+            
+            proposed_any = True
+            yield {
+                'layer_name': layer_name,
+                'layer_info': layer_info,
+                'tile_splits': tile_splits,
+                'config_idx': proposed[layer_name],
+                'total_configs': search.budget,
+                'priority': layer_idx,
+                'search': search
+            }
+            proposed[layer_name] += 1
+        
+        if active and not proposed_any:
+            # Every remaining layer waits for results still in the pipeline
+            wakeup.wait()
+
+def unfinished_layers(layers_info, results, resumed_layers, journal):
+    """
+    Leave out the layers an earlier run finished.
+    
+    Args:
+        layers_info: List of (layer_name, layer_info) tuples
+        results: Layer results loaded from the checkpoint
+        resumed_layers: Set of layer names whose saved search resumes
+        journal: Loaded CandidateJournal of the earlier runs
+        
+    Returns:
+        List of (layer_name, layer_info) tuples still to optimize
+    """
+    has_journal = bool(journal.records or journal.completed)
+    
+    def layer_done(layer_name):
+        if layer_name in resumed_layers:
+            return False
+        if has_journal:
+            return journal.is_complete(layer_name)
+        # Checkpoints written without a journal only hold finished layers
+        return layer_name in results
+    
+    if not results and not has_journal:
+        return layers_info
+    logger.info(f"Resuming optimization from checkpoint with {len(results)} layer results")
+    layers_info = [(name, info) for name, info in layers_info if not layer_done(name)]
+    logger.info(f"Remaining layers to optimize: {len(layers_info)}")
+    return layers_info
+
 def optimize_layer(model_path, layer_name, layer_info, output_dir, sim_path, 
                    metric="totCycles", max_configs=10, compile_retries=3, sim_retries=2,
-                   model_name=None, optimization_cache=None, hardware_config=None, config_path=None):
+                   model_name=None, optimization_cache=None, hardware_config=None, config_path=None,
+                   single_layer=False, sim_pool=None, compiler_service=None, artifact_store=None,
+                   eval_cache=None, cost_model=None, arch_config=None, alignment=None, surrogate=None,
+                   search_strategy=None, early_stopping=None, search_options=None, journal=None):
     """
     Optimize tiling configuration for a single layer.
     
@@ -35,6 +242,21 @@ def optimize_layer(model_path, layer_name, layer_info, output_dir, sim_path,
         optimization_cache: Cache for optimization results (optional)
         hardware_config: Hardware configuration string (e.g., "genesys32x32")
         config_path: Path to the hardware configuration file
+        single_layer: Compile only the target layer instead of the whole model
+        sim_pool: Optional SimulatorPool of warm simulator workers
+        compiler_service: Optional CompilerService of warm compiler servers
+        artifact_store: Optional ArtifactStore to reuse finished compiles from
+        eval_cache: Optional EvaluationCache to reuse metrics of identical instruction streams
+        cost_model: Optional CostModel to only evaluate the max_configs best predicted candidates
+        arch_config: Optional architecture config to prune candidates that exceed the buffers
+        alignment: Optional alignment mode ("restrict" or "reorder") for the split factors
+        surrogate: Optional SurrogateModel that picks each next candidate from its latest fit
+        search_strategy: Optional search strategy name (e.g. "bayesian") that picks each next
+            candidate from the results so far, with max_configs as its budget
+        early_stopping: Optional EarlyStopping rules to stop testing once the layer has converged
+        search_options: Optional dictionary of search strategy parameters
+        journal: Optional loaded CandidateJournal every evaluated candidate is appended to; the
+            candidates it already holds for the layer are not evaluated again
         
     Returns:
         Tuple of (layer_name, best_config, best_metric, tiling_key)
@@ -50,77 +272,137 @@ def optimize_layer(model_path, layer_name, layer_info, output_dir, sim_path,
     
     # Check if we have a cached result for a similar layer
     if optimization_cache:
-        cached_result = optimization_cache.get_cached_result(layer_info)
+        cached_result = cached_layer_result(layer_info, optimization_cache)
         if cached_result:
             logger.info(f"Using cached result for layer {layer_name} from a similar layer")
-            cached_config = cached_result.get("best_config")
-            cached_metric = cached_result.get("best_metric")
-            tiling_key = layer_info["tiling_key"]
-            
-            # Verify the cached configuration is valid for this layer
-            can_use_cached = True
-            for dim, value in cached_config.items():
-                if dim not in layer_info["dimensions"]:
-                    can_use_cached = False
-                    break
-                if value > layer_info["dimensions"][dim]:
-                    can_use_cached = False
-                    break
-            
-            if can_use_cached:
-                logger.info(f"Cached configuration is valid for this layer: {cached_config}")
-                return (layer_name, cached_config, cached_metric, tiling_key)
-            else:
-                logger.info("Cached configuration is not valid for this layer, proceeding with optimization")
+            return (layer_name, cached_result.get("best_config"), cached_result.get("best_metric"),
+                    layer_info["tiling_key"])
+    
+    # A layer whose search finished in an earlier run keeps its journaled result
+    evaluated = journal.evaluated(layer_name) if journal is not None else {}
+    if journal is not None and journal.is_complete(layer_name):
+        best_config, best_metric = journal.best(layer_name)
+        logger.info(f"Layer {layer_name} was searched by an earlier run, using its journaled result")
+        return (layer_name, best_config, best_metric, layer_info["tiling_key"])
     
     # Generate tiling configurations - use exhaustive search if max_configs is -1
     if max_configs < 0:
         logger.info(f"Performing exhaustive search for layer {layer_name}")
-        tiling_configs = generate_all_tiling_configs(layer_info)
+    
+    search = None
+    if search_strategy:
+        search = create_layer_searches([(layer_name, layer_info)], max_configs, search_strategy, cost_model=cost_model,
+                                       arch_config=arch_config, alignment=alignment,
+                                       optimization_cache=optimization_cache,
+                                       search_options=search_options)[layer_name]
+        if evaluated:
+            logger.info(f"Replaying {len(evaluated)} evaluated configurations into the search of {layer_name}")
+            search.replay(evaluated)
+        num_configs = search.budget
+        candidate_pool = search.candidates
+        tiling_configs = search.iter_candidates()
+    elif surrogate is not None:
+        # Pick one candidate at a time so every result refines the next pick
+        candidate_pool = generate_layer_configs(layer_info, -1, cost_model=cost_model, arch_config=arch_config,
+                                                alignment=alignment)
+        num_configs = len(candidate_pool) if max_configs < 0 else min(max_configs, len(candidate_pool))
+        tiling_configs = surrogate.iter_candidates(layer_info, candidate_pool, num_configs)
+    elif max_configs < 0 and cost_model is None:
+        # Stream the exhaustive space instead of materializing it; infeasible
+        # candidates are skipped on the fly, so this is an upper bound
+        candidate_pool = TilingSpace(layer_info, arch_config, alignment)
+        num_configs = len(candidate_pool)
+        tiling_configs = iter_tiling_configs(layer_info, arch_config, alignment)
     else:
-        tiling_configs = generate_tiling_configs(layer_info, max_configs)
+        tiling_configs = generate_layer_configs(layer_info, max_configs, cost_model=cost_model,
+                                                arch_config=arch_config, alignment=alignment)
+        num_configs = len(tiling_configs)
+        candidate_pool = tiling_configs
     
-    logger.info(f"Testing {len(tiling_configs)} tiling configurations for {layer_name}")
+    logger.info(f"Testing {num_configs} tiling configurations for {layer_name}")
     
-    # Track best configuration (minimization)
+    tracker = None
+    if early_stopping is not None and early_stopping.enabled:
+        tracker = early_stopping.create_tracker(layer_name, layer_info, candidate_pool)
+        # Replay the results of an interrupted run
+        for metric_value in evaluated.values():
+            if metric_value is not None:
+                tracker.update(metric_value)
+    
+    # Track best configuration (minimization), starting from an interrupted run's best
     best_metric_value = float('inf')
     best_config = None
+    if evaluated:
+        best_config, best_metric = journal.best(layer_name)
+        if best_config is not None:
+            best_metric_value = best_metric
+        logger.info(f"Skipping {len(evaluated)} configurations of {layer_name} evaluated before")
     
     # Test each configuration
     tiling_key = layer_info["tiling_key"]
     
     for i, tile_splits in enumerate(tiling_configs):
-        logger.info(f"Testing configuration {i+1}/{len(tiling_configs)} for {layer_name}: {tile_splits}")
+        if tracker is not None and tracker.stopped:
+            break
+        if search is None and evaluated and TilingConfig.from_dict(tile_splits) in evaluated:
+            continue
+        # The dict form is needed for the tiling JSON and the results
+        tile_splits = dict(tile_splits)
+        logger.info(f"Testing configuration {i+1}/{num_configs} for {layer_name}: {tile_splits}")
         
         # Create tiling config for this layer using its JSON key
         tiling_config = {tiling_key: {"1": tile_splits}}
         
         test_exp_name = f"{layer_name}_test_{i}"
+        metric_value = None
+        interrupted = False
         try:
-            # Fix parameter order - was passing parameters in wrong positions
-            compile_success = compile_model(
-                model_path=model_path,
-                config_path=config_path,  # Add the config path
-                experiment_name=test_exp_name,
-                tiling_config=tiling_config,
-                max_retries=compile_retries
-            )
+            if single_layer:
+                # Only regenerate this layer's codelet into a minimal output directory
+                test_output_dir = compile_layer(
+                    model_path=model_path,
+                    config_path=config_path,
+                    experiment_name=test_exp_name,
+                    layer_name=layer_name,
+                    layer_info=layer_info,
+                    tile_splits=tile_splits,
+                    output_dir=output_dir,
+                    max_retries=compile_retries,
+                    artifact_store=artifact_store
+                )
+                compile_success = test_output_dir is not None
+            elif compiler_service is not None:
+                # A warm compiler server reports where it wrote the output
+                test_output_dir = compiler_service.compile(test_exp_name, tiling_config)
+                compile_success = test_output_dir is not None
+            else:
+                # Fix parameter order - was passing parameters in wrong positions
+                compile_success = compile_model(
+                    model_path=model_path,
+                    config_path=config_path,  # Add the config path
+                    experiment_name=test_exp_name,
+                    tiling_config=tiling_config,
+                    max_retries=compile_retries,
+                    output_dir=output_dir,
+                    artifact_store=artifact_store
+                )
             
             if not compile_success:
                 logger.warning(f"Compilation failed for {layer_name} configuration {i+1} after all retries")
                 continue
             
-            # Create the absolute path to the test output directory - including hardware config
-            if hardware_config:
-                dir_name = f"{model_name}_{hardware_config}_{test_exp_name}"
-            else:
-                dir_name = f"{model_name}_{test_exp_name}"
-            
-            test_output_dir = os.path.join(output_dir, dir_name)
+            if not single_layer and compiler_service is None:
+                # Create the absolute path to the test output directory - including hardware config
+                if hardware_config:
+                    dir_name = f"{model_name}_{hardware_config}_{test_exp_name}"
+                else:
+                    dir_name = f"{model_name}_{test_exp_name}"
+                
+                test_output_dir = os.path.join(output_dir, dir_name)
             
             # Run the simulator with the absolute path
             metrics = run_simulator(test_output_dir, layer_name, sim_path, 
-                                   max_retries=sim_retries)
+                                   max_retries=sim_retries, sim_pool=sim_pool, eval_cache=eval_cache)
             
             if metrics is None:
                 logger.warning(f"Failed to get metrics for {layer_name} configuration {i+1} after all retries")
@@ -133,14 +415,36 @@ def optimize_layer(model_path, layer_name, layer_info, output_dir, sim_path,
                 logger.error(f"Requested metric {metric} not found in returned metrics for {layer_name}")
                 continue
             
+            if surrogate is not None:
+                surrogate.add_observation(layer_info, tile_splits, metric_value)
+            if search is not None:
+                search.observe(tile_splits, metric_value)
+            
             # Check if this configuration is better (lower metric value)
             if metric_value < best_metric_value:
                 best_metric_value = metric_value
                 best_config = tile_splits
                 logger.info(f"New best configuration for {layer_name} with {metric} = {best_metric_value}")
+            
+            if tracker is not None and tracker.update(metric_value):
+                break
         except Exception as e:
             logger.error(f"Error testing configuration {i+1} for {layer_name}: {str(e)}")
             continue
+        except BaseException:
+            # An interrupted candidate is evaluated again when the run resumes
+            interrupted = True
+            raise
+        finally:
+            # Failed candidates are journaled too, so a resumed run doesn't retry them
+            if journal is not None and not interrupted:
+                try:
+                    journal.record(layer_name, tile_splits, metric_value)
+                except OSError as e:
+                    logger.error(f"Failed to journal {layer_name} configuration {i+1}: {str(e)}")
+    
+    if journal is not None:
+        journal.mark_complete(layer_name)
     
     if best_config is not None:
         logger.info(f"Best configuration for {layer_name}: {best_config} with {metric} = {best_metric_value}")
@@ -165,9 +469,13 @@ def optimize_layers_parallel(model_path, layers_info, output_dir, sim_path,
                            compile_retries=3, sim_retries=2, max_workers=None,
                            checkpoint_dir="checkpoints", checkpoint_interval=60,
                            enable_caching=True, cache_dir="layer_cache",
-                           config_path=None):
+                           config_path=None, single_layer=False, sim_pool=None, compiler_service=None,
+                           artifact_store=None, eval_cache=None, compile_workers=None, sim_workers=None,
+                           queue_size=None, cost_model=None, arch_config=None, alignment=None,
+                           surrogate=None, search_strategy=None, early_stopping=None, search_options=None,
+                           task_queue_size=None, layer_quantum=1):
     """
-    Optimize multiple layers in parallel using a thread pool.
+    Optimize multiple layers in parallel with a pipeline of compile and simulate workers.
     
     Args:
         model_path: Path to the model file
@@ -179,11 +487,34 @@ def optimize_layers_parallel(model_path, layers_info, output_dir, sim_path,
         compile_retries: Maximum number of compilation retry attempts
         sim_retries: Maximum number of simulator retry attempts
         max_workers: Maximum number of parallel workers (None = use CPU count)
-        checkpoint_dir: Directory to store checkpoint files
+        checkpoint_dir: Directory to store checkpoint files and the journal of evaluated candidates,
+            from which interrupted layers resume
         checkpoint_interval: Interval in seconds between checkpoint saves
         enable_caching: Whether to use caching for similar layers
         cache_dir: Directory to store layer cache files
         config_path: Path to the hardware configuration file
+        single_layer: Compile only the target layer of each candidate instead of the whole model
+        sim_pool: Optional SimulatorPool of warm simulator workers
+        compiler_service: Optional CompilerService of warm compiler servers
+        artifact_store: Optional ArtifactStore to reuse finished compiles from
+        eval_cache: Optional EvaluationCache to reuse metrics of identical instruction streams
+        compile_workers: Number of compile stage workers (None = derived from max_workers)
+        sim_workers: Number of simulate stage workers (None = derived from max_workers)
+        queue_size: Capacity of the queue between the compile and simulate stages
+        cost_model: Optional CostModel to only evaluate the best predicted candidates of each layer
+        arch_config: Optional architecture config to prune candidates that exceed the buffers
+        alignment: Optional alignment mode ("restrict" or "reorder") for the split factors
+        surrogate: Optional SurrogateModel to sample candidates with and train on the results
+        search_strategy: Optional search strategy name (e.g. "bayesian") that proposes each layer's
+            next candidate when a compile worker is free, with max_configs_per_layer as its budget
+        early_stopping: Optional EarlyStopping rules; a converged layer's remaining candidates are
+            dropped from the queue and the reason is recorded as "stop_reason" in its result
+        search_options: Optional dictionary of search strategy parameters; strategies that support it
+            save their state next to the checkpoint and resume interrupted layers
+        task_queue_size: Capacity of the queue the candidates are streamed through
+            (None = 4 x compile workers)
+        layer_quantum: Candidates streamed from a layer before moving to the next one
+            (0 = one layer at a time)
         
     Returns:
         Dictionary mapping layer names to optimization results
@@ -215,245 +546,664 @@ def optimize_layers_parallel(model_path, layers_info, output_dir, sim_path,
     
     # Initialize results dictionary with any existing checkpoint data
     results = checkpoint_manager.load_checkpoint()
-    has_checkpoint = bool(results)
     
-    if has_checkpoint:
-        logger.info(f"Resuming optimization from checkpoint with {len(results)} completed layers")
-        # Filter out layers that are already optimized
-        layers_info = [(name, info) for name, info in layers_info if name not in results]
-        logger.info(f"Remaining layers to optimize: {len(layers_info)}")
+    # Searches that save their state pick up interrupted layers where they stopped
+    state_dir = os.path.join(checkpoint_dir, f"{model_name}_search")
+    resumed_layers = resumable_searches(layers_info, search_strategy, state_dir)
+    
+    # Every evaluated candidate is journaled, so partially searched layers resume where they stopped
+    journal = CandidateJournal(model_name, checkpoint_dir)
+    journal.load()
+    layers_info = unfinished_layers(layers_info, results, resumed_layers, journal)
+    
+    # Identical layers are evaluated once, through the first layer of their group
+    layer_groups = group_identical_layers(layers_info)
+    
+    def record_group_result(layer_name, best_result):
+        # Every member gets the result under its own tiling key
+        for member_name, member_info in layer_groups[layer_name]:
+            results[member_name] = dict(best_result, tiling_key=member_info["tiling_key"])
+            checkpoint_manager.update_layer_result(member_name, results[member_name])
+    
+    # Groups with a valid cached result are done before anything is queued
+    if optimization_cache:
+        for layer_name, members in list(layer_groups.items()):
+            if layer_name in resumed_layers:
+                continue
+            cached_result = cached_layer_result(members[0][1], optimization_cache)
+            if cached_result:
+                logger.info(f"Using cached result for {len(members)} layer(s) like {layer_name}")
+                record_group_result(layer_name, {'best_config': cached_result.get("best_config"),
+                                                 'best_metric': cached_result.get("best_metric")})
+                for member_name, _ in members:
+                    journal.mark_complete(member_name)
+                del layer_groups[layer_name]
+    
+    unique_layers = [members[0] for members in layer_groups.values()]
+    if len(unique_layers) < len(layers_info):
+        logger.info(f"Evaluating {len(unique_layers)} unique layers for {len(layers_info)} layers")
     
-    # Group layers by operation type for better cache locality
-    grouped_layers = {}
-    for layer_name, layer_info in layers_info:
-        op_type = layer_info.get("operation")
-        if op_type not in grouped_layers:
-            grouped_layers[op_type] = []
-        grouped_layers[op_type].append((layer_name, layer_info))
-    
-    # Sort operations by estimated complexity (number of configs)
-    operation_complexity = []
-    for op_type, op_layers in grouped_layers.items():
-        total_configs = sum(
-            max_configs_per_layer if max_configs_per_layer > 0 else 
-            len(generate_all_tiling_configs(layer_info)) 
-            for _, layer_info in op_layers
-        )
-        operation_complexity.append((op_type, total_configs))
-    
-    # Sort operations by complexity in descending order
-    sorted_operations = sorted(operation_complexity, key=lambda x: x[1], reverse=True)
-    
-    # Create a prioritized list of layers
-    prioritized_layers = []
-    for op_type, _ in sorted_operations:
-        prioritized_layers.extend(grouped_layers[op_type])
-    
-    # Now use a shared queue for all workers for better load balancing
-    task_queue = queue.Queue()
     result_queue = queue.Queue()
     
-    # Add all layer optimization tasks to the queue with improved prioritization
-    total_tasks = 0
+    # Convergence of every layer, checked as its results come in
+    trackers = {}
+    stop_reasons = {}
+    track_layers = early_stopping is not None and early_stopping.enabled
     
-    # Group similar configurations together for better cache utilization
-    # This helps reduce thrashing of the compilation system
-    config_groups = {}
+    def layer_stopped(layer_name):
+        return layer_name in trackers and trackers[layer_name].stopped
     
-    for layer_idx, (layer_name, layer_info) in enumerate(prioritized_layers):
-        # Generate configurations for this layer
-        if max_configs_per_layer < 0:
-            configs = generate_all_tiling_configs(layer_info)
-        else:
-            configs = generate_tiling_configs(layer_info, max_configs_per_layer)
-        
-        # Group configurations by their "size complexity"
-        for i, tile_splits in enumerate(configs):
-            # Create a complexity key based on the configuration
-            complexity = sum(val for val in tile_splits.values())
-            if complexity not in config_groups:
-                config_groups[complexity] = []
-            
-            config_groups[complexity].append({
-                'layer_name': layer_name,
-                'layer_info': layer_info,
-                'tile_splits': tile_splits,
-                'config_idx': i,
-                'total_configs': len(configs),
-                'priority': layer_idx  # Lower is higher priority
-            })
-            total_tasks += 1
+    # Calculate number of workers to use - handle the case when max_workers is None
+    if max_workers is None:
+        # Default is min(32, os.cpu_count() + 4)
+        cpu_count = os.cpu_count() or 4
+        # Use fewer workers to avoid system overload and directory contention
+        # Reduce from 8 to 4 to prevent too many concurrent compilations
+        recommended_workers = min(4, max(1, cpu_count // 4))
+        actual_workers = recommended_workers
+    else:
+        actual_workers = max_workers
+    
+    # Each stage gets its own pool - by default as many threads as the old combined workers
+    worker_count = max(1, actual_workers - 1)
+    compile_workers = compile_workers or worker_count
+    sim_workers = sim_workers or worker_count
+    
+    def start_tracker(layer_name, layer_info, pool):
+        tracker = early_stopping.create_tracker(layer_name, layer_info, pool)
+        # Replay the results of an interrupted run
+        for metric_value in journal.evaluated(layer_name).values():
+            if metric_value is not None and tracker.update(metric_value):
+                stop_reasons[layer_name] = tracker.stop_reason
+        return tracker
     
-    # Now add tasks to queue in order of complexity (simplest first)
-    # This helps ensure we get some results quickly
-    for complexity in sorted(config_groups.keys()):
-        for task in config_groups[complexity]:
-            task_queue.put(task)
+    searches = None
+    producer = None
+    if search_strategy:
+        # Candidates are proposed on demand from the results so far instead of queued up front
+        searches = create_layer_searches(unique_layers, max_configs_per_layer, search_strategy, cost_model=cost_model,
+                                         arch_config=arch_config, alignment=alignment,
+                                         optimization_cache=optimization_cache, search_options=search_options,
+                                         state_dir=state_dir)
+        total_tasks = sum(search.budget for search in searches.values())
+        logger.info(f"Searching up to {total_tasks} configurations with the {search_strategy} strategy")
+        for layer_name, layer_info in unique_layers:
+            # Continue from the candidates an interrupted run evaluated instead of proposing them again
+            evaluated = journal.evaluated(layer_name)
+            if evaluated:
+                logger.info(f"Replaying {len(evaluated)} evaluated configurations into the search of {layer_name}")
+                searches[layer_name].replay(evaluated)
+            if track_layers:
+                trackers[layer_name] = start_tracker(layer_name, layer_info, searches[layer_name].candidates)
+                if trackers[layer_name].stopped:
+                    searches[layer_name].stop()
+    else:
+        # Stream the candidates of all layers lazily, a few tasks ahead of the compile workers
+        def start_layer(layer_name, layer_info, pool):
+            if track_layers:
+                trackers[layer_name] = start_tracker(layer_name, layer_info, pool)
+        
+        producer = TaskProducer(unique_layers, max_configs_per_layer, cost_model=cost_model, arch_config=arch_config,
+                                alignment=alignment, surrogate=surrogate,
+                                queue_size=task_queue_size or 4 * compile_workers, layer_quantum=layer_quantum,
+                                skip=layer_stopped, on_layer_start=start_layer,
+                                evaluated={name: journal.evaluated(name) for name, _ in unique_layers})
+        logger.info(f"Streaming the configurations of {len(unique_layers)} layers")
     
-    logger.info(f"Added {total_tasks} configuration tasks to the queue")
+    # Queued after the last result, once every task has left the pipeline
+    results_done = object()
+    # Set whenever a result comes back, so waiting searches can propose again
+    result_reported = threading.Event()
     
-    # Track the best configuration for each layer
-    layer_best_configs = {}
+    # Track the best configuration for each layer, starting from the checkpoint for resumed searches
+    # and from the journal for partially evaluated layers
+    layer_best_configs = {name: results[name] for name in resumed_layers if name in results}
+    for layer_name, layer_info in unique_layers:
+        best_config, best_metric = journal.best(layer_name)
+        if best_config is None:
+            continue
+        if layer_name not in layer_best_configs or best_metric < layer_best_configs[layer_name]['best_metric']:
+            layer_best_configs[layer_name] = {
+                'best_config': best_config,
+                'best_metric': best_metric,
+                'tiling_key': layer_info["tiling_key"]
+            }
+            record_group_result(layer_name, layer_best_configs[layer_name])
     
-    # Worker function to process tasks from the queue
-    def worker():
-        while True:
-            try:
-                # Get a task from the queue
-                task = task_queue.get(block=False)
-                layer_name = task['layer_name']
-                layer_info = task['layer_info']
-                tile_splits = task['tile_splits']
-                config_idx = task['config_idx']
-                total_configs = task['total_configs']
-                
-                logger.info(f"Testing configuration {config_idx+1}/{total_configs} for {layer_name}: {tile_splits}")
-                
-                # Create tiling config for this layer
-                tiling_key = layer_info["tiling_key"]
-                tiling_config = {tiling_key: {"1": tile_splits}}
-                
-                test_exp_name = f"{layer_name}_test_{config_idx}"
-                
-                try:
-                    # Compile the model with this configuration
-                    compile_success = compile_model(
-                        model_path=model_path,
-                        config_path=config_path,
-                        experiment_name=test_exp_name,
-                        tiling_config=tiling_config,
-                        max_retries=compile_retries
-                    )
-                    
-                    if not compile_success:
-                        logger.warning(f"Compilation failed for {layer_name} configuration {config_idx+1}")
-                        task_queue.task_done()
-                        continue
-                    
-                    # Create the output directory path
-                    if hardware_config:
-                        dir_name = f"{model_name}_{hardware_config}_{test_exp_name}"
-                    else:
-                        dir_name = f"{model_name}_{test_exp_name}"
-                    
-                    test_output_dir = os.path.join(output_dir, dir_name)
-                    
-                    # Run the simulator
-                    metrics = run_simulator(test_output_dir, layer_name, sim_path, max_retries=sim_retries)
-                    
-                    if metrics is None:
-                        logger.warning(f"Failed to get metrics for {layer_name} configuration {config_idx+1}")
-                        task_queue.task_done()
-                        continue
-                    
-                    # Extract the metric value
-                    metric_value = metrics.get(metric) if isinstance(metrics, dict) else metrics
-                    
-                    if metric_value is None:
-                        logger.error(f"Requested metric {metric} not found for {layer_name}")
-                        task_queue.task_done()
-                        continue
-                    
-                    # Add result to result queue
-                    result_queue.put({
-                        'layer_name': layer_name,
-                        'tiling_key': tiling_key,
-                        'tile_splits': tile_splits,
-                        'metric_value': metric_value
-                    })
-                    
-                except Exception as e:
-                    logger.error(f"Error testing {layer_name} configuration {config_idx+1}: {str(e)}")
-                
-                task_queue.task_done()
+    # Compile stage - returns the compiled output directory of a candidate
+    def compile_candidate(task):
+        layer_name = task['layer_name']
+        layer_info = task['layer_info']
+        # The dict form is only needed from here on, for the tiling JSON and the results
+        tile_splits = task['tile_splits'] = dict(task['tile_splits'])
+        config_idx = task['config_idx']
+        total_configs = task['total_configs']
+        
+        logger.info(f"Testing configuration {config_idx+1}/{total_configs} for {layer_name}: {tile_splits}")
+        
+        # Create tiling config for this layer
+        tiling_config = {layer_info["tiling_key"]: {"1": tile_splits}}
+        test_exp_name = f"{layer_name}_test_{config_idx}"
+        
+        if single_layer:
+            # Only regenerate this layer's codelet into a minimal output directory
+            test_output_dir = compile_layer(
+                model_path=model_path,
+                config_path=config_path,
+                experiment_name=test_exp_name,
+                layer_name=layer_name,
+                layer_info=layer_info,
+                tile_splits=tile_splits,
+                output_dir=output_dir,
+                max_retries=compile_retries,
+                artifact_store=artifact_store
+            )
+        elif compiler_service is not None:
+            # A warm compiler server reports where it wrote the output
+            test_output_dir = compiler_service.compile(test_exp_name, tiling_config)
+        else:
+            # Compile the model with this configuration
+            compile_success = compile_model(
+                model_path=model_path,
+                config_path=config_path,
+                experiment_name=test_exp_name,
+                tiling_config=tiling_config,
+                max_retries=compile_retries,
+                output_dir=output_dir,
+                artifact_store=artifact_store
+            )
+            test_output_dir = None
+            if compile_success:
+                # Create the output directory path
+                if hardware_config:
+                    dir_name = f"{model_name}_{hardware_config}_{test_exp_name}"
+                else:
+                    dir_name = f"{model_name}_{test_exp_name}"
                 
-            except queue.Empty:
-                # No more tasks in queue
-                break
+                test_output_dir = os.path.join(output_dir, dir_name)
+        
+        if test_output_dir is None:
+            logger.warning(f"Compilation failed for {layer_name} configuration {config_idx+1}")
+        return test_output_dir
+    
+    # Simulate stage - returns the result of a compiled candidate
+    def simulate_candidate(task, test_output_dir):
+        layer_name = task['layer_name']
+        config_idx = task['config_idx']
+        
+        if layer_stopped(layer_name):
+            logger.info(f"Skipping simulation of {layer_name} configuration {config_idx+1}, the layer has converged")
+            # Not a failure - the candidate is left out of the journal
+            task['skipped'] = True
+            return None
+        
+        # Run the simulator, keeping how long it waited for the compiled output with the candidate
+        timings = {}
+        metrics = run_simulator(test_output_dir, layer_name, sim_path, max_retries=sim_retries,
+                                sim_pool=sim_pool, eval_cache=eval_cache, timings=timings)
+        task['wait_time'] = timings.get("wait_time")
+        
+        if metrics is None:
+            logger.warning(f"Failed to get metrics for {layer_name} configuration {config_idx+1}")
+            return None
+        
+        # Extract the metric value
+        metric_value = metrics.get(metric) if isinstance(metrics, dict) else metrics
+        
+        if metric_value is None:
+            logger.error(f"Requested metric {metric} not found for {layer_name}")
+            return None
+        
+        if surrogate is not None:
+            surrogate.add_observation(task['layer_info'], task['tile_splits'], metric_value)
+        
+        if layer_name in trackers:
+            stop_reason = trackers[layer_name].update(metric_value)
+            if stop_reason:
+                stop_reasons[layer_name] = stop_reason
+                if 'search' in task:
+                    task['search'].stop()
+        
+        return {
+            'layer_name': layer_name,
+            'tiling_key': task['layer_info']["tiling_key"],
+            'tile_splits': task['tile_splits'],
+            'metric_value': metric_value,
+            'wait_time': task['wait_time']
+        }
+    
+    # Report every candidate back to its search, including failed ones
+    def journal_candidate(task, metric_value):
+        # A journal that can't be written costs the resume, not the result
+        try:
+            journal.record(task['layer_name'], task['tile_splits'], metric_value, wait_time=task.get('wait_time'))
+        except OSError as e:
+            logger.error(f"Failed to journal {task['layer_name']} configuration {task['config_idx']+1}: {str(e)}")
+    
+    def observe_candidate(task, metric_value):
+        if 'search' in task:
+            try:
+                task['search'].observe(task['tile_splits'], metric_value)
+            finally:
+                # Wake the search even if observing failed, so it can propose again or finish
+                result_reported.set()
+    
+    def report_result(task, result):
+        journal_candidate(task, result['metric_value'])
+        result_queue.put(result)
+        observe_candidate(task, result['metric_value'])
+    
+    def report_failure(task):
+        if not task.get('skipped'):
+            journal_candidate(task, None)
+        observe_candidate(task, None)
     
     # Process result queue and update best configurations
+    def process_result(result):
+        layer_name = result['layer_name']
+        tiling_key = result['tiling_key']
+        tile_splits = result['tile_splits']
+        metric_value = result['metric_value']
+        
+        # Check if this is better than current best
+        if layer_name not in layer_best_configs or metric_value < layer_best_configs[layer_name]['best_metric']:
+            logger.info(f"New best configuration for {layer_name} with {metric} = {metric_value}")
+            layer_best_configs[layer_name] = {
+                'best_config': tile_splits,
+                'best_metric': metric_value,
+                'tiling_key': tiling_key
+            }
+            
+            # Update the results of the layer and its identical layers, saving a checkpoint on each improvement
+            record_group_result(layer_name, layer_best_configs[layer_name])
+            return True
+        return False
+    
     def result_processor():
         last_checkpoint_save = time.time()
+        processed = 0
         
         while True:
+            # Sleep until a result arrives or the next periodic checkpoint is due
+            timeout = max(0.0, last_checkpoint_save + checkpoint_interval - time.time())
             try:
-                # Process any available results
-                result = result_queue.get(block=False)
-                layer_name = result['layer_name']
-                tiling_key = result['tiling_key']
-                tile_splits = result['tile_splits']
-                metric_value = result['metric_value']
-                
-                # Check if this is better than current best
+                result = result_queue.get(timeout=timeout)
+            except queue.Empty:
+                if layer_best_configs:
+                    checkpoint_manager.save_checkpoint(force=True, background=True)
+                last_checkpoint_save = time.time()
+                continue
+            
+            # Every result was queued before the sentinel, so nothing is left behind
+            if result is results_done:
+                result_queue.task_done()
+                break
+            
+            try:
+                if process_result(result):
+                    last_checkpoint_save = time.time()
+            except Exception as e:
+                logger.error(f"Failed to record result for {result.get('layer_name')}: {str(e)}")
+            processed += 1
+            result_queue.task_done()
+        
+        logger.info(f"Recorded {processed} results")
+    
+    logger.info(f"Using {compile_workers} compile and {sim_workers} simulate workers for optimization")
+    
+    pipeline = CompileSimulatePipeline(compile_candidate, simulate_candidate,
+                                       compile_workers=compile_workers, sim_workers=sim_workers,
+                                       queue_size=queue_size)
+    
+    # Run the result processor alongside the pipeline
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+        result_processor_future = executor.submit(result_processor)
+        
+        tasks = producer if searches is None else search_tasks(unique_layers, searches, wakeup=result_reported)
+        try:
+            pipeline.run(tasks, on_result=report_result, on_failure=report_failure)
+        finally:
+            if producer is not None:
+                producer.close()
+            # The pipeline has joined its workers, so every result is queued ahead of this
+            result_queue.put(results_done)
+        
+        try:
+            result_processor_future.result()
+        except Exception as e:
+            logger.error(f"Result processor failed with error: {str(e)}")
+    
+    # Record why layers stopped before their whole budget was tested
+    for layer_name, stop_reason in stop_reasons.items():
+        for member_name, _ in layer_groups[layer_name]:
+            if member_name in results:
+                results[member_name]['stop_reason'] = stop_reason
+                checkpoint_manager.update_layer_result(member_name, results[member_name])
+    
+    # The searches of all remaining layers have finished, so a resumed run skips them
+    failed_layers = set(producer.failed_layers) if producer is not None else set()
+    for layer_name, members in layer_groups.items():
+        if layer_name in failed_layers:
+            continue
+        for member_name, _ in members:
+            journal.mark_complete(member_name)
+    journal.close()
+    
+    # Cache the optimized configurations
+    if enable_caching:
+        for layer_name, best_result in layer_best_configs.items():
+            for layer_name_orig, layer_info_orig in layers_info:
+                if layer_name_orig == layer_name:
+                    optimization_cache.add_to_cache(layer_info_orig, best_result)
+                    break
+    
+    # Ensure final checkpoint is saved
+    checkpoint_manager.save_checkpoint(force=True)
+    logger.info(f"Final checkpoint saved with {len(results)} optimized layers")
+    
+    return results
+
+def optimize_layers_packed(model_path, layers_info, output_dir, sim_path,
+                           metric="totCycles", max_configs_per_layer=10,
+                           compile_retries=3, sim_retries=2, max_workers=None,
+                           checkpoint_dir="checkpoints", checkpoint_interval=60,
+                           enable_caching=True, cache_dir="layer_cache",
+                           config_path=None, sim_pool=None, compiler_service=None,
+                           artifact_store=None, eval_cache=None, cost_model=None, arch_config=None,
+                           alignment=None, surrogate=None, search_strategy=None, early_stopping=None,
+                           search_options=None):
+    """
+    Optimize multiple layers by packing one candidate per layer into each compile.
+    
+    A candidate only changes its own layer's entry in the tiling config, and the
+    simulator reports every layer in a single CSV. Round i therefore combines
+    candidate i of every layer into one tiling config, compiles and simulates the
+    model once, and attributes each layer's row back to its own candidate.
+    
+    Args:
+        model_path: Path to the model file
+        layers_info: List of (layer_name, layer_info) tuples
+        output_dir: Base output directory
+        sim_path: Path to the simulator
+        metric: Performance metric to optimize
+        max_configs_per_layer: Maximum number of configurations to test per layer
+        compile_retries: Maximum number of compilation retry attempts
+        sim_retries: Maximum number of simulator retry attempts
+        max_workers: Maximum number of packing rounds to run in parallel (None = auto)
+        checkpoint_dir: Directory to store checkpoint files and the journal of evaluated candidates,
+            from which interrupted layers resume
+        checkpoint_interval: Interval in seconds between checkpoint saves
+        enable_caching: Whether to use caching for similar layers
+        cache_dir: Directory to store layer cache files
+        config_path: Path to the hardware configuration file
+        sim_pool: Optional SimulatorPool of warm simulator workers
+        compiler_service: Optional CompilerService of warm compiler servers
+        artifact_store: Optional ArtifactStore to reuse finished compiles from
+        eval_cache: Optional EvaluationCache to reuse metrics of identical instruction streams
+        cost_model: Optional CostModel to only evaluate the best predicted candidates of each layer
+        arch_config: Optional architecture config to prune candidates that exceed the buffers
+        alignment: Optional alignment mode ("restrict" or "reorder") for the split factors
+        surrogate: Optional SurrogateModel to sample candidates with and train on the results
+        search_strategy: Optional search strategy name (e.g. "bayesian") that proposes each layer's
+            candidate when its round starts, with max_configs_per_layer as its budget
+        early_stopping: Optional EarlyStopping rules; a converged layer is left out of later rounds
+            and the reason is recorded as "stop_reason" in its result
+        search_options: Optional dictionary of search strategy parameters; strategies that support it
+            save their state next to the checkpoint and resume interrupted layers
+        
+    Returns:
+        Dictionary mapping layer names to optimization results
+    """
+    model_name = os.path.basename(model_path).split('.')[0]
+    
+    if not os.path.isabs(output_dir):
+        output_dir = os.path.abspath(output_dir)
+    if not os.path.isabs(checkpoint_dir):
+        checkpoint_dir = os.path.abspath(checkpoint_dir)
+    if not os.path.isabs(cache_dir):
+        cache_dir = os.path.abspath(cache_dir)
+    
+    hardware_config = None
+    if config_path:
+        hardware_config = get_hardware_config_from_config_path(config_path)
+        logger.info(f"Using hardware configuration: {hardware_config}")
+    
+    checkpoint_manager = CheckpointManager(model_name, checkpoint_dir)
+    checkpoint_manager.set_save_interval(checkpoint_interval)
+    
+    optimization_cache = None
+    if enable_caching:
+        optimization_cache = OptimizationCache(model_name, cache_dir)
+    
+    results = checkpoint_manager.load_checkpoint()
+    state_dir = os.path.join(checkpoint_dir, f"{model_name}_search")
+    resumed_layers = resumable_searches(layers_info, search_strategy, state_dir)
+    
+    # Every evaluated candidate is journaled, so partially searched layers resume where they stopped
+    journal = CandidateJournal(model_name, checkpoint_dir)
+    journal.load()
+    layers_info = unfinished_layers(layers_info, results, resumed_layers, journal)
+    
+    layer_configs = {}
+    searches = None
+    if search_strategy:
+        # Each round proposes the next candidate of every layer from the rounds finished so far
+        searches = create_layer_searches(layers_info, max_configs_per_layer, search_strategy, cost_model=cost_model,
+                                         arch_config=arch_config, alignment=alignment,
+                                         optimization_cache=optimization_cache, search_options=search_options,
+                                         state_dir=state_dir)
+        for layer_name, search in searches.items():
+            evaluated = journal.evaluated(layer_name)
+            if evaluated:
+                logger.info(f"Replaying {len(evaluated)} evaluated configurations into the search of {layer_name}")
+                search.replay(evaluated)
+        num_rounds = max((search.budget for search in searches.values()), default=0)
+    else:
+        # Generate the candidates of every layer up front so they can be packed by index
+        for layer_name, layer_info in layers_info:
+            configs = generate_layer_configs(layer_info, max_configs_per_layer, cost_model=cost_model,
+                                             arch_config=arch_config, alignment=alignment, surrogate=surrogate)
+            evaluated = journal.evaluated(layer_name)
+            if evaluated:
+                logger.info(f"Skipping {len(evaluated)} configurations of {layer_name} evaluated before")
+                configs = [config for config in configs if TilingConfig.from_dict(config) not in evaluated]
+            layer_configs[layer_name] = configs
+        num_rounds = max((len(configs) for configs in layer_configs.values()), default=0)
+    layer_infos = dict(layers_info)
+    
+    logger.info(f"Packing candidates of {len(layers_info)} layers into {num_rounds} compile+simulate rounds")
+    
+    trackers = {}
+    stop_reasons = {}
+    if early_stopping is not None and early_stopping.enabled:
+        for layer_name, layer_info in layers_info:
+            layer_pool = searches[layer_name].candidates if searches is not None else layer_configs[layer_name]
+            trackers[layer_name] = early_stopping.create_tracker(layer_name, layer_info, layer_pool)
+            # Replay the results of an interrupted run
+            for metric_value in journal.evaluated(layer_name).values():
+                if metric_value is not None and trackers[layer_name].update(metric_value):
+                    stop_reasons[layer_name] = trackers[layer_name].stop_reason
+                    if searches is not None:
+                        searches[layer_name].stop()
+    
+    def layer_stopped(layer_name):
+        return layer_name in trackers and trackers[layer_name].stopped
+    
+    # Track the best configuration for each layer, starting from the checkpoint for resumed searches
+    # and from the journal for partially evaluated layers
+    layer_best_configs = {name: results[name] for name in resumed_layers if name in results}
+    for layer_name, layer_info in layers_info:
+        best_config, best_metric = journal.best(layer_name)
+        if best_config is None:
+            continue
+        if layer_name not in layer_best_configs or best_metric < layer_best_configs[layer_name]['best_metric']:
+            layer_best_configs[layer_name] = {
+                'best_config': best_config,
+                'best_metric': best_metric,
+                'tiling_key': layer_info["tiling_key"]
+            }
+            results[layer_name] = layer_best_configs[layer_name]
+            checkpoint_manager.update_layer_result(layer_name, layer_best_configs[layer_name])
+    results_lock = threading.Lock()
+    
+    def journal_candidate(layer_name, tile_splits, metric_value, round_idx):
+        # A journal that can't be written costs the resume, not the result
+        try:
+            journal.record(layer_name, tile_splits, metric_value)
+        except OSError as e:
+            logger.error(f"Failed to journal {layer_name} configuration of packing round {round_idx+1}: {str(e)}")
+    
+    def pack_round(round_idx):
+        # Candidate round_idx of every layer that still has one
+        if searches is not None:
+            packed = {}
+            for layer_name, search in searches.items():
+                # Layers waiting for the results of earlier rounds sit this round out
+                tile_splits = search.propose(block=False)
+                if tile_splits is not None:
+                    packed[layer_name] = dict(tile_splits)
+            return packed
+        # The dict form is needed for the tiling JSON and the results
+        return {
+            layer_name: dict(configs[round_idx])
+            for layer_name, configs in layer_configs.items()
+            if round_idx < len(configs) and not layer_stopped(layer_name)
+        }
+    
+    def evaluate_round(round_idx, packed):
+        tiling_config = {
+            layer_infos[layer_name]["tiling_key"]: {"1": tile_splits}
+            for layer_name, tile_splits in packed.items()
+        }
+        
+        test_exp_name = f"packed_round_{round_idx}"
+        logger.info(f"Testing packing round {round_idx+1}/{num_rounds} with {len(packed)} layers")
+        
+        if compiler_service is not None:
+            test_output_dir = compiler_service.compile(test_exp_name, tiling_config)
+            compile_success = test_output_dir is not None
+        else:
+            compile_success = compile_model(
+                model_path=model_path,
+                config_path=config_path,
+                experiment_name=test_exp_name,
+                tiling_config=tiling_config,
+                max_retries=compile_retries,
+                output_dir=output_dir,
+                artifact_store=artifact_store
+            )
+            if hardware_config:
+                dir_name = f"{model_name}_{hardware_config}_{test_exp_name}"
+            else:
+                dir_name = f"{model_name}_{test_exp_name}"
+            test_output_dir = os.path.join(output_dir, dir_name)
+        if not compile_success:
+            logger.warning(f"Compilation failed for packing round {round_idx+1}")
+            return None
+        
+        layer_metrics = run_simulator_layers(test_output_dir, list(packed), sim_path, max_retries=sim_retries,
+                                             sim_pool=sim_pool, eval_cache=eval_cache)
+        if layer_metrics is None:
+            logger.warning(f"Failed to get metrics for packing round {round_idx+1}")
+        return layer_metrics
+    
+    def run_round(round_idx, packed=None):
+        if packed is None:
+            packed = pack_round(round_idx)
+        if not packed:
+            return
+        
+        layer_metrics = None
+        try:
+            layer_metrics = evaluate_round(round_idx, packed)
+        finally:
+            # Searches hear about failed rounds so they don't wait for them
+            if layer_metrics is None:
+                for layer_name, tile_splits in packed.items():
+                    journal_candidate(layer_name, tile_splits, None, round_idx)
+                    if searches is not None:
+                        searches[layer_name].observe(tile_splits, None)
+        if layer_metrics is None:
+            return
+        
+        # Attribute each layer's row back to its own candidate
+        for layer_name, tile_splits in packed.items():
+            metrics = layer_metrics.get(layer_name)
+            metric_value = metrics.get(metric) if isinstance(metrics, dict) else metrics
+            journal_candidate(layer_name, tile_splits, metric_value, round_idx)
+            if searches is not None:
+                searches[layer_name].observe(tile_splits, metric_value)
+            if metric_value is None:
+                logger.warning(f"No {metric} for {layer_name} in packing round {round_idx+1}")
+                continue
+            
+            if surrogate is not None:
+                surrogate.add_observation(layer_infos[layer_name], tile_splits, metric_value)
+            
+            if layer_name in trackers:
+                stop_reason = trackers[layer_name].update(metric_value)
+                if stop_reason:
+                    stop_reasons[layer_name] = stop_reason
+                    if searches is not None:
+                        searches[layer_name].stop()
+            
+            with results_lock:
                 if layer_name not in layer_best_configs or metric_value < layer_best_configs[layer_name]['best_metric']:
                     logger.info(f"New best configuration for {layer_name} with {metric} = {metric_value}")
                     layer_best_configs[layer_name] = {
                         'best_config': tile_splits,
                         'best_metric': metric_value,
-                        'tiling_key': tiling_key
+                        'tiling_key': layer_infos[layer_name]["tiling_key"]
                     }
-                    
-                    # Update results dictionary
                     results[layer_name] = layer_best_configs[layer_name]
-                    
-                    # Save checkpoint on each improvement
                     checkpoint_manager.update_layer_result(layer_name, layer_best_configs[layer_name])
-                    last_checkpoint_save = time.time()
-                
-                result_queue.task_done()
-                
-            except queue.Empty:
-                # No results to process, check if we should save checkpoint
-                current_time = time.time()
-                if current_time - last_checkpoint_save >= checkpoint_interval and layer_best_configs:
-                    checkpoint_manager.save_checkpoint(force=True)
-                    last_checkpoint_save = current_time
-                
-                # Check if we're done (no tasks and no results pending)
-                if task_queue.empty() and result_queue.empty():
-                    break
-                
-                # Brief pause to avoid CPU spinning
-                time.sleep(0.1)
     
-    # Calculate number of workers to use - handle the case when max_workers is None
     if max_workers is None:
-        # Default is min(32, os.cpu_count() + 4)
         cpu_count = os.cpu_count() or 4
-        # Use fewer workers to avoid system overload and directory contention
-        # Reduce from 8 to 4 to prevent too many concurrent compilations
-        recommended_workers = min(4, max(1, cpu_count // 4))
-        actual_workers = recommended_workers
-    else:
-        actual_workers = max_workers
+        max_workers = min(4, max(1, cpu_count // 4))
     
-    logger.info(f"Using {actual_workers} worker threads for optimization")
-    
-    # Use ThreadPoolExecutor for workers
-    with concurrent.futures.ThreadPoolExecutor(max_workers=actual_workers) as executor:
-        # Start workers - reserve 1 thread for the result processor
-        worker_count = max(1, actual_workers - 1)
-        workers = [executor.submit(worker) for _ in range(worker_count)]
-        
-        # Start result processor in the executor too
-        result_processor_future = executor.submit(result_processor)
-        
-        # Wait for all tasks to complete
-        for future in concurrent.futures.as_completed(workers + [result_processor_future]):
+    def collect(futures):
+        for future in futures:
             try:
                 future.result()
             except Exception as e:
-                logger.error(f"Worker thread failed with error: {str(e)}")
+                logger.error(f"Packing round failed with error: {str(e)}")
+    
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        if searches is None:
+            futures = [executor.submit(run_round, round_idx) for round_idx in range(num_rounds)]
+            collect(concurrent.futures.as_completed(futures))
+        else:
+            # Pack each round when a worker is free so it sees the results of the rounds before it
+            running = set()
+            round_idx = 0
+            while not all(search.finished for search in searches.values()):
+                if len(running) < max_workers:
+                    packed = pack_round(round_idx)
+                    if packed:
+                        running.add(executor.submit(run_round, round_idx, packed))
+                        round_idx += 1
+                        continue
+                    if not running:
+                        break
+                done, running = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+                collect(done)
+            collect(concurrent.futures.as_completed(running))
+    
+    for layer_name, stop_reason in stop_reasons.items():
+        if layer_name in results:
+            results[layer_name]['stop_reason'] = stop_reason
+            checkpoint_manager.update_layer_result(layer_name, results[layer_name])
+    
+    # Every round has finished, so a resumed run skips these layers
+    for layer_name, _ in layers_info:
+        journal.mark_complete(layer_name)
+    journal.close()
     
-    # Cache the optimized configurations
     if enable_caching:
         for layer_name, best_result in layer_best_configs.items():
-            for layer_name_orig, layer_info_orig in layers_info:
-                if layer_name_orig == layer_name:
-                    optimization_cache.add_to_cache(layer_info_orig, best_result)
-                    break
+            optimization_cache.add_to_cache(layer_infos[layer_name], best_result)
     
-    # Ensure final checkpoint is saved
     checkpoint_manager.save_checkpoint(force=True)
     logger.info(f"Final checkpoint saved with {len(results)} optimized layers")
     
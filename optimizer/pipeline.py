@@ -0,0 +1,234 @@
+import time
+import queue
+import threading
+from utils.logging_utils import setup_logging
+
+logger = setup_logging("genesys_optimizer.pipeline")
+
+class StageStats:
+    """Busy time and item counts of one pipeline stage."""
+
+    def __init__(self, name, workers):
+        self.name = name
+        self.workers = workers
+        self.busy_time = 0.0
+        self.completed = 0
+        self.failed = 0
+        self.lock = threading.Lock()
+
+    def record(self, duration, success):
+        with self.lock:
+            self.busy_time += duration
+            if success:
+                self.completed += 1
+            else:
+                self.failed += 1
+
+    def as_dict(self, wall_time):
+        with self.lock:
+            capacity = self.workers * wall_time
+            return {
+                "workers": self.workers,
+                "completed": self.completed,
+                "failed": self.failed,
+                "busy_time": self.busy_time,
+                "utilization": self.busy_time / capacity if capacity > 0 else 0.0
+            }
+
+class CompileSimulatePipeline:
+    """
+    Two-stage compile -> simulate pipeline.
+
+    A pool of compile workers pulls candidates from the input and hands each
+    compiled candidate to a pool of simulate workers through a bounded queue,
+    so candidate k+1 compiles while candidate k simulates. When the simulate
+    stage falls behind, the full queue holds back the compile workers instead
+    of piling up compiled outputs on disk.
+    """
+
+    def __init__(self, compile_fn, simulate_fn, compile_workers=4, sim_workers=4, queue_size=None,
+                 stats_interval=60):
+        """
+        Initialize the pipeline.
+
+        Args:
+            compile_fn: Function(task) -> compiled output, or None if compilation failed
+            simulate_fn: Function(task, compiled) -> result, or None if simulation failed
+            compile_workers: Number of compile stage threads
+            sim_workers: Number of simulate stage threads
+            queue_size: Capacity of the queue between the stages (default: 2 * sim_workers)
+            stats_interval: Seconds between stage statistics log lines while running
+        """
+        self.compile_fn = compile_fn
+        self.simulate_fn = simulate_fn
+        self.compile_workers = max(1, compile_workers)
+        self.sim_workers = max(1, sim_workers)
+        self.queue_size = queue_size or 2 * self.sim_workers
+        self.stats_interval = stats_interval
+
+        self.compiled_queue = queue.Queue(maxsize=self.queue_size)
+        self.compile_stats = StageStats("compile", self.compile_workers)
+        self.simulate_stats = StageStats("simulate", self.sim_workers)
+        self.max_queue_depth = 0
+        self.queue_depth_total = 0
+        self.queue_depth_samples = 0
+        self.depth_lock = threading.Lock()
+        self.start_time = None
+        self.end_time = None
+        self.task_error = None
+
+    def _next_task(self, tasks, tasks_lock):
+        with tasks_lock:
+            return next(tasks, None)
+
+    def _compile_worker(self, tasks, tasks_lock, on_failure):
+        while True:
+            try:
+                task = self._next_task(tasks, tasks_lock)
+            except Exception as e:
+                # The input failed, not a candidate - keep the worker's thread and report it from run()
+                logger.error(f"Failed to get the next task: {str(e)}")
+                with tasks_lock:
+                    if self.task_error is None:
+                        self.task_error = e
+                break
+            if task is None:
+                break
+
+            start = time.time()
+            try:
+                compiled = self.compile_fn(task)
+            except Exception as e:
+                logger.error(f"Compile stage failed: {str(e)}")
+                compiled = None
+            self.compile_stats.record(time.time() - start, compiled is not None)
+
+            if compiled is None:
+                self._report(on_failure, task)
+            else:
+                # Blocks while the simulate stage is behind
+                self.compiled_queue.put((task, compiled))
+                with self.depth_lock:
+                    depth = self.compiled_queue.qsize()
+                    self.max_queue_depth = max(self.max_queue_depth, depth)
+                    self.queue_depth_total += depth
+                    self.queue_depth_samples += 1
+
+    def _simulate_worker(self, on_result, on_failure):
+        while True:
+            item = self.compiled_queue.get()
+            if item is None:
+                break
+            task, compiled = item
+
+            start = time.time()
+            try:
+                result = self.simulate_fn(task, compiled)
+            except Exception as e:
+                logger.error(f"Simulate stage failed: {str(e)}")
+                result = None
+            self.simulate_stats.record(time.time() - start, result is not None)
+
+            if result is None:
+                self._report(on_failure, task)
+            else:
+                self._report(on_result, task, result)
+
+    def _report(self, callback, *args):
+        """Call an on_result/on_failure callback, keeping the worker alive if it raises."""
+        if callback is None:
+            return
+        try:
+            callback(*args)
+        except Exception as e:
+            logger.error(f"Pipeline callback {getattr(callback, '__name__', callback)} failed: {str(e)}")
+
+    def _log_stats(self, finished):
+        while not finished.wait(self.stats_interval):
+            self.log_stats()
+
+    def run(self, tasks, on_result=None, on_failure=None):
+        """
+        Push every task through both stages and wait until the last one is simulated.
+
+        Args:
+            tasks: Iterable of tasks (consumed lazily by the compile workers)
+            on_result: Function(task, result) called from the simulate workers for each result
+            on_failure: Function(task) called from the worker of the stage a task failed in
+                (errors raised by either callback are logged, the workers keep going)
+
+        Returns:
+            Dictionary of stage statistics
+
+        Raises:
+            The first error raised by the task iterable, once every task taken from it is done
+        """
+        tasks = iter(tasks)
+        tasks_lock = threading.Lock()
+        self.start_time = time.time()
+        self.end_time = None
+        self.task_error = None
+
+        compile_threads = [threading.Thread(target=self._compile_worker, args=(tasks, tasks_lock, on_failure),
+                                            name=f"compile-{i}", daemon=True)
+                           for i in range(self.compile_workers)]
+        simulate_threads = [threading.Thread(target=self._simulate_worker, args=(on_result, on_failure),
+                                             name=f"simulate-{i}", daemon=True)
+                            for i in range(self.sim_workers)]
+        finished = threading.Event()
+        stats_thread = threading.Thread(target=self._log_stats, args=(finished,), daemon=True)
+
+        logger.info(f"Starting pipeline with {self.compile_workers} compile and {self.sim_workers} simulate "
+                    f"workers (queue size {self.queue_size})")
+        for thread in compile_threads + simulate_threads + [stats_thread]:
+            thread.start()
+
+        for thread in compile_threads:
+            thread.join()
+        # Every compiled candidate is queued by now - one sentinel per simulate worker
+        for _ in simulate_threads:
+            self.compiled_queue.put(None)
+        for thread in simulate_threads:
+            thread.join()
+
+        self.end_time = time.time()
+        finished.set()
+        self.log_stats()
+        if self.task_error is not None:
+            raise self.task_error
+        return self.get_stats()
+
+    def get_stats(self):
+        """
+        Get per-stage utilization and queue depth.
+
+        Returns:
+            Dictionary with "compile" and "simulate" stage statistics, queue depth and wall time
+        """
+        if self.start_time is None:
+            wall_time = 0.0
+        else:
+            wall_time = (self.end_time or time.time()) - self.start_time
+        with self.depth_lock:
+            mean_depth = self.queue_depth_total / self.queue_depth_samples if self.queue_depth_samples else 0.0
+            max_depth = self.max_queue_depth
+        return {
+            "wall_time": wall_time,
+            "compile": self.compile_stats.as_dict(wall_time),
+            "simulate": self.simulate_stats.as_dict(wall_time),
+            "queue_depth": self.compiled_queue.qsize(),
+            "mean_queue_depth": mean_depth,
+            "max_queue_depth": max_depth,
+            "queue_size": self.queue_size
+        }
+
+    def log_stats(self):
+        """Log the current stage statistics."""
+        stats = self.get_stats()
+        for stage in ("compile", "simulate"):
+            stage_stats = stats[stage]
+            logger.info(f"Pipeline {stage} stage: {stage_stats['workers']} workers, "
+                        f"{stage_stats['utilization']:.0%} utilized, {stage_stats['completed']} done, "
+                        f"{stage_stats['failed']} failed")
+        logger.info(f"Pipeline queue depth {stats['queue_depth']}/{stats['queue_size']} "
+                    f"(mean {stats['mean_queue_depth']:.1f}, max {stats['max_queue_depth']})")
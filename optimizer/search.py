@@ -0,0 +1,686 @@
+"""Adaptive search strategies that pick a layer's next candidates from earlier results."""
+
+import os
+import abc
+import json
+import math
+import random
+import threading
+from collections import deque
+from utils.logging_utils import setup_logging
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from scipy.special import ndtr
+except ImportError:
+    ndtr = None
+
+# Element-wise error function for the EI when scipy isn't installed
+_erf = np.vectorize(math.erf, otypes=[float]) if np is not None else None
+
+logger = setup_logging("genesys_optimizer.search")
+
+# Returned by _next() when the next pick depends on results still in flight
+WAIT = object()
+
+def config_key(config):
+    """Hashable key of a tiling configuration."""
+    return tuple(sorted(config.items()))
+
+class SearchStrategy(abc.ABC):
+    """
+    Ask/tell search over the candidates of one layer.
+
+    propose() returns the next candidate to evaluate (or None once the budget is
+    spent) and observe() reports its metric, or None if it failed. Several
+    proposals may be in flight at once, so a pipeline of workers can keep
+    asking for work while earlier candidates are still being evaluated.
+    Strategies implement _next(), called with the lock held, which returns the
+    next candidate, WAIT if it needs the results in flight first, or None once
+    the search is done.
+    """
+
+    name = None
+
+    # Whether the strategy can persist its state to a file and resume from it
+    checkpointed = False
+
+    def __init__(self, layer_info, candidates, budget, seed=None, initial_config=None):
+        """
+        Initialize the search.
+
+        Args:
+            layer_info: Layer information including "dimensions" and "tile_splits"
+            candidates: List of tiling configurations to search
+            budget: Maximum number of candidates to propose (negative = all)
+            seed: Optional random seed
+            initial_config: Optional known-good configuration to start from, e.g. a cached result
+        """
+        self.layer_info = layer_info
+        self.candidates = candidates if isinstance(candidates, list) else list(candidates)
+        self.budget = len(self.candidates) if budget is None or budget < 0 else min(budget, len(self.candidates))
+        self.random = random.Random(seed)
+        self.index = {config_key(config): idx for idx, config in enumerate(self.candidates)}
+        self.initial_config = initial_config
+        self.proposed = set()
+        # Index mask of the candidates not proposed yet, so picks don't rescan the proposed set
+        if np is not None:
+            self.unproposed = np.ones(len(self.candidates), dtype=bool)
+        else:
+            self.unproposed = bytearray(b"\x01") * len(self.candidates)
+        self.num_unproposed = len(self.candidates)
+        self.pending = {}
+        self.observations = {}
+        self.stopped = False
+        self.exhausted = False
+        self._factors = None
+        self.lock = threading.Lock()
+        self.condition = threading.Condition(self.lock)
+
+    @abc.abstractmethod
+    def _next(self):
+        """Pick the next unproposed candidate, WAIT, or None if the search is done."""
+
+    @property
+    def finished(self):
+        """Whether the search won't propose any more candidates."""
+        return self.stopped or self.exhausted or len(self.proposed) >= self.budget
+
+    def propose(self, block=True):
+        """
+        Get the next candidate to evaluate.
+
+        Args:
+            block: Wait for results in flight if the strategy needs them to pick the next
+                candidate; otherwise return None right away (check `finished` to tell
+                the two cases apart)
+
+        Returns:
+            Tiling configuration, or None if the search is finished
+        """
+        with self.condition:
+            while not self.finished:
+                config = self._next()
+                if config is None:
+                    self.exhausted = True
+                    return None
+                if config is not WAIT:
+                    key = config_key(config)
+                    self._mark_proposed(key)
+                    self.pending[key] = config
+                    return config
+                if not block:
+                    return None
+                if not self.pending:
+                    # Nothing in flight could change the strategy's mind
+                    self.exhausted = True
+                    return None
+                self.condition.wait()
+            return None
+
+    def observe(self, config, metric_value):
+        """
+        Report the result of a proposed candidate.
+
+        Args:
+            config: Tiling configuration returned by propose()
+            metric_value: Measured metric, or None if the candidate failed
+        """
+        with self.condition:
+            key = config_key(config)
+            self.pending.pop(key, None)
+            self.observations[key] = metric_value
+            self.condition.notify_all()
+
+    def replay(self, records):
+        """
+        Restore the results of candidates evaluated by an earlier run.
+
+        The candidates count as proposed, so they are never proposed again and
+        use up their share of the budget, and their results steer the next picks.
+
+        Args:
+            records: Dictionary mapping tiling configurations to their metric, or None if they failed
+        """
+        with self.condition:
+            for config, metric_value in records.items():
+                key = config_key(config)
+                if key in self.index:
+                    self._mark_proposed(key)
+                    self.observations[key] = metric_value
+            self.condition.notify_all()
+
+    def stop(self):
+        """End the search early; candidates already proposed can still be reported."""
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
+
+    def iter_candidates(self):
+        """
+        Yield candidates one at a time for a sequential evaluation loop.
+
+        Results reported with observe() between two iterations steer the next
+        pick; a candidate that wasn't reported before the next iteration is
+        counted as failed.
+        """
+        while True:
+            config = self.propose()
+            if config is None:
+                return
+            yield config
+            with self.lock:
+                unreported = config_key(config) in self.pending
+            if unreported:
+                self.observe(config, None)
+
+    def get_best(self):
+        """
+        Get the best observed candidate.
+
+        Returns:
+            Tuple of (config, metric) or (None, None)
+        """
+        with self.lock:
+            observed = [(metric, key) for key, metric in self.observations.items() if metric is not None]
+        if not observed:
+            return None, None
+        metric, key = min(observed)
+        return dict(key), metric
+
+    def _mark_proposed(self, key, proposed=True):
+        """Add a candidate to the proposed ones, or take it back out. Callers hold the lock."""
+        if proposed:
+            self.proposed.add(key)
+        else:
+            self.proposed.discard(key)
+        idx = self.index.get(key)
+        if idx is not None and bool(self.unproposed[idx]) == proposed:
+            self.unproposed[idx] = not proposed
+            self.num_unproposed += -1 if proposed else 1
+
+    def _unproposed(self):
+        """Indices of the candidates not proposed yet."""
+        if np is not None:
+            return np.flatnonzero(self.unproposed)
+        return [idx for idx, unproposed in enumerate(self.unproposed) if unproposed]
+
+    def _sample_unproposed(self, count, exclude=()):
+        """
+        Pick random candidates not proposed yet.
+
+        While most candidates are unproposed, random indices are drawn until
+        enough unproposed ones turn up, so a pick costs O(count) instead of a
+        scan of the whole pool.
+
+        Args:
+            count: Maximum number of candidates to pick
+            exclude: Indices of candidates not to pick
+
+        Returns:
+            List of distinct candidate indices
+        """
+        seen = set(exclude)
+        available = self.num_unproposed - sum(1 for idx in seen if self.unproposed[idx])
+        count = min(count, available)
+        if available * 2 < len(self.candidates):
+            indices = [idx for idx in self._unproposed() if idx not in seen]
+            return self.random.sample(indices, count)
+
+        picked = []
+        while len(picked) < count:
+            idx = self.random.randrange(len(self.candidates))
+            if self.unproposed[idx] and idx not in seen:
+                seen.add(idx)
+                picked.append(idx)
+        return picked
+
+    def _candidate(self, config):
+        """The candidate equal to a configuration, or None if it isn't searched."""
+        key = config_key({dim: config.get(dim, 1) for dim in self.layer_info["dimensions"]})
+        return self.candidates[self.index[key]] if key in self.index else None
+
+    def _starting_points(self):
+        """Candidates of the initial config, the compiled splits and no tiling, without duplicates."""
+        starts = []
+        for config in (self.initial_config, self.layer_info.get("tile_splits"), {}):
+            candidate = self._candidate(config) if config is not None else None
+            if candidate is not None and candidate not in starts:
+                starts.append(candidate)
+        return starts
+
+    def _metric(self, config):
+        """Observed metric of a candidate, infinite if it failed or wasn't evaluated."""
+        metric_value = self.observations.get(config_key(config))
+        return float('inf') if metric_value is None else metric_value
+
+    @property
+    def factors(self):
+        """Factors each dimension takes among the candidates, in increasing order."""
+        if self._factors is None:
+            self._factors = {
+                dim: sorted({config.get(dim, 1) for config in self.candidates})
+                for dim in self.layer_info["dimensions"]
+            }
+        return self._factors
+
+    def neighbours(self, config):
+        """Candidates one factor step away from a configuration in a single dimension."""
+        neighbours = []
+        for dim, factors in self.factors.items():
+            position = factors.index(config[dim])
+            for step in (-1, 1):
+                if 0 <= position + step < len(factors):
+                    neighbour = self._candidate(dict(config, **{dim: factors[position + step]}))
+                    if neighbour is not None:
+                        neighbours.append(neighbour)
+        return neighbours
+
+class BayesianOptimization(SearchStrategy):
+    """
+    Gaussian-process Bayesian optimization with expected improvement.
+
+    Candidates are points on the factor lattice with coordinates log(split) /
+    log(size) per dimension. A GP with an RBF kernel models the standardized
+    log metric, its lengthscale chosen by marginal likelihood, and the candidate
+    with the highest expected improvement over the best result is proposed
+    next. Candidates still being evaluated are included at their predicted
+    value (kriging believer), so batches of concurrent proposals spread out
+    instead of piling onto one point.
+    """
+
+    name = "bayesian"
+
+    # Lengthscales tried when fitting the GP, in normalized lattice units
+    LENGTHSCALES = (0.1, 0.2, 0.35, 0.6, 1.0)
+
+    def __init__(self, layer_info, candidates, budget, seed=None, initial_config=None, num_initial=None,
+                 xi=0.01, noise=1e-4):
+        """
+        Initialize the search.
+
+        Args:
+            layer_info: Layer information including "dimensions" and "tile_splits"
+            candidates: List of tiling configurations to search
+            budget: Maximum number of candidates to propose (negative = all)
+            seed: Optional random seed
+            initial_config: Optional known-good configuration evaluated first
+            num_initial: Candidates proposed before the GP is used (default: dims + 1, at most 5)
+            xi: Minimum improvement, in standardized units, that EI rewards
+            noise: Observation noise variance of the standardized metric
+        """
+        super().__init__(layer_info, candidates, budget, seed=seed, initial_config=initial_config)
+        self.xi = xi
+        self.noise = noise
+
+        dimensions = layer_info["dimensions"]
+        self.dims = [dim for dim, size in dimensions.items() if size > 1]
+        if num_initial is None:
+            num_initial = min(5, len(self.dims) + 1)
+        self.num_initial = max(1, num_initial)
+        self.points = self._coordinates(self.candidates)
+
+        if np is None:
+            logger.error("The numpy package is required for Bayesian optimization, falling back to random search")
+
+    def _coordinates(self, configs):
+        """Map configurations to normalized log-factor coordinates."""
+        dimensions = self.layer_info["dimensions"]
+        rows = [[math.log(config.get(dim, 1)) / math.log(dimensions[dim]) for dim in self.dims] for config in configs]
+        if np is None:
+            return rows
+        return np.array(rows, dtype=float).reshape(len(configs), len(self.dims))
+
+    def _initial(self):
+        """Initial design: the initial and compiled splits and no tiling, then spread-out random points."""
+        for candidate in self._starting_points():
+            if config_key(candidate) not in self.proposed:
+                return candidate
+
+        if not self.num_unproposed:
+            return None
+        if np is None or not self.proposed:
+            return self.candidates[self._sample_unproposed(1)[0]]
+
+        # Maximin: the random candidate farthest from everything proposed so far
+        sample = self._sample_unproposed(64)
+        chosen = self.points[[self.index[key] for key in self.proposed if key in self.index]]
+        distances = ((self.points[sample][:, None, :] - chosen[None, :, :]) ** 2).sum(axis=2).min(axis=1)
+        return self.candidates[sample[int(distances.argmax())]]
+
+    def _kernel(self, a, b, lengthscale):
+        distances = ((a[:, None, :] - b[None, :, :]) ** 2).sum(axis=2)
+        return np.exp(-0.5 * distances / lengthscale ** 2)
+
+    def _fit(self, X, y):
+        """Fit the GP, picking the lengthscale with the highest marginal likelihood."""
+        best = None
+        for lengthscale in self.LENGTHSCALES:
+            K = self._kernel(X, X, lengthscale) + self.noise * np.eye(len(X))
+            try:
+                L = np.linalg.cholesky(K)
+            except np.linalg.LinAlgError:
+                continue
+            alpha = np.linalg.solve(L.T, np.linalg.solve(L, y))
+            log_likelihood = -0.5 * y @ alpha - np.log(np.diag(L)).sum()
+            if best is None or log_likelihood > best[0]:
+                best = (log_likelihood, lengthscale, L, alpha)
+        return best
+
+    def _next(self):
+        observed = [(key, metric) for key, metric in self.observations.items()
+                    if metric is not None and metric > 0 and key in self.index]
+        if np is None or len(observed) < min(2, self.num_initial) or len(self.proposed) < self.num_initial:
+            return self._initial()
+
+        if not self.num_unproposed:
+            return None
+
+        X = self.points[[self.index[key] for key, _ in observed]]
+        y = np.log(np.array([metric for _, metric in observed], dtype=float))
+        mean, std = y.mean(), y.std() or 1.0
+        y = (y - mean) / std
+
+        fit = self._fit(X, y)
+        if fit is None:
+            return self._initial()
+        _, lengthscale, L, alpha = fit
+
+        # Believe the predicted value of candidates still in flight
+        pending = [key for key in self.pending if key in self.index]
+        if pending:
+            X_pending = self.points[[self.index[key] for key in pending]]
+            y_pending = self._kernel(X_pending, X, lengthscale) @ alpha
+            X_believed = np.vstack([X, X_pending])
+            y_believed = np.concatenate([y, y_pending])
+            K = self._kernel(X_believed, X_believed, lengthscale) + self.noise * np.eye(len(X_believed))
+            try:
+                L_believed = np.linalg.cholesky(K)
+            except np.linalg.LinAlgError:
+                # Pending points close to others make K numerically singular - keep the plain fit
+                logger.debug("Kernel matrix with pending candidates is not positive definite, ignoring them")
+            else:
+                X, y, L = X_believed, y_believed, L_believed
+                alpha = np.linalg.solve(L.T, np.linalg.solve(L, y))
+
+        remaining = self._unproposed()
+        X_remaining = self.points[remaining]
+        K_star = self._kernel(X_remaining, X, lengthscale)
+        mu = K_star @ alpha
+        v = np.linalg.solve(L, K_star.T)
+        sigma = np.sqrt(np.maximum(1.0 - (v ** 2).sum(axis=0), 1e-12))
+
+        # Expected improvement over the best observation (minimization)
+        improvement = y[:len(observed)].min() - mu - self.xi
+        z = improvement / sigma
+        cdf = ndtr(z) if ndtr is not None else 0.5 * (1.0 + _erf(z / math.sqrt(2.0)))
+        pdf = np.exp(-0.5 * z ** 2) / math.sqrt(2.0 * math.pi)
+        expected_improvement = improvement * cdf + sigma * pdf
+        return self.candidates[remaining[int(expected_improvement.argmax())]]
+
+class LocalSearch(SearchStrategy):
+    """
+    Hill climbing on the per-dimension divisor lattice.
+
+    Starting from the initial configuration (a cached result or the compiled
+    tile_splits), all neighbours of the current point - one dimension moved to
+    the next smaller or larger factor - are proposed at once so they can be
+    evaluated in parallel. Once they are all reported the search moves to the
+    best neighbour and repeats, and it ends when no neighbour improves on the
+    current point. Candidates are never proposed twice.
+    """
+
+    name = "local"
+
+    def __init__(self, layer_info, candidates, budget, seed=None, initial_config=None):
+        """
+        Initialize the search.
+
+        Args:
+            layer_info: Layer information including "dimensions" and "tile_splits"
+            candidates: List of tiling configurations to search
+            budget: Maximum number of candidates to propose (negative = all)
+            seed: Optional random seed
+            initial_config: Optional configuration to start from instead of the compiled splits
+        """
+        super().__init__(layer_info, candidates, budget, seed=seed, initial_config=initial_config)
+        self.center = None
+        self.frontier = deque()
+        self.moves = 0
+
+    def _next(self):
+        if self.center is None:
+            starts = self._starting_points()
+            if not starts:
+                return None
+            self.center = starts[0]
+            self.frontier.extend(self.neighbours(self.center))
+            # A replayed search retraces its moves through the evaluated candidates
+            if config_key(self.center) not in self.proposed:
+                return self.center
+
+        while True:
+            while self.frontier:
+                config = self.frontier.popleft()
+                if config_key(config) not in self.proposed:
+                    return config
+            if self.pending:
+                return WAIT
+
+            # Every neighbour is reported - move to the best one if it beats the current point
+            best = min(self.neighbours(self.center), key=self._metric, default=None)
+            if best is None or self._metric(best) >= self._metric(self.center):
+                return None
+            self.center = best
+            self.moves += 1
+            self.frontier.extend(self.neighbours(best))
+
+class EvolutionarySearch(SearchStrategy):
+    """
+    Genetic search for very large tiling spaces.
+
+    Every generation is proposed at once so the whole worker pool evaluates it
+    concurrently. The next generation keeps the `elite` best configurations
+    and fills the rest with children of tournament-selected parents: each
+    dimension's split comes from either parent (uniform crossover), then with
+    probability `mutation_rate` one dimension moves to a neighbouring factor.
+    Children that were already evaluated or aren't candidates are mutated
+    again, and random candidates fill any remaining places. The population
+    and all results are saved to `state_file` after every generation, so an
+    interrupted search resumes where it stopped.
+    """
+
+    name = "evolutionary"
+    checkpointed = True
+
+    def __init__(self, layer_info, candidates, budget, seed=None, initial_config=None, population_size=16,
+                 generations=10, elite=2, mutation_rate=0.3, tournament_size=3, state_file=None):
+        """
+        Initialize the search.
+
+        Args:
+            layer_info: Layer information including "dimensions" and "tile_splits"
+            candidates: List of tiling configurations to search
+            budget: Maximum number of candidates to propose (negative = population_size x generations)
+            seed: Optional random seed
+            initial_config: Optional known-good configuration placed in the first generation
+            population_size: Configurations per generation
+            generations: Number of generations, including the initial one
+            elite: Best configurations carried over to the next generation unchanged
+            mutation_rate: Probability that a child moves one dimension to a neighbouring factor
+            tournament_size: Configurations compared to select each parent
+            state_file: Optional JSON file the population is saved to and resumed from
+        """
+        super().__init__(layer_info, candidates, budget, seed=seed, initial_config=initial_config)
+        self.population_size = max(2, population_size)
+        self.generations = max(1, generations)
+        self.elite = min(max(0, elite), self.population_size - 1)
+        self.mutation_rate = mutation_rate
+        self.tournament_size = max(1, tournament_size)
+        self.state_file = state_file
+        self.budget = min(self.budget, self.population_size * self.generations)
+
+        self.generation = 0
+        self.population = []
+        self.batch = deque()
+        if state_file and os.path.exists(state_file):
+            self._load_state()
+
+    def _load_state(self):
+        """Restore the population and results of an interrupted search."""
+        try:
+            with open(self.state_file, 'r') as f:
+                state = json.load(f)
+        except (json.JSONDecodeError, IOError) as e:
+            logger.warning(f"Failed to load search state ({self.state_file}): {str(e)}")
+            return
+        if state.get("dimensions") != self.layer_info["dimensions"]:
+            logger.warning(f"Search state {self.state_file} belongs to a different layer, starting over")
+            return
+
+        for config, metric_value in state["observations"]:
+            key = config_key(config)
+            self._mark_proposed(key)
+            self.observations[key] = metric_value
+        self.generation = state["generation"]
+        self.population = [candidate for candidate in map(self._candidate, state["population"])
+                           if candidate is not None]
+        # Members that were still being evaluated are proposed again
+        for config in self.population:
+            key = config_key(config)
+            if key not in self.observations:
+                self._mark_proposed(key, proposed=False)
+                self.batch.append(config)
+        logger.info(f"Resuming evolutionary search at generation {self.generation + 1} with "
+                    f"{len(self.observations)} evaluated configurations")
+
+    def _save_state(self, finished=False):
+        """Save the population and results atomically. Callers hold the lock."""
+        if not self.state_file:
+            return
+        state = {
+            "dimensions": self.layer_info["dimensions"],
+            "generation": self.generation,
+            "finished": finished,
+            "population": [dict(config) for config in self.population],
+            "observations": [[dict(key), metric_value] for key, metric_value in self.observations.items()]
+        }
+        temp_file = f"{self.state_file}.tmp"
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.state_file)), exist_ok=True)
+            with open(temp_file, 'w') as f:
+                json.dump(state, f)
+            os.replace(temp_file, self.state_file)
+        except (IOError, OSError) as e:
+            logger.error(f"Failed to save search state to {self.state_file}: {str(e)}")
+
+    def _tournament(self, ranked):
+        contestants = self.random.sample(ranked, min(self.tournament_size, len(ranked)))
+        return min(contestants, key=self._metric)
+
+    def _mutate(self, config):
+        neighbours = self.neighbours(config)
+        return self.random.choice(neighbours) if neighbours else config
+
+    def _child(self, ranked, taken):
+        """Breed a candidate that is neither evaluated nor already in the new generation."""
+        first, second = self._tournament(ranked), self._tournament(ranked)
+        crossed = {dim: self.random.choice((first[dim], second[dim])) for dim in self.layer_info["dimensions"]}
+        child = self._candidate(crossed) or first
+        if self.random.random() < self.mutation_rate:
+            child = self._mutate(child)
+        for _ in range(len(self.layer_info["dimensions"]) * 2):
+            key = config_key(child)
+            if key not in self.proposed and key not in taken:
+                return child
+            child = self._mutate(child)
+        return None
+
+    def _breed(self):
+        """Create the next generation from the evaluated one."""
+        taken = set()
+        if not self.population:
+            # Initial generation: the known starting points, then random candidates
+            members = []
+            children = [config for config in self._starting_points()
+                        if config_key(config) not in self.proposed][:self.population_size]
+        else:
+            ranked = sorted(self.population, key=self._metric)
+            members = ranked[:self.elite]
+            children = []
+            while len(members) + len(children) < self.population_size:
+                child = self._child(ranked, taken)
+                if child is None:
+                    break
+                taken.add(config_key(child))
+                children.append(child)
+            self.generation += 1
+        taken.update(config_key(config) for config in children)
+
+        # Random immigrants fill places breeding couldn't
+        missing = self.population_size - len(members) - len(children)
+        if missing > 0:
+            exclude = [self.index[key] for key in taken if key in self.index]
+            children.extend(self.candidates[idx] for idx in self._sample_unproposed(missing, exclude))
+
+        self.population = members + children
+        self.batch.extend(children)
+        self._save_state()
+        if children:
+            best = min(self.population, key=self._metric)
+            logger.info(f"Generation {self.generation + 1}/{self.generations} for {self.layer_info.get('tiling_key')}: "
+                        f"{len(children)} new configurations, best so far {self._metric(best)}")
+        return bool(children)
+
+    def _next(self):
+        while True:
+            while self.batch:
+                config = self.batch.popleft()
+                if config_key(config) not in self.proposed:
+                    return config
+            if self.pending:
+                return WAIT
+            if (self.population and self.generation + 1 >= self.generations) or not self._breed():
+                self._save_state(finished=True)
+                return None
+
+# Strategies selectable with --search_strategy besides the default "sample"
+SEARCH_STRATEGIES = {
+    BayesianOptimization.name: BayesianOptimization,
+    LocalSearch.name: LocalSearch,
+    EvolutionarySearch.name: EvolutionarySearch
+}
+
+def search_state_file(state_dir, layer_name):
+    """Path of the state file of a layer's search."""
+    return os.path.join(state_dir, f"{layer_name}_search.json")
+
+def search_in_progress(state_file):
+    """Whether a saved search state belongs to a search that hasn't finished."""
+    try:
+        with open(state_file, 'r') as f:
+            return not json.load(f).get("finished", False)
+    except (json.JSONDecodeError, IOError):
+        return False
+
+def create_search_strategy(name, layer_info, candidates, budget, **kwargs):
+    """
+    Create a search strategy by name.
+
+    Args:
+        name: Strategy name, a key of SEARCH_STRATEGIES
+        layer_info: Layer information including "dimensions" and "tile_splits"
+        candidates: List of tiling configurations to search
+        budget: Maximum number of candidates to propose (negative = all)
+        **kwargs: Passed on to the strategy
+
+    Returns:
+        SearchStrategy
+    """
+    if name not in SEARCH_STRATEGIES:
+        raise ValueError(f"Unknown search strategy: {name}")
+    return SEARCH_STRATEGIES[name](layer_info, candidates, budget, **kwargs)
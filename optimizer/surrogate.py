@@ -0,0 +1,326 @@
+"""Surrogate model of candidate metrics learned from past evaluations."""
+
+import os
+import json
+import math
+import random
+import threading
+from utils.logging_utils import setup_logging
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+logger = setup_logging("genesys_optimizer.surrogate")
+
+# Weight of the predicted standard deviation in the lower confidence bound
+DEFAULT_EXPLORATION = 1.0
+
+# L2 penalty of the ridge regression
+DEFAULT_RIDGE = 1.0
+
+# Observations needed before the model is trusted over random sampling
+MIN_OBSERVATIONS = 4
+
+def extract_features(layer_info, tile_splits):
+    """
+    Describe a candidate as named numeric features.
+
+    Features are the log2 sizes, splits and tile sizes of every dimension, the
+    log2 tile count and volume, and their squares so the model can represent an
+    optimum between too few and too many tiles. Split and tile features are also
+    repeated per operation type so different operations can learn different
+    trade-offs.
+
+    Args:
+        layer_info: Layer information including "operation" and "dimensions"
+        tile_splits: Dictionary mapping dimensions to split factors
+
+    Returns:
+        Dictionary mapping feature names to values
+    """
+    operation = layer_info.get("operation", "")
+    features = {"bias": 1.0, f"op={operation}": 1.0}
+    log_num_tiles = 0.0
+    log_tile_volume = 0.0
+    for dim, size in layer_info["dimensions"].items():
+        split = max(1, tile_splits.get(dim, 1))
+        log_split = math.log2(split)
+        log_tile = math.log2(math.ceil(size / split))
+        features[f"log_dim:{dim}"] = math.log2(size)
+        features[f"log_split:{dim}"] = log_split
+        features[f"log_tile:{dim}"] = log_tile
+        features[f"{operation}:log_split:{dim}"] = log_split
+        features[f"{operation}:log_split_sq:{dim}"] = log_split ** 2
+        features[f"{operation}:log_tile:{dim}"] = log_tile
+        log_num_tiles += log_split
+        log_tile_volume += log_tile
+    features["log_num_tiles"] = log_num_tiles
+    features["log_num_tiles_sq"] = log_num_tiles ** 2
+    features["log_tile_volume"] = log_tile_volume
+    features[f"{operation}:log_num_tiles"] = log_num_tiles
+    features[f"{operation}:log_num_tiles_sq"] = log_num_tiles ** 2
+    return features
+
+class SurrogateModel:
+    """
+    Bayesian ridge regression of log(metric) over candidate features.
+
+    Observations are accumulated in the normal equations, so each new result
+    refits the model with a rank-one update instead of retraining on the whole
+    history. The posterior variance of a prediction gives the uncertainty that
+    candidates are selected by: the lowest predicted metric minus `exploration`
+    standard deviations. Observations are appended to a JSON-lines history so
+    later runs start from everything evaluated before.
+    """
+
+    def __init__(self, model_name, cache_dir="layer_cache", ridge=DEFAULT_RIDGE, exploration=DEFAULT_EXPLORATION):
+        """
+        Initialize the surrogate model.
+
+        Args:
+            model_name: Name of the model
+            cache_dir: Directory to store the evaluation history
+            ridge: L2 penalty of the regression
+            exploration: Weight of the uncertainty when selecting candidates
+        """
+        self.history_file = os.path.join(cache_dir, f"{model_name}_eval_history.jsonl")
+        # Earlier versions rewrote the whole history as one JSON list
+        self.legacy_history_file = os.path.join(cache_dir, f"{model_name}_eval_history.json")
+        self.cache_dir = cache_dir
+        self.ridge = ridge
+        self.exploration = exploration
+        self.records = {}
+        self.unsaved = []
+        self.history_checked = False
+        self.lock = threading.Lock()
+        self.available = np is not None
+
+        # Normal equations of the fit: A = X^T X + ridge * I, b = X^T y
+        self.vocabulary = {}
+        self.gram = None
+        self.moment = None
+        self.target_sum_sq = 0.0
+        self.num_observations = 0
+
+        if not self.available:
+            logger.error("The numpy package is required for the surrogate model, falling back to random sampling")
+
+        os.makedirs(cache_dir, exist_ok=True)
+        if os.path.exists(self.legacy_history_file):
+            try:
+                with open(self.legacy_history_file, 'r') as f:
+                    records = json.load(f)
+                for record in records:
+                    self._observe(record)
+            except (json.JSONDecodeError, IOError) as e:
+                logger.warning(f"Failed to load evaluation history ({self.legacy_history_file}): {str(e)}")
+        if os.path.exists(self.history_file):
+            try:
+                with open(self.history_file, 'r') as f:
+                    for line in f:
+                        try:
+                            record = json.loads(line)
+                        except json.JSONDecodeError:
+                            # A record torn by an interrupted write
+                            continue
+                        self._observe(record)
+            except IOError as e:
+                logger.warning(f"Failed to load evaluation history ({self.history_file}): {str(e)}")
+        logger.info(f"Surrogate model initialized with {len(self.records)} past evaluations")
+
+    def _save(self):
+        """Append the unsaved records to the evaluation history. Callers hold the lock."""
+        if not self.unsaved:
+            return
+        try:
+            with open(self.history_file, 'a') as f:
+                # Start on a fresh line after a record torn by an interrupted write
+                if not self.history_checked and f.tell() > 0:
+                    with open(self.history_file, 'rb') as history:
+                        history.seek(-1, os.SEEK_END)
+                        if history.read(1) != b"\n":
+                            f.write("\n")
+                self.history_checked = True
+                f.writelines(json.dumps(record) + "\n" for record in self.unsaved)
+            self.unsaved = []
+        except (IOError, OSError) as e:
+            logger.error(f"Failed to save evaluation history to {self.history_file}: {str(e)}")
+
+    def flush(self):
+        """Append the records added with save=False to the evaluation history."""
+        with self.lock:
+            self._save()
+
+    def _observe(self, record):
+        """Add a record to the history and the normal equations. Callers hold the lock."""
+        key = json.dumps([record["operation"], record["dimensions"], record["tile_splits"]], sort_keys=True)
+        if key in self.records or record["metric"] <= 0:
+            return False
+        self.records[key] = record
+        if not self.available:
+            return True
+
+        layer_info = {"operation": record["operation"], "dimensions": record["dimensions"]}
+        features = extract_features(layer_info, record["tile_splits"])
+
+        # Grow the normal equations for features not seen before
+        new_features = [name for name in features if name not in self.vocabulary]
+        if new_features:
+            for name in new_features:
+                self.vocabulary[name] = len(self.vocabulary)
+            size = len(self.vocabulary)
+            gram = self.ridge * np.eye(size)
+            moment = np.zeros(size)
+            if self.gram is not None:
+                old_size = self.gram.shape[0]
+                gram[:old_size, :old_size] = self.gram
+                moment[:old_size] = self.moment
+            self.gram = gram
+            self.moment = moment
+
+        x = self._vectorize(features)
+        y = math.log(record["metric"])
+        self.gram += np.outer(x, x)
+        self.moment += x * y
+        self.target_sum_sq += y * y
+        self.num_observations += 1
+        return True
+
+    def _vectorize(self, features):
+        """Map named features onto the vocabulary, dropping unseen ones."""
+        x = np.zeros(len(self.vocabulary))
+        for name, value in features.items():
+            index = self.vocabulary.get(name)
+            if index is not None:
+                x[index] = value
+        return x
+
+    def add_observation(self, layer_info, tile_splits, metric_value, save=True):
+        """
+        Record the metric of an evaluated candidate and refit the model.
+
+        Args:
+            layer_info: Layer information including "operation" and "dimensions"
+            tile_splits: Dictionary mapping dimensions to split factors
+            metric_value: Measured metric (lower is better)
+            save: Whether to append the record to the history right away, otherwise
+                it is written with the next saved record or flush()
+        """
+        record = {
+            "operation": layer_info.get("operation", ""),
+            "dimensions": layer_info["dimensions"],
+            "tile_splits": {dim: tile_splits.get(dim, 1) for dim in layer_info["dimensions"]},
+            "metric": metric_value
+        }
+        with self.lock:
+            if self._observe(record):
+                self.unsaved.append(record)
+                if save:
+                    self._save()
+
+    def load_past_results(self, layers_info, checkpoint_results=None, optimization_cache=None):
+        """
+        Seed the history with the best configurations of earlier runs.
+
+        Args:
+            layers_info: List of (layer_name, layer_info) tuples the results belong to
+            checkpoint_results: Layer results loaded from a checkpoint (optional)
+            optimization_cache: OptimizationCache of similar-layer results (optional)
+        """
+        added = 0
+        with self.lock:
+            for layer_name, layer_info in layers_info:
+                results = []
+                if checkpoint_results and layer_name in checkpoint_results:
+                    results.append(checkpoint_results[layer_name])
+                if optimization_cache is not None:
+                    cached = optimization_cache.cache.get(optimization_cache.generate_layer_fingerprint(layer_info))
+                    if cached:
+                        results.append(cached)
+                for result in results:
+                    if result.get("best_config") is None or result.get("best_metric") is None:
+                        continue
+                    record = {
+                        "operation": layer_info.get("operation", ""),
+                        "dimensions": layer_info["dimensions"],
+                        "tile_splits": {dim: result["best_config"].get(dim, 1) for dim in layer_info["dimensions"]},
+                        "metric": result["best_metric"]
+                    }
+                    if self._observe(record):
+                        self.unsaved.append(record)
+                        added += 1
+            self._save()
+        logger.info(f"Seeded surrogate model with {added} results from checkpoints and the layer cache")
+
+    def predict(self, layer_info, configs):
+        """
+        Predict log(metric) of candidates with its standard deviation.
+
+        Args:
+            layer_info: Layer information including "operation" and "dimensions"
+            configs: List of tiling configurations
+
+        Returns:
+            Tuple of (means, standard deviations) lists, or None if the model can't be fit yet
+        """
+        with self.lock:
+            if not self.available or self.num_observations < MIN_OBSERVATIONS:
+                return None
+            gram_inv = np.linalg.inv(self.gram)
+            weights = gram_inv @ self.moment
+
+            # Residual variance from the normal equations: sum((y - Xw)^2)
+            data_gram = self.gram - self.ridge * np.eye(len(self.vocabulary))
+            residual = self.target_sum_sq - 2 * weights @ self.moment + weights @ data_gram @ weights
+            noise = max(residual, 1e-6) / max(1, self.num_observations - 1)
+
+            X = np.array([self._vectorize(extract_features(layer_info, config)) for config in configs])
+
+        means = X @ weights
+        stds = np.sqrt(noise * (1 + np.einsum("ij,jk,ik->i", X, gram_inv, X)))
+        return means.tolist(), stds.tolist()
+
+    def select(self, layer_info, candidates, k):
+        """
+        Pick the k candidates with the lowest predicted metric minus uncertainty.
+
+        Falls back to random sampling while there are too few observations.
+
+        Args:
+            layer_info: Layer information including "operation" and "dimensions"
+            candidates: List of tiling configurations to choose from
+            k: Number of candidates to pick
+
+        Returns:
+            List of at most k configurations
+        """
+        if k <= 0 or not candidates:
+            return []
+        prediction = self.predict(layer_info, candidates)
+        if prediction is None:
+            return random.sample(candidates, min(k, len(candidates)))
+
+        means, stds = prediction
+        scores = [mean - self.exploration * std for mean, std in zip(means, stds)]
+        order = sorted(range(len(candidates)), key=lambda idx: scores[idx])
+        return [candidates[idx] for idx in order[:k]]
+
+    def iter_candidates(self, layer_info, candidates, budget):
+        """
+        Yield candidates one at a time, re-selecting with the latest observations.
+
+        Results added with add_observation between two iterations steer the
+        next pick.
+
+        Args:
+            layer_info: Layer information including "operation" and "dimensions"
+            candidates: List of tiling configurations to choose from
+            budget: Number of candidates to yield
+        """
+        remaining = list(candidates)
+        for _ in range(min(budget, len(remaining))):
+            selected = self.select(layer_info, remaining, 1)[0]
+            remaining.remove(selected)
+            yield selected
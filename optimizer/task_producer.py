@@ -0,0 +1,228 @@
+import queue
+import threading
+from optimizer.tiling_generator import (generate_tiling_configs, count_tiling_configs, iter_tiling_configs,
+                                        TilingSpace, TilingConfig)
+from utils.logging_utils import setup_logging
+
+logger = setup_logging("genesys_optimizer.task_producer")
+
+# Marks the end of the stream in the task queue
+DONE = object()
+
+def prioritize_layers(layers_info, max_configs_per_layer):
+    """
+    Order layers by operation type, the operations with the most candidates first.
+
+    Args:
+        layers_info: List of (layer_name, layer_info) tuples
+        max_configs_per_layer: Maximum number of configurations per layer (negative = exhaustive)
+
+    Returns:
+        List of (layer_name, layer_info) tuples in scheduling order
+    """
+    # Group layers by operation type for better cache locality
+    grouped_layers = {}
+    for layer_name, layer_info in layers_info:
+        op_type = layer_info.get("operation")
+        if op_type not in grouped_layers:
+            grouped_layers[op_type] = []
+        grouped_layers[op_type].append((layer_name, layer_info))
+
+    # Sort operations by estimated complexity (number of configs)
+    operation_complexity = []
+    for op_type, op_layers in grouped_layers.items():
+        total_configs = sum(
+            max_configs_per_layer if max_configs_per_layer > 0 else
+            count_tiling_configs(layer_info)
+            for _, layer_info in op_layers
+        )
+        operation_complexity.append((op_type, total_configs))
+
+    # Sort operations by complexity in descending order
+    sorted_operations = sorted(operation_complexity, key=lambda x: x[1], reverse=True)
+
+    prioritized_layers = []
+    for op_type, _ in sorted_operations:
+        prioritized_layers.extend(grouped_layers[op_type])
+    return prioritized_layers
+
+def layer_candidates(layer_info, max_configs, cost_model=None, arch_config=None, alignment=None, surrogate=None):
+    """
+    Get the candidate pool of a layer, lazily where possible.
+
+    An exhaustive search without a cost model or surrogate streams the tiling
+    space, every other mode needs the whole pool to rank or sample from and
+    generates it as a list.
+
+    Args:
+        layer_info: Dictionary containing layer information
+        max_configs: Maximum number of configurations (negative = exhaustive)
+        cost_model: Optional CostModel to keep only the best predicted candidates
+        arch_config: Optional architecture config to prune candidates that exceed the buffers
+        alignment: Optional alignment mode ("restrict" or "reorder") for the split factors
+        surrogate: Optional SurrogateModel to sample candidates with
+
+    Returns:
+        (pool, candidates, total) tuple: a re-iterable pool of the layer's candidates (for the
+        early-stopping bound), an iterator over its compact candidates, and their number
+        (an upper bound when infeasible candidates are pruned on the fly)
+    """
+    if max_configs < 0 and cost_model is None and surrogate is None:
+        space = TilingSpace(layer_info, arch_config, alignment)
+        return space, iter_tiling_configs(layer_info, arch_config, alignment, compact=True), len(space)
+
+    configs = generate_tiling_configs(layer_info, max_configs, cost_model=cost_model, arch_config=arch_config,
+                                      alignment=alignment, surrogate=surrogate)
+    dims = tuple(layer_info["dimensions"].keys())
+    configs = [TilingConfig.from_dict(config, dims) for config in configs]
+    return configs, iter(configs), len(configs)
+
+class TaskProducer:
+    """
+    Streams the candidate tasks of several layers through a bounded queue.
+
+    A producer thread pulls candidates lazily from one iterator per layer and
+    takes `layer_quantum` candidates from each layer in turn, so the first
+    task is ready as soon as the first layer's first candidate is, however
+    large the search spaces are. The bounded queue keeps the producer only a
+    few tasks ahead of the compile workers. A layer whose candidates can't be
+    generated is dropped and listed in `failed_layers`; any other producer
+    error is raised to the consumer at the end of the stream.
+    """
+
+    def __init__(self, layers_info, max_configs_per_layer=10, cost_model=None, arch_config=None,
+                 alignment=None, surrogate=None, queue_size=64, layer_quantum=1, skip=None,
+                 on_layer_start=None, evaluated=None):
+        """
+        Initialize the producer.
+
+        Args:
+            layers_info: List of (layer_name, layer_info) tuples
+            max_configs_per_layer: Maximum number of configurations per layer (negative = exhaustive)
+            cost_model: Optional CostModel to keep only the best predicted candidates of each layer
+            arch_config: Optional architecture config to prune candidates that exceed the buffers
+            alignment: Optional alignment mode ("restrict" or "reorder") for the split factors
+            surrogate: Optional SurrogateModel to sample candidates with
+            queue_size: Capacity of the task queue
+            layer_quantum: Candidates taken from a layer before moving to the next one
+                (0 = all of a layer's candidates before the next layer)
+            skip: Optional function(layer_name) -> True to drop a layer's remaining candidates
+            on_layer_start: Optional function(layer_name, layer_info, pool) called before a
+                layer's first task is queued
+            evaluated: Optional dictionary mapping layer names to the candidates evaluated
+                by an earlier run, which are left out
+        """
+        self.layers = prioritize_layers(layers_info, max_configs_per_layer)
+        self.max_configs_per_layer = max_configs_per_layer
+        self.cost_model = cost_model
+        self.arch_config = arch_config
+        self.alignment = alignment
+        self.surrogate = surrogate
+        self.layer_quantum = max(0, layer_quantum)
+        self.skip = skip
+        self.on_layer_start = on_layer_start
+        self.evaluated = evaluated or {}
+
+        self.task_queue = queue.Queue(maxsize=max(1, queue_size))
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.produced = 0
+        self.failed_layers = []
+        self.error = None
+
+    def start(self):
+        """Start the producer thread."""
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._produce, name="task-producer", daemon=True)
+            self.thread.start()
+        return self
+
+    def close(self):
+        """Stop producing, e.g. when the consumers give up early."""
+        self.stop_event.set()
+        # Make room so a producer blocked on the full queue wakes up and sees the stop
+        while True:
+            try:
+                self.task_queue.get_nowait()
+            except queue.Empty:
+                break
+
+    def __iter__(self):
+        """Yield the queued tasks until the producer is done, dropping skipped layers."""
+        self.start()
+        while True:
+            task = self.task_queue.get()
+            if task is DONE:
+                if self.error is not None:
+                    raise self.error
+                return
+            if self.skip is None or not self.skip(task['layer_name']):
+                yield task
+
+    def _put(self, item):
+        # Block until there is room in the queue; close() drains it to wake a waiting producer
+        if self.stop_event.is_set():
+            return False
+        self.task_queue.put(item)
+        return not self.stop_event.is_set()
+
+    def _layer_tasks(self, layer_idx, layer_name, layer_info):
+        pool, candidates, total = layer_candidates(layer_info, self.max_configs_per_layer, cost_model=self.cost_model,
+                                                   arch_config=self.arch_config, alignment=self.alignment,
+                                                   surrogate=self.surrogate)
+        logger.info(f"Streaming up to {total} configurations for {layer_name}")
+        if self.on_layer_start is not None:
+            self.on_layer_start(layer_name, layer_info, pool)
+        evaluated = self.evaluated.get(layer_name)
+        if evaluated:
+            logger.info(f"Skipping {len(evaluated)} configurations of {layer_name} evaluated before")
+        for i, tile_splits in enumerate(candidates):
+            if evaluated and tile_splits in evaluated:
+                continue
+            yield {
+                'layer_name': layer_name,
+                'layer_info': layer_info,
+                'tile_splits': tile_splits,
+                'config_idx': i,
+                'total_configs': total,
+                'priority': layer_idx  # Lower is higher priority
+            }
+
+    def _produce(self):
+        try:
+            active = [(layer_name, self._layer_tasks(layer_idx, layer_name, layer_info))
+                      for layer_idx, (layer_name, layer_info) in enumerate(self.layers)]
+            while active and not self.stop_event.is_set():
+                remaining = []
+                for layer_name, tasks in active:
+                    exhausted = False
+                    taken = 0
+                    while not self.layer_quantum or taken < self.layer_quantum:
+                        if self.skip is not None and self.skip(layer_name):
+                            exhausted = True
+                            break
+                        try:
+                            task = next(tasks, None)
+                        except Exception as e:
+                            # Drop only this layer, the others still get their candidates
+                            logger.error(f"Failed to generate candidates for {layer_name}: {str(e)}")
+                            self.failed_layers.append(layer_name)
+                            task = None
+                        if task is None:
+                            exhausted = True
+                            break
+                        if not self._put(task):
+                            return
+                        self.produced += 1
+                        taken += 1
+                    if not exhausted:
+                        remaining.append((layer_name, tasks))
+                active = remaining
+            logger.info(f"Produced {self.produced} configuration tasks")
+        except Exception as e:
+            logger.error(f"Task producer failed with error: {str(e)}")
+            self.error = e
+        finally:
+            # Always end the stream so the consumers don't wait forever
+            if not self.stop_event.is_set():
+                self.task_queue.put(DONE)
@@ -2,67 +2,499 @@
 
 import itertools
 import logging
+import math
+from collections.abc import Mapping
 from utils.math_utils import get_factors
 from utils.logging_utils import setup_logging
 
 logger = setup_logging("genesys_optimizer.tiling_generator")
 
-def generate_all_tiling_configs(layer_info):
+# On-chip buffers: arch config keys of (depth, lanes per entry, bits per lane)
+BUFFER_GEOMETRY = {
+    "IBUF": ("IBUF_DEPTH", ("ARRAY_N",), "DATA_WIDTH"),
+    "WBUF": ("WBUF_DEPTH", ("ARRAY_N", "ARRAY_M"), "WGT_WIDTH"),
+    "OBUF": ("OBUF_DEPTH", ("ARRAY_M",), "ACC_WIDTH"),
+    "BBUF": ("BBUF_DEPTH", ("ARRAY_M",), "BIAS_WIDTH"),
+    "VMEM1": ("VMEM_DEPTH", ("SIMD_WIDTH",), "ACC_WIDTH"),
+    "VMEM2": ("VMEM_DEPTH", ("SIMD_WIDTH",), "ACC_WIDTH")
+}
+
+# Compute units whose per-pass extent pads the tiles of the buffers feeding them
+COMPUTE_LEVELS = ("pe_array", "SIMD")
+
+# How aligned factors are used: keep only them, or try them before the unaligned ones
+ALIGNMENT_MODES = ("restrict", "reorder")
+
+def get_buffer_capacities(arch_config):
     """
-    Generate ALL possible tiling configurations for a layer without any sampling.
+    Get the capacity of every on-chip buffer in bits.
     
     Args:
-        layer_info: Dictionary containing layer information
+        arch_config: Architecture parameters from *_arch_cfg.json
+        
+    Returns:
+        Dictionary mapping buffer names to capacities in bits
+    """
+    capacities = {}
+    for buffer, (depth_key, lane_keys, width_key) in BUFFER_GEOMETRY.items():
+        if depth_key not in arch_config:
+            continue
+        lanes = math.prod(arch_config.get(key, 1) for key in lane_keys)
+        capacities[buffer] = arch_config[depth_key] * lanes * arch_config.get(width_key, 8)
+    return capacities
+
+def compute_tile_footprints(layer_info, tile_splits):
+    """
+    Compute how many bits each on-chip buffer holds for one tile of a candidate.
+    
+    Every operand tile is its shape divided by the splits, padded up to the
+    extent the systolic array or SIMD unit processes per pass. Dimensions of an
+    operand that aren't tiled directly (e.g. a conv input's IH/IW) keep the tile
+    size the layer was compiled with.
+    
+    Args:
+        layer_info: Layer information including "dimensions" and "operands"
+        tile_splits: Dictionary mapping dimensions to split factors
         
     Returns:
-        List of all possible tiling configurations
+        Dictionary mapping buffer names to footprints in bits
     """
     dimensions = layer_info["dimensions"]
+    footprints = {}
+    for operand in layer_info.get("operands", []):
+        unit_dims = {}
+        for level in COMPUTE_LEVELS:
+            for dim, extent in operand["tiling"].get(level, {}).items():
+                unit_dims[dim] = max(unit_dims.get(dim, 1), extent)
+        
+        for buffer in set(operand["data_path"]):
+            if buffer not in BUFFER_GEOMETRY:
+                continue
+            compiled_tile = operand["tiling"].get(buffer, {})
+            elements = 1
+            for dim, size in operand["shape_symbols"].items():
+                if dim in dimensions:
+                    tile = math.ceil(size / max(1, tile_splits.get(dim, 1)))
+                else:
+                    tile = compiled_tile.get(dim, size)
+                unit = unit_dims.get(dim, 1)
+                elements *= math.ceil(tile / unit) * unit
+            footprints[buffer] = footprints.get(buffer, 0) + elements * operand["bits"]
+    return footprints
+
+def is_feasible(layer_info, tile_splits, capacities):
+    """
+    Check whether every buffer footprint of a candidate fits its buffer.
     
-    # factors for each dimension that has size > 1
-    factor_dict = {}
-    for dim, size in dimensions.items():
-        if size > 1:
-            factor_dict[dim] = get_factors(size)
+    Args:
+        layer_info: Layer information including "dimensions" and "operands"
+        tile_splits: Dictionary mapping dimensions to split factors
+        capacities: Dictionary mapping buffer names to capacities in bits
+        
+    Returns:
+        True if the candidate fits
+    """
+    footprints = compute_tile_footprints(layer_info, tile_splits)
+    return all(bits <= capacities.get(buffer, float('inf')) for buffer, bits in footprints.items())
+
+def filter_feasible_configs(layer_info, configs, arch_config):
+    """
+    Prune candidates whose tiles don't fit the on-chip buffers.
+    
+    Args:
+        layer_info: Layer information including "dimensions" and "operands"
+        configs: List of tiling configurations
+        arch_config: Architecture parameters from *_arch_cfg.json
+        
+    Returns:
+        Tuple of (feasible configurations, number of pruned configurations)
+    """
+    if not layer_info.get("operands"):
+        return configs, 0
+    
+    capacities = get_buffer_capacities(arch_config)
+    feasible = [config for config in configs if is_feasible(layer_info, config, capacities)]
+    pruned = len(configs) - len(feasible)
+    if pruned:
+        logger.info(f"Pruned {pruned} of {len(configs)} candidates for {layer_info.get('tiling_key')} "
+                    f"that exceed the buffer capacities")
+    
+    if not feasible and configs:
+        # Don't drop the layer - fall back to the splits it was compiled with
+        logger.warning(f"No feasible candidates for {layer_info.get('tiling_key')}, keeping the compiled tile splits")
+        compiled_splits = layer_info.get("tile_splits")
+        if compiled_splits:
+            dims = configs[0].dims if isinstance(configs[0], TilingConfig) else None
+            feasible = [TilingConfig.from_dict(compiled_splits, dims)]
         else:
+            feasible = configs[:1]
+    return feasible, pruned
+
+def iter_feasible_configs(layer_info, configs, arch_config):
+    """
+    Lazily prune candidates whose tiles don't fit the on-chip buffers.
+    
+    Like filter_feasible_configs, but consumes and yields one candidate at a
+    time so the configurations never have to be held in memory.
+    
+    Args:
+        layer_info: Layer information including "dimensions" and "operands"
+        configs: Iterable of tiling configurations
+        arch_config: Architecture parameters from *_arch_cfg.json
+        
+    Yields:
+        Feasible tiling configurations
+    """
+    if not layer_info.get("operands"):
+        yield from configs
+        return
+    
+    capacities = get_buffer_capacities(arch_config)
+    first = None
+    feasible = 0
+    pruned = 0
+    for config in configs:
+        if first is None:
+            first = config
+        if is_feasible(layer_info, config, capacities):
+            feasible += 1
+            yield config
+        else:
+            pruned += 1
+    if pruned:
+        logger.info(f"Pruned {pruned} of {feasible + pruned} candidates for {layer_info.get('tiling_key')} "
+                    f"that exceed the buffer capacities")
+    
+    if not feasible and first is not None:
+        logger.warning(f"No feasible candidates for {layer_info.get('tiling_key')}, keeping the compiled tile splits")
+        compiled_splits = layer_info.get("tile_splits")
+        if not compiled_splits:
+            yield first
+        elif isinstance(first, TilingConfig):
+            # Keep a compact stream compact
+            yield TilingConfig.from_dict(compiled_splits, first.dims)
+        else:
+            yield dict(compiled_splits)
+
+def get_dimension_alignment(layer_info, arch_config=None):
+    """
+    Get the number of array rows, array columns or SIMD lanes each dimension maps onto.
+    
+    Dimensions are mapped through the operands' pe_array/SIMD tiling in the
+    layer JSON: a dimension of an IBUF operand spans the ARRAY_N rows, one of an
+    OBUF operand the ARRAY_M columns, and one processed by the SIMD unit the
+    SIMD_WIDTH lanes. Without an arch config the extents in the JSON are used.
+    
+    Args:
+        layer_info: Layer information including "operands"
+        arch_config: Architecture parameters from *_arch_cfg.json (optional)
+        
+    Returns:
+        Dictionary mapping the dimensions that map onto the hardware to their lane counts
+    """
+    arch_config = arch_config or {}
+    alignment = {}
+    for operand in layer_info.get("operands", []):
+        path = operand["data_path"]
+        for level in COMPUTE_LEVELS:
+            for dim, extent in operand["tiling"].get(level, {}).items():
+                if extent <= 1:
+                    continue
+                if level == "SIMD":
+                    lanes = arch_config.get("SIMD_WIDTH", extent)
+                elif "OBUF" in path:
+                    lanes = arch_config.get("ARRAY_M", extent)
+                elif "IBUF" in path:
+                    lanes = arch_config.get("ARRAY_N", extent)
+                else:
+                    lanes = extent
+                alignment[dim] = max(alignment.get(dim, 1), lanes)
+    return alignment
+
+def get_aligned_factors(size, lanes, mode="restrict"):
+    """
+    Get the split factors of a dimension that leave tiles filling whole lanes.
+    
+    A split is aligned if its tile is a multiple of the lane count; not splitting
+    is always kept.
+    
+    Args:
+        size: Size of the dimension
+        lanes: Array rows, columns or SIMD lanes the dimension maps onto
+        mode: "restrict" to drop unaligned factors, "reorder" to put them last
+        
+    Returns:
+        List of split factors
+    """
+    factors = get_factors(size)
+    aligned = [factor for factor in factors if factor == 1 or (size // factor) % lanes == 0]
+    if mode == "restrict":
+        return aligned
+    return aligned + [factor for factor in factors if factor not in aligned]
+
+def get_dimension_factors(layer_info, arch_config=None, alignment=None):
+    """
+    Get the split factors to consider for each dimension of a layer.
+    
+    Args:
+        layer_info: Dictionary containing layer information
+        arch_config: Architecture parameters used by the alignment mode (optional)
+        alignment: None for every divisor, or one of ALIGNMENT_MODES
+        
+    Returns:
+        Dictionary mapping dimensions to lists of split factors
+    """
+    if alignment is not None and alignment not in ALIGNMENT_MODES:
+        raise ValueError(f"Unknown alignment mode: {alignment}")
+    
+    lanes = get_dimension_alignment(layer_info, arch_config) if alignment else {}
+    factor_dict = {}
+    for dim, size in layer_info["dimensions"].items():
+        if size <= 1:
             factor_dict[dim] = [1]
+        elif dim in lanes:
+            factor_dict[dim] = get_aligned_factors(size, lanes[dim], alignment)
+        else:
+            factor_dict[dim] = get_factors(size)
+    return factor_dict
+
+class TilingConfig(Mapping):
+    """
+    Compact, hashable tiling configuration.
     
-    # calculates the total possible configurations
-    total_configs = 1
-    for factors in factor_dict.values():
-        total_configs *= len(factors)
+    Stores the splits as a tuple next to the dimension order, which is shared
+    by all candidates of a layer, instead of a dict per candidate. It reads
+    like a {dimension: split} dict and compares equal to one; use to_dict()
+    where a real dict is needed, e.g. for the tiling JSON.
+    """
     
-    logger.info(f"Generating all {total_configs} possible tiling configurations")
+    __slots__ = ("dims", "splits")
     
-    # generates all possible combinations
-    dims = list(dimensions.keys())
-    factor_lists = [factor_dict[dim] for dim in dims]
+    def __init__(self, dims, splits):
+        """
+        Initialize the configuration.
+        
+        Args:
+            dims: Tuple of dimension names (share one tuple across a layer's candidates)
+            splits: Tuple of split factors in the order of dims
+        """
+        self.dims = dims
+        self.splits = splits
     
-    configs = []
-    for split_combination in itertools.product(*factor_lists):
-        config = {dim: split for dim, split in zip(dims, split_combination)}
-        configs.append(config)
+    @classmethod
+    def from_dict(cls, config, dims=None):
+        """
+        Create a compact configuration from a {dimension: split} dict.
+        
+        Args:
+            config: Tiling configuration
+            dims: Dimension order to share if the configuration has exactly these dimensions
+        """
+        if isinstance(config, cls) and (dims is None or config.dims == dims):
+            return config
+        if dims is None or len(dims) != len(config) or any(dim not in config for dim in dims):
+            dims = tuple(config)
+        return cls(dims, tuple(config[dim] for dim in dims))
     
-    return configs
+    def __getitem__(self, dim):
+        try:
+            return self.splits[self.dims.index(dim)]
+        except ValueError:
+            raise KeyError(dim) from None
+    
+    def __iter__(self):
+        return iter(self.dims)
+    
+    def __len__(self):
+        return len(self.dims)
+    
+    def __eq__(self, other):
+        if isinstance(other, TilingConfig) and other.dims == self.dims:
+            return other.splits == self.splits
+        return Mapping.__eq__(self, other)
+    
+    def __hash__(self):
+        return hash(frozenset(zip(self.dims, self.splits)))
+    
+    def __repr__(self):
+        return repr(self.to_dict())
+    
+    def to_dict(self):
+        """Convert to a {dimension: split} dict."""
+        return dict(zip(self.dims, self.splits))
 
-def generate_tiling_configs(layer_info, max_configs=None):
+class TilingSpace:
+    """
+    All tiling configurations of a layer, enumerated lazily.
+    
+    The space is the Cartesian product of the per-dimension split factors. A
+    configuration is addressed by its tuple of factor indices, or by its rank
+    in the product (mixed radix, last dimension fastest - the same order as
+    itertools.product), so the space can be counted, iterated and sampled
+    without materializing it.
+    """
+    
+    def __init__(self, layer_info, arch_config=None, alignment=None):
+        """
+        Initialize the space.
+        
+        Args:
+            layer_info: Dictionary containing layer information
+            arch_config: Architecture parameters used by the alignment mode (optional)
+            alignment: None for every divisor, or one of ALIGNMENT_MODES
+        """
+        factor_dict = get_dimension_factors(layer_info, arch_config, alignment)
+        self.dims = tuple(layer_info["dimensions"].keys())
+        self.factors = [factor_dict[dim] for dim in self.dims]
+        self.radices = [len(factors) for factors in self.factors]
+    
+    def __len__(self):
+        # Closed form: the product of the factor list lengths
+        return math.prod(self.radices)
+    
+    def __iter__(self):
+        for splits in itertools.product(*self.factors):
+            yield dict(zip(self.dims, splits))
+    
+    def __getitem__(self, rank):
+        return self.to_config(self.indices_at(rank))
+    
+    def iter_compact(self):
+        """Iterate over all configurations in rank order as TilingConfigs."""
+        for splits in itertools.product(*self.factors):
+            yield TilingConfig(self.dims, splits)
+    
+    def iter_indices(self):
+        """Iterate over the factor index tuples of all configurations in rank order."""
+        return itertools.product(*(range(radix) for radix in self.radices))
+    
+    def indices_at(self, rank):
+        """
+        Get the factor indices of the configuration with the given rank.
+        
+        Raises:
+            IndexError: If the rank is outside the space
+        """
+        if not 0 <= rank < len(self):
+            raise IndexError(f"Rank {rank} outside a space of {len(self)} configurations")
+        indices = []
+        for radix in reversed(self.radices):
+            rank, index = divmod(rank, radix)
+            indices.append(index)
+        return tuple(reversed(indices))
+    
+    def rank_of(self, config):
+        """
+        Get the rank of a configuration.
+        
+        Raises:
+            ValueError: If a split isn't one of its dimension's factors
+        """
+        rank = 0
+        for dim, factors, radix in zip(self.dims, self.factors, self.radices):
+            rank = rank * radix + factors.index(config.get(dim, 1))
+        return rank
+    
+    def to_config(self, indices):
+        """Convert factor indices to a {dimension: split} configuration."""
+        return {dim: factors[index] for dim, factors, index in zip(self.dims, self.factors, indices)}
+
+def count_tiling_configs(layer_info, arch_config=None, alignment=None):
+    """
+    Count the possible tiling configurations of a layer without generating them.
+    
+    Args:
+        layer_info: Dictionary containing layer information
+        arch_config: Architecture parameters used by the alignment mode (optional)
+        alignment: None for every divisor, or one of ALIGNMENT_MODES
+        
+    Returns:
+        Number of configurations in the layer's tiling space
+    """
+    return len(TilingSpace(layer_info, arch_config, alignment))
+
+def iter_tiling_configs(layer_info, arch_config=None, alignment=None, compact=False):
+    """
+    Lazily generate all possible tiling configurations of a layer.
+    
+    Args:
+        layer_info: Dictionary containing layer information
+        arch_config: Architecture parameters to prune candidates that exceed the buffers (optional),
+            also used by the alignment mode
+        alignment: None for every divisor, or one of ALIGNMENT_MODES
+        compact: Yield TilingConfigs instead of dicts
+        
+    Yields:
+        Tiling configurations in rank order
+    """
+    space = TilingSpace(layer_info, arch_config, alignment)
+    logger.info(f"Streaming {len(space)} possible tiling configurations")
+    configs = space.iter_compact() if compact else iter(space)
+    if arch_config is not None:
+        yield from iter_feasible_configs(layer_info, configs, arch_config)
+    else:
+        yield from configs
+
+def generate_all_tiling_configs(layer_info, arch_config=None, alignment=None):
+    """
+    Generate ALL possible tiling configurations for a layer without any sampling.
+    
+    Args:
+        layer_info: Dictionary containing layer information
+        arch_config: Architecture parameters used by the alignment mode (optional)
+        alignment: None for every divisor, or "restrict"/"reorder" to drop or
+            deprioritize splits that leave partially filled array rows, columns or SIMD lanes
+        
+    Returns:
+        List of all possible tiling configurations as TilingConfigs
+    """
+    space = TilingSpace(layer_info, arch_config, alignment)
+    logger.info(f"Generating all {len(space)} possible tiling configurations")
+    return list(space.iter_compact())
+
+def generate_tiling_configs(layer_info, max_configs=None, cost_model=None, arch_config=None, alignment=None,
+                            surrogate=None):
     """
     Generate tiling configurations for a layer.
     If max_configs is None or negative, generate all possible configurations.
     Otherwise, use sampling strategy to limit configurations.
     
-
+    With a cost model, every possible configuration is ranked by predicted
+    runtime instead and only the max_configs fastest are returned. With an
+    arch config (or a cost model), candidates whose tiles exceed the on-chip
+    buffers are pruned first. The alignment mode ("restrict" or "reorder")
+    restricts or reorders each dimension's factors by the lanes it maps onto.
+    With a surrogate model (and no cost model), sampled candidates beyond the
+    fixed anchors are picked by the surrogate instead of at random.
+    
+    The configurations are TilingConfigs; convert a candidate with dict() where
+    a real dict is needed, e.g. for the tiling JSON.
     """
+    if arch_config is None and cost_model is not None:
+        arch_config = cost_model.arch_config
+    
+    if cost_model is not None:
+        configs = generate_all_tiling_configs(layer_info, arch_config, alignment)
+        if arch_config is not None:
+            configs, _ = filter_feasible_configs(layer_info, configs, arch_config)
+        top_k = max_configs if max_configs is not None and max_configs >= 0 else None
+        return cost_model.rank_configs(layer_info, configs, top_k=top_k)
+    
+    configs = _generate_unranked_configs(layer_info, max_configs, arch_config, alignment, surrogate)
+    if arch_config is not None:
+        configs, _ = filter_feasible_configs(layer_info, configs, arch_config)
+    return configs
+
+def _generate_unranked_configs(layer_info, max_configs, arch_config=None, alignment=None, surrogate=None):
+    """Generate all or a sample of max_configs tiling configurations for a layer."""
     if max_configs is None or max_configs < 0:
-        return generate_all_tiling_configs(layer_info)
+        return generate_all_tiling_configs(layer_info, arch_config, alignment)
     
     dimensions = layer_info["dimensions"]
     configs = []
     
     # generates factors for each dimension
-    factor_dict = {}
-    for dim, size in dimensions.items():
-        factor_dict[dim] = get_factors(size)
+    factor_dict = get_dimension_factors(layer_info, arch_config, alignment)
     
     # Prioritize dimensions to optimize - use current tile splits as a hint
     current_splits = layer_info.get("current_tile_splits", {})
@@ -87,13 +519,14 @@ def generate_tiling_configs(layer_info, max_configs=None):
         # If too many configurations, sample strategically
         if total_configs > max_configs:
             configs = sample_tiling_configs(dimensions, dims_to_optimize, factor_dict, 
-                                           current_splits, max_configs)
+                                           current_splits, max_configs,
+                                           surrogate=surrogate, layer_info=layer_info)
         else:
             # If reasonable number of configurations, generate all combinations
             configs = generate_all_combinations(dimensions, dims_to_optimize, dimension_factors)
     else:
         # If no dimensions to optimize, just use default configuration
-        configs.append({dim: 1 for dim in dimensions.keys()})
+        configs.append(TilingConfig(tuple(dimensions.keys()), (1,) * len(dimensions)))
     
     return configs
 
@@ -135,7 +568,8 @@ def select_dimensions_to_optimize(dimensions, tiled_dims, max_dims=3):
                 
     return dims_to_optimize
 
-def sample_tiling_configs(dimensions, dims_to_optimize, factor_dict, current_splits, max_configs):
+def sample_tiling_configs(dimensions, dims_to_optimize, factor_dict, current_splits, max_configs,
+                          surrogate=None, layer_info=None):
     """
     Sample a representative set of tiling configurations.
     
@@ -145,30 +579,38 @@ def sample_tiling_configs(dimensions, dims_to_optimize, factor_dict, current_spl
         factor_dict: Dictionary mapping dimensions to their factors
         current_splits: Dictionary of current tile splits
         max_configs: Maximum number of configurations to generate
+        surrogate: Optional SurrogateModel that picks the remaining configurations
+        layer_info: Layer information the surrogate predicts for
         
     Returns:
-        List of tiling configurations
+        List of tiling configurations as TilingConfigs
     """
     import random
     logger.info(f"Sampling {max_configs} tiling configurations")
     configs = []
+    # The same configurations again, for constant-time duplicate checks
+    dims = tuple(dimensions.keys())
+    seen = set()
+    
+    def add(config):
+        config = TilingConfig.from_dict(config, dims)
+        if config not in seen:
+            seen.add(config)
+            configs.append(config)
     
     # Always include the current configuration
     current_config = {dim: current_splits.get(dim, 1) for dim in dimensions.keys()}
-    configs.append(current_config)
+    add(current_config)
     
     # Include a configuration with all splits set to 1 (baseline)
-    default_config = {dim: 1 for dim in dimensions.keys()}
-    if default_config != current_config:
-        configs.append(default_config)
+    add({dim: 1 for dim in dimensions.keys()})
     
     # Add configurations with max tiling for each dimension
     for dim in dims_to_optimize:
         max_factor = max(factor_dict[dim])
         config = {d: 1 for d in dimensions.keys()}
         config[dim] = max_factor
-        if config not in configs:
-            configs.append(config)
+        add(config)
     
     # Add some configurations with median factors
     for dim in dims_to_optimize:
@@ -177,8 +619,15 @@ def sample_tiling_configs(dimensions, dims_to_optimize, factor_dict, current_spl
             median_factor = factors[len(factors) // 2]
             config = {d: 1 for d in dimensions.keys()}
             config[dim] = median_factor
-            if config not in configs:
-                configs.append(config)
+            add(config)
+    
+    # Let the surrogate pick the rest by predicted metric and uncertainty
+    if surrogate is not None and layer_info is not None and len(configs) < max_configs:
+        dimension_factors = [factor_dict[dim] for dim in dims_to_optimize]
+        pool = [config for config in generate_all_combinations(dimensions, dims_to_optimize, dimension_factors)
+                if config not in seen]
+        configs.extend(surrogate.select(layer_info, pool, max_configs - len(configs)))
+        return configs
     
     # If we still need more configurations, add random combinations
     attempts = 0
@@ -197,8 +646,7 @@ def sample_tiling_configs(dimensions, dims_to_optimize, factor_dict, current_spl
             config[dim] = random.choice(factors)
         
         # Only add if unique
-        if config not in configs:
-            configs.append(config)
+        add(config)
             
     return configs
 
@@ -212,12 +660,14 @@ def generate_all_combinations(dimensions, dims_to_optimize, dimension_factors):
         dimension_factors: List of factors for each dimension to optimize
         
     Returns:
-        List of tiling configurations
+        List of tiling configurations as TilingConfigs
     """
+    dims = tuple(dimensions.keys())
+    positions = [dims.index(dim) for dim in dims_to_optimize]
     configs = []
     for splits in itertools.product(*dimension_factors):
-        config = {dim: 1 for dim in dimensions.keys()}
-        for idx, dim in enumerate(dims_to_optimize):
-            config[dim] = splits[idx]
-        configs.append(config)
+        config = [1] * len(dims)
+        for position, split in zip(positions, splits):
+            config[position] = split
+        configs.append(TilingConfig(dims, tuple(config)))
     return configs
\ No newline at end of file
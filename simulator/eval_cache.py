@@ -0,0 +1,163 @@
+import os
+import glob
+import json
+import hashlib
+import threading
+from utils.logging_utils import setup_logging
+
+logger = setup_logging("genesys_optimizer.eval_cache")
+
+# Instruction streams the simulator executes, in order of preference
+INSTRUCTION_FILE_PATTERNS = ["*_binary.txt", "*_string_final.txt"]
+
+class EvaluationCache:
+    """
+    Caches simulator metrics keyed by the instructions a layer compiles to.
+
+    The simulated cycles of a layer only depend on its instruction stream and
+    the architecture config, so candidates that compile to byte-identical
+    codelets (size-1 dims, splits the compiler normalises away) share one
+    simulation.
+
+    New entries are appended to a JSONL log as they are stored; close() compacts
+    the log into the JSON cache file.
+    """
+
+    def __init__(self, model_name, cache_dir="layer_cache"):
+        """
+        Initialize the cache.
+
+        Args:
+            model_name: Name of the model
+            cache_dir: Directory to store cache files
+        """
+        self.cache_file = os.path.join(cache_dir, f"{model_name}_eval_cache.json")
+        self.log_file = os.path.join(cache_dir, f"{model_name}_eval_cache.jsonl")
+        self.cache_dir = cache_dir
+        self.cache = {}
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        # Guards the log file, so lookups don't wait for disk writes
+        self.log_lock = threading.Lock()
+        self.log = None
+
+        os.makedirs(cache_dir, exist_ok=True)
+        if os.path.exists(self.cache_file):
+            try:
+                with open(self.cache_file, 'r') as f:
+                    self.cache = json.load(f)
+            except (json.JSONDecodeError, IOError) as e:
+                logger.warning(f"Failed to load evaluation cache ({self.cache_file}): {str(e)}")
+        self._load_log()
+        logger.info(f"Evaluation cache initialized with {len(self.cache)} entries")
+
+    def _load_log(self):
+        """Add the entries appended since the last compaction."""
+        if not os.path.exists(self.log_file):
+            return
+        try:
+            with open(self.log_file, 'r') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # An entry torn by an interrupted write
+                        continue
+                    self.cache[entry["key"]] = entry["metrics"]
+        except IOError as e:
+            logger.warning(f"Failed to load evaluation cache log ({self.log_file}): {str(e)}")
+
+    def _append(self, key, metrics):
+        """Append an entry to the log."""
+        with self.log_lock:
+            try:
+                if self.log is None:
+                    self.log = open(self.log_file, 'a')
+                    # Start on a fresh line after an entry torn by an interrupted write
+                    if self.log.tell() > 0:
+                        with open(self.log_file, 'rb') as f:
+                            f.seek(-1, os.SEEK_END)
+                            if f.read(1) != b"\n":
+                                self.log.write("\n")
+                self.log.write(json.dumps({"key": key, "metrics": metrics}) + "\n")
+                self.log.flush()
+            except (IOError, OSError) as e:
+                logger.error(f"Failed to append to evaluation cache log {self.log_file}: {str(e)}")
+
+    def _save(self):
+        """Save the cache atomically. Callers hold the lock."""
+        temp_file = f"{self.cache_file}.tmp"
+        try:
+            with open(temp_file, 'w') as f:
+                json.dump(self.cache, f, indent=2)
+            os.replace(temp_file, self.cache_file)
+            return True
+        except (IOError, OSError) as e:
+            logger.error(f"Failed to save evaluation cache to {self.cache_file}: {str(e)}")
+            return False
+
+    def compute_key(self, output_dir, layer_name, metric_column=None):
+        """
+        Hash a layer's instruction stream together with the architecture config.
+
+        Args:
+            output_dir: Compiler output directory
+            layer_name: Name of the layer directory
+            metric_column: Metric the result is extracted for (None for all metrics)
+
+        Returns:
+            Hex digest, or None if the layer has no instruction file
+        """
+        layer_dir = os.path.join(output_dir, layer_name)
+        instruction_files = []
+        for pattern in INSTRUCTION_FILE_PATTERNS:
+            instruction_files = sorted(glob.glob(os.path.join(layer_dir, pattern)))
+            if instruction_files:
+                break
+        if not instruction_files:
+            return None
+
+        digest = hashlib.sha256()
+        for path in instruction_files + sorted(glob.glob(os.path.join(output_dir, "*_arch_cfg*.json"))):
+            digest.update(os.path.basename(path).encode())
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+        digest.update(str(metric_column).encode())
+        return digest.hexdigest()
+
+    def get(self, key):
+        """
+        Get the metrics stored for an instruction stream.
+
+        Returns:
+            Metrics or None if not found
+        """
+        with self.lock:
+            if key in self.cache:
+                self.hits += 1
+                return self.cache[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, metrics):
+        """Store the metrics of an instruction stream."""
+        with self.lock:
+            self.cache[key] = metrics
+        self._append(key, metrics)
+
+    def close(self):
+        """Compact the log into the cache file."""
+        with self.log_lock:
+            if self.log is not None:
+                self.log.close()
+                self.log = None
+            with self.lock:
+                # The log is only dropped once the cache file holds its entries
+                if os.path.exists(self.log_file) and self._save():
+                    os.remove(self.log_file)
+
+    def get_stats(self):
+        """Get hit/miss counts of this run."""
+        with self.lock:
+            return {"entries": len(self.cache), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,221 @@
+"""
+Pool of long-lived simulator worker processes.
+
+Each worker imports genesys_sim once when it starts, so a simulation no longer
+pays for interpreter startup and imports on every candidate. The simulator's
+entry point only takes paths, so every job still runs its __main__ and parses
+the configs again.
+"""
+
+import os
+import sys
+import runpy
+import shutil
+import tempfile
+import warnings
+import importlib
+import threading
+import multiprocessing
+from utils.logging_utils import setup_logging
+from simulator.simulator import SIMULATOR_MODULE, parse_run_output
+
+logger = setup_logging("genesys_optimizer.sim_pool")
+
+# Per-process state of a pool worker, set up by _init_worker
+_worker_state = {"error": None}
+
+def _init_worker(sim_path):
+    """Import the simulator once in a freshly started worker process."""
+    # Changing directory is safe here - the worker is its own process, and the
+    # simulator resolves its "configs/" argument relative to its own directory
+    os.chdir(sim_path)
+    if sim_path not in sys.path:
+        sys.path.insert(0, sim_path)
+
+    try:
+        importlib.import_module(SIMULATOR_MODULE)
+    except Exception as e:
+        # Don't raise - a failing initializer makes the pool respawn workers forever
+        _worker_state["error"] = f"Failed to import {SIMULATOR_MODULE}: {str(e)}"
+
+def _simulate_job(full_output_dir, layer_names, metric_column=None):
+    """
+    Run one simulation inside a warm worker and parse the metrics of the requested layers.
+
+    Returns:
+        Dictionary with "status" ("ok" or "error") and either "metrics" or "error"
+    """
+    if _worker_state["error"]:
+        return {"status": "error", "error": _worker_state["error"], "unavailable": True}
+
+    model_name = os.path.basename(full_output_dir)
+    run_dir = tempfile.mkdtemp(prefix=f"{model_name}_sim_")
+    output_csv = os.path.join(run_dir, f"{model_name}_simulation_results.csv")
+
+    saved_argv = sys.argv
+    try:
+        sys.argv = [SIMULATOR_MODULE, "configs/", full_output_dir, "--mode", "perf", "--log_path", output_csv]
+        try:
+            with warnings.catch_warnings():
+                # The module is already imported, which is the point of the pool
+                warnings.simplefilter("ignore", RuntimeWarning)
+                runpy.run_module(SIMULATOR_MODULE, run_name="__main__", alter_sys=False)
+        except SystemExit as e:
+            if e.code not in (None, 0):
+                return {"status": "error", "error": f"Simulator exited with code {e.code}"}
+        except Exception as e:
+            return {"status": "error", "error": f"Simulator raised {type(e).__name__}: {str(e)}"}
+        finally:
+            sys.argv = saved_argv
+
+        if not os.path.exists(output_csv):
+            return {"status": "error", "error": f"Simulator output CSV file not found: {output_csv}"}
+
+        layer_metrics = parse_run_output(output_csv, run_dir, full_output_dir, layer_names, metric_column)
+        return {"status": "ok", "metrics": layer_metrics}
+    finally:
+        shutil.rmtree(run_dir, ignore_errors=True)
+
+class SimulatorPool:
+    """
+    Keeps a pool of worker processes with genesys_sim already imported.
+
+    Jobs are submitted as (output_dir, layers) and come back as metrics
+    dictionaries. If the simulator can't be imported in the workers the pool
+    marks itself unavailable so callers can fall back to the subprocess path.
+    A job that times out keeps its worker busy, so the worker processes are
+    then replaced; jobs that were running next to it are submitted again.
+    """
+
+    def __init__(self, sim_path, num_workers=None, timeout=90, max_jobs_per_worker=None):
+        """
+        Initialize the pool and start the workers.
+
+        Args:
+            sim_path: Path to the simulator directory
+            num_workers: Number of worker processes (None = CPU count)
+            timeout: Maximum seconds to wait for a single simulation
+            max_jobs_per_worker: Restart a worker after this many jobs (None = never)
+        """
+        self.sim_path = os.path.abspath(sim_path)
+        self.num_workers = num_workers or os.cpu_count() or 4
+        self.timeout = timeout
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.available = True
+        # Spawn rather than fork - the optimizer is multi-threaded by the time jobs run
+        self.context = multiprocessing.get_context("spawn")
+        self.lock = threading.Lock()
+        # Completion events of the jobs in flight on the current pool
+        self.jobs = set()
+
+        self.pool = self._start_pool()
+        logger.info(f"Started simulator pool with {self.num_workers} workers for {self.sim_path}")
+
+    def _start_pool(self):
+        return self.context.Pool(
+            processes=self.num_workers,
+            initializer=_init_worker,
+            initargs=(self.sim_path,),
+            maxtasksperchild=self.max_jobs_per_worker
+        )
+
+    def _submit(self, args):
+        """Submit a job to the current pool, returning (pool, async result, completion event)."""
+        done = threading.Event()
+        with self.lock:
+            pool = self.pool
+            async_result = pool.apply_async(_simulate_job, args, callback=lambda _: done.set(),
+                                            error_callback=lambda _: done.set())
+            self.jobs.add(done)
+        return pool, async_result, done
+
+    def _recycle(self, pool):
+        """Replace a pool whose worker is stuck on a job, waking the jobs that ran on it."""
+        with self.lock:
+            if self.pool is not pool or not self.available:
+                # Another timed out job replaced it already, or the pool is closed
+                return
+            self.pool = self._start_pool()
+            stranded, self.jobs = self.jobs, set()
+        pool.terminate()
+        for done in stranded:
+            done.set()
+        logger.warning(f"Restarted the {self.num_workers} simulator pool workers")
+
+    def simulate_layers(self, output_dir, layer_names, metric_column=None):
+        """
+        Simulate a compiled output on a warm worker.
+
+        Args:
+            output_dir: Compiler output directory to simulate
+            layer_names: Names of the layers to extract metrics for
+            metric_column: Specific metric to extract (default: None returns all metrics)
+
+        Returns:
+            Dictionary mapping each layer name to its metrics, or None if the simulation failed
+        """
+        if not self.available:
+            return None
+
+        full_output_dir = os.path.abspath(output_dir)
+        args = (full_output_dir, list(layer_names), metric_column)
+        # A job is submitted again once if the workers are restarted under it
+        for _ in range(2):
+            pool, async_result, done = self._submit(args)
+            finished = done.wait(self.timeout)
+            with self.lock:
+                self.jobs.discard(done)
+            if not finished:
+                logger.error(f"Simulator pool timed out after {self.timeout}s for {full_output_dir}")
+                self._recycle(pool)
+                return None
+            if async_result.ready():
+                break
+            if not self.available:
+                logger.warning(f"Simulator pool closed during {full_output_dir}")
+                return None
+        else:
+            logger.error(f"Simulator pool workers were restarted twice during {full_output_dir}")
+            return None
+
+        try:
+            result = async_result.get()
+        except Exception as e:
+            logger.error(f"Simulator pool job failed for {full_output_dir}: {str(e)}")
+            return None
+
+        if result["status"] != "ok":
+            logger.warning(f"Simulator pool error for {full_output_dir}: {result['error']}")
+            if result.get("unavailable"):
+                logger.warning("Disabling simulator pool, falling back to simulator subprocesses")
+                self.available = False
+            return None
+
+        return result["metrics"]
+
+    def simulate(self, output_dir, layer_name, metric_column=None):
+        """Simulate a compiled output on a warm worker and get the metrics of a single layer."""
+        layer_metrics = self.simulate_layers(output_dir, [layer_name], metric_column)
+        if layer_metrics is None:
+            return None
+        return layer_metrics.get(layer_name)
+
+    def close(self):
+        """Stop the worker processes, killing them if jobs are still running."""
+        with self.lock:
+            self.available = False
+            outstanding, self.jobs = self.jobs, set()
+        if outstanding:
+            self.pool.terminate()
+            for done in outstanding:
+                done.set()
+        else:
+            self.pool.close()
+        self.pool.join()
+        logger.info("Simulator pool stopped")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -6,197 +6,291 @@ import logging
 import glob
 import subprocess
 import re
+import shutil
+import tempfile
 import threading
 from utils.logging_utils import setup_logging
+from compiler.model_compiler import read_output_manifest
 
 # Global semaphore to limit concurrent compilations/simulations
 # This helps prevent overwhelming the system
 MAX_CONCURRENT_RUNS = 4  # Adjust based on your system's capabilities
 compile_semaphore = threading.Semaphore(MAX_CONCURRENT_RUNS)
 
+def set_max_concurrent_runs(max_runs):
+    """Resize the limit on concurrent simulator runs, e.g. to match the simulate stage of the pipeline."""
+    global compile_semaphore
+    compile_semaphore = threading.Semaphore(max(1, max_runs))
+
+# Simulator entry point, run with the simulator directory as working directory
+SIMULATOR_MODULE = "genesys_sim.genesys"
+
 logger = setup_logging("genesys_optimizer.simulator")
 
-def check_output_readiness(full_output_dir, layer_name, timeout=60):
+def wait_for_output(full_output_dir, layer_names, timeout=60):
     """
-    Monitor output directory until it's ready for simulation or timeout occurs.
+    Wait until a compiler output directory is ready for simulation.
+    
+    Outputs written by compile_model carry a manifest that is only created
+    after the compiler process has exited, so they are ready as soon as the
+    manifest lists every requested layer. Outputs without a manifest are
+    accepted once every layer has its JSON file, re-checking until the timeout.
     
     Args:
         full_output_dir: Absolute path to output directory
-        layer_name: Name of the layer
+        layer_names: Names of the layers that need to be present
         timeout: Maximum seconds to wait
         
     Returns:
-        Boolean indicating if directory is ready
+        Seconds spent waiting, or None if the output did not become ready in time
     """
     start_time = time.time()
-    poll_interval = 0.5  # Start with 0.5 second between checks
+    poll_interval = 0.05
     
-    while (time.time() - start_time) < timeout:
-        if os.path.exists(full_output_dir):
-            # Check if directory is ready by verifying essential files exist
-            json_files = glob.glob(os.path.join(full_output_dir, layer_name, "*.json"))
-            
-            if json_files:
-                logger.info(f"Output directory ready for simulation: {full_output_dir}")
-                return True
-                
-        # Adaptive polling interval - increase over time but cap at 2 seconds
-        poll_interval = min(poll_interval * 1.2, 2.0)
+    while True:
+        manifest = read_output_manifest(full_output_dir)
+        if manifest is not None:
+            missing_layers = [name for name in layer_names if name not in manifest.get("layers", {})]
+            if not missing_layers:
+                return time.time() - start_time
+            logger.error(f"Compiled output {full_output_dir} is missing layers: {missing_layers[:5]}")
+            return None
+        
+        if os.path.exists(full_output_dir) and all(
+            glob.glob(os.path.join(full_output_dir, layer_name, "*.json")) for layer_name in layer_names
+        ):
+            return time.time() - start_time
+        
+        if (time.time() - start_time) >= timeout:
+            break
+        
+        # Only reached for outputs that were not produced by compile_model
         time.sleep(poll_interval)
+        poll_interval = min(poll_interval * 2, 1.0)
     
     logger.error(f"Timed out waiting for output directory: {full_output_dir}")
-    return False
+    if os.path.exists(full_output_dir):
+        # Log what's actually in the directory for debugging
+        for layer_name in layer_names:
+            layer_dir = os.path.join(full_output_dir, layer_name)
+            if os.path.exists(layer_dir):
+                logger.error(f"Layer directory contents: {os.listdir(layer_dir)}")
+            else:
+                logger.error(f"Layer directory does not exist: {layer_dir}")
+    return None
 
-def run_simulator(output_dir, layer_name, sim_path=None, metric_column=None, max_retries=2):
+def check_output_readiness(full_output_dir, layer_name, timeout=60):
+    """
+    Check whether an output directory is ready for simulation of a layer.
+    
+    Args:
+        full_output_dir: Absolute path to output directory
+        layer_name: Name of the layer
+        timeout: Maximum seconds to wait
+        
+    Returns:
+        Boolean indicating if directory is ready
+    """
+    return wait_for_output(full_output_dir, [layer_name], timeout) is not None
+
+def run_simulator(output_dir, layer_name, sim_path=None, metric_column=None, max_retries=2, output_timeout=60,
+                  sim_pool=None, eval_cache=None, timings=None):
     """Run the simulator on a compiled layer and get performance metrics."""
-    # Use the semaphore to limit concurrent operations
-    with compile_semaphore:
-        # Save current directory
-        current_dir = os.getcwd()
+    layer_metrics = run_simulator_layers(output_dir, [layer_name], sim_path, metric_column, max_retries,
+                                         output_timeout, sim_pool, eval_cache, timings)
+    if layer_metrics is None:
+        return None
+    return layer_metrics.get(layer_name)
 
-        if not sim_path:
-            logger.error("Simulator path not provided")
-            return None
-        
-        if not os.path.isabs(output_dir):
-            full_output_dir = os.path.abspath(os.path.join(current_dir, output_dir))
-        else:
-            full_output_dir = output_dir
-        
-        # Initial delay before checking for directory
-        initial_delay = 5.0  # seconds
-        logger.info(f"Waiting {initial_delay} seconds before checking for output directory")
-        time.sleep(initial_delay)
+def run_simulator_layers(output_dir, layer_names, sim_path=None, metric_column=None, max_retries=2,
+                         output_timeout=60, sim_pool=None, eval_cache=None, timings=None):
+    """
+    Run the simulator once on a compiled model and get performance metrics for several layers.
+    
+    Args:
+        output_dir: Compiler output directory to simulate
+        layer_names: Names of the layers to extract metrics for
+        sim_path: Path to the simulator
+        metric_column: Specific metric to extract (default: None returns all metrics)
+        max_retries: Maximum number of simulator attempts
+        output_timeout: Maximum seconds to wait for the compiled output to be ready
+        sim_pool: Optional SimulatorPool of warm workers to run the simulation on
+        eval_cache: Optional EvaluationCache to reuse metrics of identical instruction streams
+        timings: Optional dictionary that receives the seconds spent waiting for the output
+            to be ready as "wait_time"
         
-        # Improved exponential backoff for directory readiness
-        max_attempts = 15
-        wait_time = 2.0
-        total_wait_time = initial_delay
+    Returns:
+        Dictionary mapping each layer name to its metrics (None for layers without metrics),
+        or None if the simulator could not be run
+    """
+    if not sim_path:
+        logger.error("Simulator path not provided")
+        return None
+    
+    sim_path = os.path.abspath(sim_path)
+    full_output_dir = os.path.abspath(output_dir)
+    
+    # The compiler has already exited by the time we get here, so this
+    # normally returns immediately via the output manifest
+    wait_time = wait_for_output(full_output_dir, layer_names, timeout=output_timeout)
+    if wait_time is None:
+        return None
+    logger.info(f"Output ready for {os.path.basename(full_output_dir)} after waiting {wait_time:.3f}s")
+    if timings is not None:
+        timings["wait_time"] = wait_time
+    
+    if eval_cache is None:
+        return simulate_output(full_output_dir, layer_names, sim_path, metric_column, max_retries, sim_pool)
+    
+    # Layers whose instructions were simulated before don't need the simulator
+    layer_keys, cached_metrics = lookup_cached_metrics(eval_cache, full_output_dir, layer_names, metric_column)
+    pending_layers = [layer_name for layer_name in layer_names if layer_name not in cached_metrics]
+    if not pending_layers:
+        logger.info(f"Reusing cached metrics for all layers of {os.path.basename(full_output_dir)}, skipping simulation")
+        return cached_metrics
+    
+    layer_metrics = simulate_output(full_output_dir, pending_layers, sim_path, metric_column, max_retries, sim_pool)
+    if layer_metrics is None:
+        return None
+    
+    store_cached_metrics(eval_cache, layer_keys, layer_metrics)
+    layer_metrics.update(cached_metrics)
+    return layer_metrics
+
+def lookup_cached_metrics(eval_cache, full_output_dir, layer_names, metric_column=None):
+    """
+    Look the layers of a compiled output up in an evaluation cache.
+    
+    Returns:
+        Tuple of (layer name -> cache key, layer name -> cached metrics for the hits)
+    """
+    layer_keys = {layer_name: eval_cache.compute_key(full_output_dir, layer_name, metric_column)
+                  for layer_name in layer_names}
+    cached_metrics = {}
+    for layer_name, key in layer_keys.items():
+        metrics = eval_cache.get(key) if key else None
+        if metrics is not None:
+            cached_metrics[layer_name] = metrics
+    return layer_keys, cached_metrics
+
+def store_cached_metrics(eval_cache, layer_keys, layer_metrics):
+    """Store freshly simulated layer metrics in an evaluation cache."""
+    for layer_name, metrics in layer_metrics.items():
+        if layer_keys.get(layer_name) and metrics is not None:
+            eval_cache.put(layer_keys[layer_name], metrics)
+
+def parse_run_output(output_csv, run_dir, full_output_dir, layer_names, metric_column=None):
+    """
+    Parse the metrics of several layers from one simulator run.
+    
+    Returns:
+        Dictionary mapping each layer name to its metrics (None for layers without metrics)
+    """
+    layer_metrics = {}
+    for layer_name in layer_names:
+        metrics = parse_simulator_output(output_csv, layer_name, metric_column)
         
-        for attempt in range(max_attempts):
-            if os.path.exists(full_output_dir):
-                # More thorough verification of directory readiness
-                layer_dir = os.path.join(full_output_dir, layer_name)
-                if os.path.exists(layer_dir):
-                    # Check if the directory actually has content - ONLY check for layer JSON files
-                    json_files = glob.glob(os.path.join(layer_dir, "*.json"))
-                    
-                    if json_files:
-                        logger.info(f"Layer directory is ready with {len(json_files)} JSON files after {total_wait_time:.1f}s")
-                        break
-                    else:
-                        logger.info(f"Layer directory exists but missing required JSON files")
-            
-            # Wait with exponential backoff
-            logger.info(f"Waiting for output directory (attempt {attempt+1}/{max_attempts}): {full_output_dir}")
-            time.sleep(wait_time)
-            total_wait_time += wait_time
-            wait_time = min(wait_time * 1.5, 10.0)
-            
-            if attempt == max_attempts - 1:
-                logger.error(f"Output directory not ready after {max_attempts} attempts ({total_wait_time:.1f}s total): {full_output_dir}")
-                if os.path.exists(full_output_dir):
-                    # Log what's actually in the directory for debugging
-                    layer_dir = os.path.join(full_output_dir, layer_name)
-                    logger.error(f"Layer directory exists: {os.path.exists(layer_dir)}")
-                    if os.path.exists(layer_dir):
-                        files = os.listdir(layer_dir)
-                        logger.error(f"Layer directory contents: {files}")
-                return None
+        # Also look for layer-specific output files if standard parsing fails
+        if metrics is None:
+            layer_output_files = find_layer_output_files(run_dir, full_output_dir, layer_name)
+            if layer_output_files:
+                logger.info(f"Trying to parse metrics from layer-specific output files")
+                metrics = parse_layer_output_files(layer_output_files, layer_name, metric_column)
         
-        # Create a unique output filename with unique timestamp to avoid collisions
+        layer_metrics[layer_name] = metrics
+    return layer_metrics
+
+def simulate_output(full_output_dir, layer_names, sim_path, metric_column=None, max_retries=2, sim_pool=None):
+    """
+    Simulate a ready compiler output and parse the metrics of several layers.
+    
+    Returns:
+        Dictionary mapping each layer name to its metrics, or None if the simulator could not be run
+    """
+    # Prefer the warm worker pool, falling back to a fresh simulator process
+    if sim_pool is not None and sim_pool.available:
+        layer_metrics = sim_pool.simulate_layers(full_output_dir, layer_names, metric_column)
+        if layer_metrics is not None:
+            return layer_metrics
+        logger.warning(f"Simulator pool failed for {full_output_dir}, falling back to a simulator subprocess")
+    
+    # Use the semaphore to limit concurrent operations
+    with compile_semaphore:
+        # Every run logs into its own private directory, so concurrent runs never
+        # share (or pick up each other's) result files in the simulator directory
         model_name = os.path.basename(full_output_dir)
-        timestamp = int(time.time() * 1000)  # Milliseconds for uniqueness
-        output_file = f"{model_name}_{timestamp}_simulation_results.csv"
+        run_dir = tempfile.mkdtemp(prefix=f"{model_name}_sim_")
+        output_csv = os.path.join(run_dir, f"{model_name}_simulation_results.csv")
         
         # Construct the simulator command - the "configs/" reference here is part of the simulator's 
-        # command line interface, not necessarily a directory that needs to exist in our output folder
+        # command line interface and is resolved relative to the simulator directory
         cmd = [
             "python3", 
             "-m", 
-            "genesys_sim.genesys", 
+            SIMULATOR_MODULE, 
             "configs/", 
             full_output_dir, 
             "--mode", 
             "perf", 
             "--log_path", 
-            output_file
+            output_csv
         ]
 
-        for attempt in range(max_retries):
-            try:
-                # Change to simulator directory first
-                os.chdir(sim_path)
-                logger.info(f"Running simulator (attempt {attempt + 1}/{max_retries}) from {sim_path}: {' '.join(cmd)}")
-                
-                # Run the simulator with timeout
-                result = subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=90)  # Increased timeout
-                
-                # Output CSV is in the simulator directory
-                output_csv = os.path.join(sim_path, output_file)
-
-                os.chdir(current_dir)
-
-                if not os.path.exists(output_csv):
-                    logger.warning(f"Simulator output CSV file not found: {output_csv} (attempt {attempt +1})")
+        try:
+            for attempt in range(max_retries):
+                try:
+                    logger.info(f"Running simulator (attempt {attempt + 1}/{max_retries}) from {sim_path}: {' '.join(cmd)}")
                     
-                    # Try to find any output file that might have been generated
-                    potential_files = glob.glob(os.path.join(sim_path, f"{model_name}*_simulation_results.csv"))
-                    if potential_files:
-                        latest_file = max(potential_files, key=os.path.getmtime)
-                        logger.info(f"Found alternative output file: {latest_file}")
-                        output_csv = latest_file
-                    else:
-                        if attempt < max_retries - 1:
-                            wait_time = 2 ** attempt
-                            logger.info(f"Retrying in {wait_time} seconds...")
-                            time.sleep(wait_time)
-                            continue
-                        else:
-                            logger.error(f"Failed to run the simulator after {max_retries} attempts.")
-                            return None
+                    # Run the simulator from its own directory without touching our working directory
+                    result = subprocess.run(cmd, cwd=sim_path, check=True, stdout=subprocess.PIPE,
+                                            stderr=subprocess.PIPE, timeout=90)  # Increased timeout
+
+                    if not os.path.exists(output_csv):
+                        logger.warning(f"Simulator output CSV file not found: {output_csv} (attempt {attempt +1})")
                         
-                # Parse the results
-                metrics = parse_simulator_output(output_csv, layer_name, metric_column)
-                
-                # Also look for layer-specific output files if standard parsing fails
-                if metrics is None:
-                    layer_output_files = find_layer_output_files(sim_path, full_output_dir, layer_name)
-                    if layer_output_files:
-                        logger.info(f"Trying to parse metrics from layer-specific output files")
-                        metrics = parse_layer_output_files(layer_output_files, layer_name, metric_column)
-                
-                # Clean up the output file to avoid cluttering the simulator directory
-                try:
-                    os.remove(output_csv)
-                except:
-                    pass
+                        # Try to find any output file that might have been generated in this run's directory
+                        potential_files = glob.glob(os.path.join(run_dir, "*.csv"))
+                        if potential_files:
+                            latest_file = max(potential_files, key=os.path.getmtime)
+                            logger.info(f"Found alternative output file: {latest_file}")
+                            output_csv = latest_file
+                        else:
+                            if attempt < max_retries - 1:
+                                wait_time = 2 ** attempt
+                                logger.info(f"Retrying in {wait_time} seconds...")
+                                time.sleep(wait_time)
+                                continue
+                            else:
+                                logger.error(f"Failed to run the simulator after {max_retries} attempts.")
+                                return None
                     
-                return metrics
-                
-            except (subprocess.CalledProcessError, FileNotFoundError, IOError, subprocess.TimeoutExpired) as e:
-                os.chdir(current_dir)
-                
-                logger.warning(f"Simulator attempt {attempt+1} failed: {str(e)}")
-                if hasattr(e, 'stderr') and e.stderr:
-                    logger.warning(f"Simulator error output: {e.stderr.decode()}")
+                    # Parse the results - every layer's row comes from the same CSV
+                    return parse_run_output(output_csv, run_dir, full_output_dir, layer_names, metric_column)
                     
-                if attempt < max_retries - 1:
-                    wait_time = 2 ** attempt
-                    logger.info(f"Waiting {wait_time} seconds before retry...")
-                    time.sleep(wait_time)
-                else:
-                    logger.error("All simulator attempts failed")
-                    return None
+                except (subprocess.CalledProcessError, FileNotFoundError, IOError, subprocess.TimeoutExpired) as e:
+                    logger.warning(f"Simulator attempt {attempt+1} failed: {str(e)}")
+                    if hasattr(e, 'stderr') and e.stderr:
+                        logger.warning(f"Simulator error output: {e.stderr.decode()}")
+                        
+                    if attempt < max_retries - 1:
+                        wait_time = 2 ** attempt
+                        logger.info(f"Waiting {wait_time} seconds before retry...")
+                        time.sleep(wait_time)
+                    else:
+                        logger.error("All simulator attempts failed")
+                        return None
+        finally:
+            # Clean up this run's log directory
+            shutil.rmtree(run_dir, ignore_errors=True)
                     
         return None
 
-def find_layer_output_files(sim_path, output_dir, layer_name):
+def find_layer_output_files(run_dir, output_dir, layer_name):
     """
     Search for any output files that might contain metrics for the specific layer.
     
     Args:
-        sim_path: Path to the simulator
+        run_dir: Private log directory of the simulator run
         output_dir: Output directory for compilation results
         layer_name: Name of the layer
         
@@ -205,8 +299,8 @@ def find_layer_output_files(sim_path, output_dir, layer_name):
     """
     potential_files = []
     
-    # Look for CSV files in the simulator directory
-    csv_files = glob.glob(os.path.join(sim_path, "*.csv"))
+    # Look for CSV files in the run's log directory
+    csv_files = glob.glob(os.path.join(run_dir, "*.csv"))
     for file in csv_files:
         if "_simulation_results" in file:
             potential_files.append(file)
@@ -0,0 +1,135 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch, MagicMock
+from compiler.model_compiler import compile_model, read_output_manifest
+from compiler.artifact_store import ArtifactStore
+
+class TestArtifactStore(unittest.TestCase):
+    """Test the content-addressed compile artifact store."""
+
+    def setUp(self):
+        """Set up a model, a config and an output directory."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.model_path = os.path.join(self.temp_dir, "resnet50.onnx")
+        with open(self.model_path, 'wb') as f:
+            f.write(b"model")
+        self.config_path = os.path.join(self.temp_dir, "benchmark_16_config.json")
+        with open(self.config_path, 'w') as f:
+            f.write("{}")
+        self.output_dir = os.path.join(self.temp_dir, "genesys_compiler_output")
+        self.store = ArtifactStore(os.path.join(self.temp_dir, "artifacts"))
+
+    def tearDown(self):
+        """Clean up temporary files."""
+        shutil.rmtree(self.temp_dir)
+
+    def fake_compile(self, cmd, **kwargs):
+        """Write a compiler output directory for the experiment in cmd."""
+        exp_name = cmd[cmd.index("-e") + 1]
+        layer_dir = os.path.join(self.output_dir, f"resnet50_genesys16x16_{exp_name}", "layer0_conv_bias1")
+        os.makedirs(layer_dir, exist_ok=True)
+        with open(os.path.join(layer_dir, "conv_bias1_json.json"), 'w') as f:
+            f.write("{}")
+        return MagicMock(stdout="")
+
+    def test_compute_key(self):
+        """Test that the key depends on the tiling and the model contents."""
+        tiling = {"conv_bias_1": {"1": {"OC": 2}}}
+        key = self.store.compute_key(self.model_path, self.config_path, tiling)
+        self.assertEqual(key, self.store.compute_key(self.model_path, self.config_path, dict(tiling)))
+        self.assertNotEqual(key, self.store.compute_key(self.model_path, self.config_path, {}))
+
+        with open(self.model_path, 'wb') as f:
+            f.write(b"another model")
+        os.utime(self.model_path, ns=(0, 0))
+        self.assertNotEqual(key, self.store.compute_key(self.model_path, self.config_path, tiling))
+
+    @patch('compiler.model_compiler.subprocess.run')
+    def test_compile_model_lookup_or_build(self, mock_run):
+        """Test that an identical compile is restored from the store instead of compiled."""
+        mock_run.side_effect = self.fake_compile
+        tiling = {"conv_bias_1": {"1": {"OC": 2}}}
+
+        self.assertTrue(compile_model(self.model_path, self.config_path, "test_0", tiling,
+                                      output_dir=self.output_dir, artifact_store=self.store))
+        self.assertTrue(compile_model(self.model_path, self.config_path, "test_1", tiling,
+                                      output_dir=self.output_dir, artifact_store=self.store))
+        self.assertEqual(mock_run.call_count, 1)
+
+        restored_dir = os.path.join(self.output_dir, "resnet50_genesys16x16_test_1")
+        self.assertTrue(os.path.exists(os.path.join(restored_dir, "layer0_conv_bias1", "conv_bias1_json.json")))
+        self.assertEqual(read_output_manifest(restored_dir)["experiment_name"], "test_1")
+
+        # A new store over the same directory still hits
+        store = ArtifactStore(self.store.store_dir)
+        self.assertTrue(compile_model(self.model_path, self.config_path, "test_2", tiling,
+                                      output_dir=self.output_dir, artifact_store=store))
+        self.assertEqual(mock_run.call_count, 1)
+
+    def test_lru_eviction(self):
+        """Test that the least recently used artifact is evicted when over budget."""
+        store = ArtifactStore(os.path.join(self.temp_dir, "small"), max_bytes=250)
+        for i in range(3):
+            source_dir = os.path.join(self.temp_dir, f"output_{i}")
+            os.makedirs(source_dir)
+            with open(os.path.join(source_dir, "data.bin"), 'wb') as f:
+                f.write(b"x" * 100)
+            store.put(f"key{i}", source_dir)
+            if i == 1:
+                # Touch the first artifact so the second one is the oldest
+                self.assertTrue(store.fetch("key0", os.path.join(self.temp_dir, "restored"), "restored"))
+
+        self.assertEqual(set(store.index), {"key0", "key2"})
+        self.assertFalse(os.path.exists(os.path.join(store.objects_dir, "key1")))
+        self.assertLessEqual(store.total_bytes(), 250)
+
+    def test_fetch_pins_artifact(self):
+        """Test that an artifact being copied out by a hit isn't evicted by a concurrent put."""
+        store = ArtifactStore(os.path.join(self.temp_dir, "small"), max_bytes=150)
+        for i in range(2):
+            source_dir = os.path.join(self.temp_dir, f"output_{i}")
+            os.makedirs(source_dir)
+            with open(os.path.join(source_dir, "data.bin"), 'wb') as f:
+                f.write(b"x" * 100)
+        store.put("key0", os.path.join(self.temp_dir, "output_0"))
+
+        restored = os.path.join(self.temp_dir, "restored")
+        copytree = shutil.copytree
+
+        def copy_during_put(src, dst, **kwargs):
+            if dst == restored:
+                # Another worker stores an artifact that puts the store over budget mid-copy
+                store.put("key1", os.path.join(self.temp_dir, "output_1"))
+            return copytree(src, dst, **kwargs)
+
+        with patch("compiler.artifact_store.shutil.copytree", side_effect=copy_during_put):
+            self.assertTrue(store.fetch("key0", restored, "restored"))
+        self.assertIn("key0", store.index)
+        with open(os.path.join(restored, "data.bin"), 'rb') as f:
+            self.assertEqual(len(f.read()), 100)
+        self.assertFalse(store.in_use)
+
+    def test_hits_persist_at_close(self):
+        """Test that hits don't rewrite the index until the store is closed."""
+        source_dir = os.path.join(self.temp_dir, "output")
+        os.makedirs(source_dir)
+        with open(os.path.join(source_dir, "data.bin"), 'wb') as f:
+            f.write(b"x")
+        self.store.put("key0", source_dir)
+        stored = ArtifactStore(self.store.store_dir).index["key0"]["last_used"]
+
+        with patch.object(self.store, '_save_index', wraps=self.store._save_index) as save_index:
+            for i in range(3):
+                self.assertTrue(self.store.fetch("key0", os.path.join(self.temp_dir, "restored"), f"hit_{i}"))
+            save_index.assert_not_called()
+        self.assertEqual(ArtifactStore(self.store.store_dir).index["key0"]["last_used"], stored)
+
+        self.store.close()
+        self.assertEqual(ArtifactStore(self.store.store_dir).index["key0"]["last_used"],
+                         self.store.index["key0"]["last_used"])
+        self.assertFalse(self.store.dirty)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,163 @@
+import os
+import sys
+import json
+import shutil
+import asyncio
+import tempfile
+import unittest
+from optimizer.async_engine import AsyncEvaluationEngine, optimize_layers_async, run_process
+
+# Stand-in for compile-genesys: the first argument is the output directory, and
+# the "cycles" of the layer are the sum of its tile splits
+FAKE_COMPILER = '''
+import os
+import sys
+import json
+
+output_dir = sys.argv[1]
+args = sys.argv[2:]
+model_name = os.path.basename(args[args.index("-m") + 1]).split(".")[0]
+exp_name = args[args.index("-e") + 1]
+with open(args[args.index("-t") + 1]) as f:
+    tiling = json.load(f)
+
+layer_dir = os.path.join(output_dir, f"{model_name}_genesys16x16_{exp_name}", "layer0_conv_bias1")
+os.makedirs(layer_dir, exist_ok=True)
+with open(os.path.join(layer_dir, "cycles.txt"), "w") as f:
+    f.write(str(sum(tiling["conv_bias_1"]["1"].values()) * 100))
+'''
+
+FAKE_SIMULATOR = '''
+import os
+import sys
+
+def main():
+    output_dir = sys.argv[2]
+    log_path = sys.argv[sys.argv.index("--log_path") + 1]
+    with open(log_path, "w") as f:
+        f.write("layerName,layerType,totCycles,totTime(us)\\n")
+        for layer in sorted(os.listdir(output_dir)):
+            cycles_file = os.path.join(output_dir, layer, "cycles.txt")
+            if os.path.exists(cycles_file):
+                cycles = int(open(cycles_file).read())
+                f.write(f"{layer},systolic,{cycles},{cycles / 1000}\\n")
+
+if __name__ == "__main__":
+    main()
+'''
+
+class TestAsyncEngine(unittest.TestCase):
+    """Test the asyncio compile/simulate engine with stand-in executables."""
+
+    def setUp(self):
+        """Set up a fake compiler, a fake simulator and a model."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.output_dir = os.path.join(self.temp_dir, "genesys_compiler_output")
+        self.compiler_script = os.path.join(self.temp_dir, "fake_compile.py")
+        with open(self.compiler_script, 'w') as f:
+            f.write(FAKE_COMPILER)
+
+        self.sim_path = os.path.join(self.temp_dir, "sim")
+        package_dir = os.path.join(self.sim_path, "genesys_sim")
+        os.makedirs(package_dir)
+        open(os.path.join(package_dir, "__init__.py"), 'w').close()
+        with open(os.path.join(package_dir, "genesys.py"), 'w') as f:
+            f.write(FAKE_SIMULATOR)
+
+        self.model_path = os.path.join(self.temp_dir, "resnet50.onnx")
+        open(self.model_path, 'w').close()
+        self.config_path = os.path.join(self.temp_dir, "benchmark_16_config.json")
+        open(self.config_path, 'w').close()
+
+        self.layer_info = {"operation": "conv_bias", "instance_id": 1, "tiling_key": "conv_bias_1"}
+        self.cwd = os.getcwd()
+        # Tiling files go to ./tiling_config
+        os.chdir(self.temp_dir)
+
+    def tearDown(self):
+        """Clean up temporary files."""
+        os.chdir(self.cwd)
+        shutil.rmtree(self.temp_dir)
+
+    def make_engine(self, **kwargs):
+        return AsyncEvaluationEngine(
+            self.model_path, self.config_path, self.output_dir, self.sim_path,
+            compile_command=[sys.executable, self.compiler_script, self.output_dir],
+            sim_command=[sys.executable, "-m", "genesys_sim.genesys"],
+            **kwargs
+        )
+
+    def test_optimize_layers_async(self):
+        """Test that all candidates are evaluated and the best one is kept."""
+        tasks = [
+            {"layer_name": "layer0_conv_bias1", "layer_info": self.layer_info, "tile_splits": splits,
+             "config_idx": i, "total_configs": 3, "priority": 0}
+            for i, splits in enumerate([{"OC": 4, "IC": 2}, {"OC": 1, "IC": 1}, {"OC": 2, "IC": 1}])
+        ]
+        results = optimize_layers_async(
+            self.model_path, [("layer0_conv_bias1", self.layer_info)], self.output_dir, self.sim_path, tasks,
+            checkpoint_dir=os.path.join(self.temp_dir, "checkpoints"),
+            cache_dir=os.path.join(self.temp_dir, "cache"), config_path=self.config_path,
+            engine=self.make_engine(max_compiles=2, max_sims=2)
+        )
+
+        self.assertEqual(results["layer0_conv_bias1"]["best_config"], {"OC": 1, "IC": 1})
+        self.assertEqual(results["layer0_conv_bias1"]["best_metric"], 200.0)
+        self.assertEqual(results["layer0_conv_bias1"]["tiling_key"], "conv_bias_1")
+
+    def test_optimize_layers_async_streams_candidates(self):
+        """Test that without a task list the candidates of an exhaustive search are streamed."""
+        layer_info = dict(self.layer_info, dimensions={"OC": 4, "IC": 2})
+        results = optimize_layers_async(
+            self.model_path, [("layer0_conv_bias1", layer_info)], self.output_dir, self.sim_path,
+            checkpoint_dir=os.path.join(self.temp_dir, "checkpoints"),
+            cache_dir=os.path.join(self.temp_dir, "cache"), config_path=self.config_path,
+            engine=self.make_engine(max_compiles=2, max_sims=2), max_configs_per_layer=-1
+        )
+
+        self.assertEqual(results["layer0_conv_bias1"]["best_config"], {"OC": 1, "IC": 1})
+        self.assertEqual(results["layer0_conv_bias1"]["best_metric"], 200.0)
+
+    def test_bounded_in_flight(self):
+        """Test that tasks are pulled from the iterable only as earlier candidates finish."""
+        engine = self.make_engine(max_compiles=1, max_sims=1)
+        pulled = 0
+        finished = 0
+        ahead = []
+
+        def tasks():
+            nonlocal pulled
+            for i in range(20):
+                pulled += 1
+                ahead.append(pulled - finished)
+                yield i
+
+        async def evaluate(task):
+            nonlocal finished
+            await asyncio.sleep(0.001)
+            finished += 1
+            return {"metric_value": task}
+
+        engine.evaluate = evaluate
+        completed = asyncio.run(engine.run(tasks(), max_in_flight=3))
+        self.assertEqual(completed, 20)
+        self.assertLessEqual(max(ahead), 3)
+
+    def test_compile_failure(self):
+        """Test that a failing compiler gives no output directory."""
+        engine = self.make_engine()
+        engine.compile_command = [sys.executable, "-c", "import sys; sys.exit(1)"]
+
+        async def compile_once():
+            engine.compile_semaphore = asyncio.Semaphore(1)
+            return await engine.compile("test_0", {"conv_bias_1": {"1": {"OC": 1}}})
+
+        self.assertIsNone(asyncio.run(compile_once()))
+
+    def test_run_process_timeout(self):
+        """Test that a process that runs too long is killed."""
+        with self.assertRaises(asyncio.TimeoutError):
+            asyncio.run(run_process([sys.executable, "-c", "import time; time.sleep(30)"], timeout=0.5))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,7 +3,8 @@ import json
 import shutil
 import unittest
 import time
-from optimizer.checkpoint import CheckpointManager
+from optimizer.checkpoint import CheckpointManager, CandidateJournal
+from optimizer.tiling_generator import TilingConfig
 
 class TestCheckpointManager(unittest.TestCase):
     """Test the CheckpointManager functionality."""
@@ -176,5 +177,83 @@ class TestCheckpointManager(unittest.TestCase):
             except Exception as e:
                 self.fail(f"Exception during permission test: {str(e)}")
 
+    def test_incremental_log_and_compaction(self):
+        """Test that updates are logged, replayed on load and folded into the snapshot."""
+        result = {"best_config": {"dim1": 2}, "best_metric": 123.45, "tiling_key": "conv_1"}
+        self.checkpoint_manager.update_layer_result("layer1", result)
+        self.checkpoint_manager.update_layer_result("layer2", dict(result, best_metric=678.9))
+        # A record torn by an interrupted write is ignored
+        with open(os.path.join(self.test_dir, f"{self.model_name}_checkpoint.0.log"), 'a') as f:
+            f.write('{"layer": "layer3", "res')
+        
+        resumed = CheckpointManager(self.model_name, self.test_dir)
+        self.assertEqual(resumed.load_checkpoint(), {"layer1": result, "layer2": dict(result, best_metric=678.9)})
+        
+        resumed.update_layer_result("layer1", dict(result, best_metric=100.0))
+        self.assertTrue(resumed.save_checkpoint(force=True))
+        self.assertEqual(resumed._log_generations(), [])
+        with open(resumed.checkpoint_file, 'r') as f:
+            self.assertEqual(json.load(f)["layer_results"]["layer1"]["best_metric"], 100.0)
+        
+        reloaded = CheckpointManager(self.model_name, self.test_dir)
+        self.assertEqual(reloaded.load_checkpoint(), resumed.layer_results)
+    
+    def test_backup_rotation(self):
+        """Test that every tenth save keeps the previous snapshot as a backup."""
+        self.checkpoint_manager.update_layer_result("layer1", {"best_metric": 1.0})
+        for _ in range(11):
+            self.checkpoint_manager.save_checkpoint(force=True)
+        
+        backups = os.listdir(self.checkpoint_manager.backup_dir)
+        self.assertEqual(len(backups), 1)
+        with open(os.path.join(self.checkpoint_manager.backup_dir, backups[0]), 'r') as f:
+            self.assertEqual(json.load(f)["layer_results"], {"layer1": {"best_metric": 1.0}})
+
+class TestCandidateJournal(unittest.TestCase):
+    """Test the journal of evaluated candidates."""
+    
+    def setUp(self):
+        """Set up a temporary checkpoint directory."""
+        import tempfile
+        self.test_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.test_dir)
+    
+    def test_record_and_load(self):
+        """Test that a new journal sees every candidate recorded before."""
+        journal = CandidateJournal("test_model", self.test_dir)
+        journal.record("layer1", {"H": 2, "W": 1}, 500.0, wait_time=0.25)
+        journal.record("layer1", {"H": 4, "W": 1}, None)
+        journal.record("layer2", {"H": 1, "W": 1}, 900.0)
+        journal.mark_complete("layer2")
+        journal.close()
+        with open(journal.journal_file, 'r') as f:
+            self.assertEqual(json.loads(f.readline())["wait_time"], 0.25)
+        
+        resumed = CandidateJournal("test_model", self.test_dir)
+        records = resumed.load()
+        self.assertEqual(len(records["layer1"]), 2)
+        self.assertIsNone(records["layer1"][TilingConfig.from_dict({"W": 1, "H": 4})])
+        self.assertEqual(resumed.best("layer1"), ({"H": 2, "W": 1}, 500.0))
+        self.assertEqual(resumed.best("layer3"), (None, None))
+        self.assertTrue(resumed.is_complete("layer2"))
+        self.assertFalse(resumed.is_complete("layer1"))
+    
+    def test_torn_record(self):
+        """Test that a record cut off by an interrupted write is ignored and not appended to."""
+        journal = CandidateJournal("test_model", self.test_dir)
+        journal.record("layer1", {"H": 2}, 500.0)
+        journal.close()
+        with open(journal.journal_file, 'a') as f:
+            f.write('{"layer": "layer1", "config": {"H"')
+        
+        resumed = CandidateJournal("test_model", self.test_dir)
+        self.assertEqual(len(resumed.load()["layer1"]), 1)
+        resumed.record("layer1", {"H": 4}, 400.0)
+        resumed.close()
+        
+        reloaded = CandidateJournal("test_model", self.test_dir)
+        self.assertEqual(len(reloaded.load()["layer1"]), 2)
+        self.assertEqual(reloaded.best("layer1"), ({"H": 4}, 400.0))
+
 if __name__ == '__main__':
     unittest.main()
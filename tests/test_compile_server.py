@@ -0,0 +1,104 @@
+import os
+import sys
+import json
+import types
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch, MagicMock
+from compiler.model_compiler import write_output_manifest, read_output_manifest
+from compiler.compile_server import CompilerService, LocalCompileBackend, GenesysCompileBackend
+
+class TestCompilerService(unittest.TestCase):
+    """Test the compiler service protocol with the local stand-in backend."""
+
+    def setUp(self):
+        """Set up a compiled template output directory."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.output_dir = os.path.join(self.temp_dir, "genesys_compiler_output")
+        self.template_dir = os.path.join(self.output_dir, "resnet50_genesys16x16_baseline")
+        layer_dir = os.path.join(self.template_dir, "layer0_conv_bias1")
+        os.makedirs(layer_dir)
+
+        self.layer_json = os.path.join(layer_dir, "conv_bias1_json.json")
+        with open(self.layer_json, 'w') as f:
+            json.dump({"program": [{"operation": "conv_bias", "instance_id": 1,
+                                    "tile_splits": {"N": 1, "OC": 1}}]}, f)
+        write_output_manifest(self.template_dir, "baseline")
+
+    def tearDown(self):
+        """Clean up temporary files."""
+        shutil.rmtree(self.temp_dir)
+
+    def test_compile_requests(self):
+        """Test that one server answers several compile requests."""
+        backend = LocalCompileBackend(self.template_dir, self.output_dir)
+        with CompilerService(backend, num_workers=2) as service:
+            self.assertTrue(service.available)
+            self.assertTrue(service.ping())
+
+            for i in range(3):
+                tiling_config = {"conv_bias_1": {"1": {"N": 1, "OC": 2 ** i}}}
+                output_dir = service.compile(f"test_{i}", tiling_config)
+
+                self.assertEqual(output_dir, os.path.join(self.output_dir, f"resnet50_genesys16x16_test_{i}"))
+                self.assertEqual(read_output_manifest(output_dir)["experiment_name"], f"test_{i}")
+                with open(os.path.join(output_dir, "layer0_conv_bias1", "conv_bias1_json.json")) as f:
+                    program = json.load(f)["program"][0]
+                self.assertEqual(program["tile_splits"], {"N": 1, "OC": 2 ** i})
+
+        # The template itself is left alone
+        with open(self.layer_json) as f:
+            self.assertEqual(json.load(f)["program"][0]["tile_splits"], {"N": 1, "OC": 1})
+
+    def test_unavailable_backend(self):
+        """Test that a backend that fails to load marks the service unavailable."""
+        os.remove(os.path.join(self.template_dir, ".compile_manifest.json"))
+        backend = LocalCompileBackend(self.template_dir, self.output_dir)
+        with CompilerService(backend, num_workers=1) as service:
+            self.assertFalse(service.available)
+            self.assertIsNone(service.compile("test_0", {}))
+
+    def test_genesys_backend_reuses_model(self):
+        """Test that the in-process backend parses the model once and restores sys.argv."""
+        class ModelProto:
+            def __init__(self):
+                self.nodes = []
+
+            def CopyFrom(self, other):
+                self.nodes = list(other.nodes)
+
+        parsed = []
+        def load_model(path):
+            parsed.append(path)
+            model = ModelProto()
+            model.nodes = ["conv"]
+            return model
+        onnx = types.SimpleNamespace(ModelProto=ModelProto, load=load_model, load_model=load_model)
+
+        model_path = os.path.join(self.temp_dir, "resnet50.onnx")
+        seen = []
+        def compile_genesys():
+            model = sys.modules["onnx"].load(sys.argv[sys.argv.index("-m") + 1])
+            model.nodes.append("rewritten")
+            seen.append((sys.argv[sys.argv.index("-e") + 1], model.nodes))
+
+        entry_point = MagicMock()
+        entry_point.load.return_value = compile_genesys
+        backend = GenesysCompileBackend(model_path, None, self.output_dir)
+        argv = sys.argv
+        with patch.dict(sys.modules, {"onnx": onnx}), \
+                patch("importlib.metadata.entry_points", return_value=[entry_point]), \
+                patch("compiler.compile_server.clear_output_manifest"), \
+                patch("compiler.compile_server.finalize_compile_output", return_value=self.template_dir):
+            backend.load()
+            for i in range(2):
+                self.assertEqual(backend.compile(f"test_{i}"), self.template_dir)
+
+        self.assertEqual(parsed, [os.path.abspath(model_path)])
+        self.assertEqual(seen, [("test_0", ["conv", "rewritten"]), ("test_1", ["conv", "rewritten"])])
+        self.assertIs(onnx.load, load_model)
+        self.assertIs(sys.argv, argv)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import os
+import unittest
+from compiler.layer_extractor import extract_layers_info
+from optimizer.cost_model import CostModel
+from optimizer.tiling_generator import generate_tiling_configs, generate_all_tiling_configs, filter_feasible_configs
+
+class TestCostModel(unittest.TestCase):
+    """Test the analytical cost model on the bundled compiler output."""
+
+    def setUp(self):
+        """Load the arch config and a matmul layer of the bundled output."""
+        self.output_dir = os.path.join(
+            os.path.dirname(os.path.dirname(__file__)),
+            "genesys_compiler_output",
+            "supported_2_genesys16x16_test_experiment"
+        )
+        self.cost_model = CostModel.from_output_dir(self.output_dir)
+        self.matmul = extract_layers_info(self.output_dir, "layer10_matmul3d2d11")
+        self.elem_add = extract_layers_info(self.output_dir, "layer21_elem_add4d4d22")
+
+    def test_from_output_dir(self):
+        """Test loading the architecture config the compiler wrote."""
+        self.assertIsNotNone(self.cost_model)
+        self.assertEqual(self.cost_model.arch_config["ARRAY_N"], 16)
+        self.assertIsNone(CostModel.from_output_dir(os.path.dirname(__file__)))
+
+    def test_matmul_compute_bound(self):
+        """Test that an unpadded matmul costs its MACs divided by the array size."""
+        # 128 x 128 x 1536 MACs on a 16x16 array, plus the per-tile overhead of 6 tiles
+        cycles = self.cost_model.predict_cycles(self.matmul, {"B": 1, "N": 1, "M": 1, "P": 6})
+        self.assertEqual(cycles, 128 * 128 * 1536 // 256 + 6 * self.cost_model.tile_overhead)
+        self.assertEqual(self.cost_model.predict_time_us(self.matmul, {"B": 1, "N": 1, "M": 1, "P": 6}),
+                         cycles / 1000)
+
+    def test_padding_and_refetch_penalized(self):
+        """Test that tiles smaller than the array or re-fetching operands cost more."""
+        baseline = self.cost_model.predict_cycles(self.matmul, {"B": 1, "N": 1, "M": 1, "P": 6})
+        padded = self.cost_model.predict_cycles(self.matmul, {"B": 1, "N": 16, "M": 1, "P": 6})
+        self.assertGreater(padded, baseline)
+
+        whole = self.cost_model.predict_cycles(self.elem_add, {"N": 1, "C": 1, "H": 1, "W": 1})
+        tiny = self.cost_model.predict_cycles(self.elem_add, {"N": 1, "C": 16, "H": 128, "W": 64})
+        self.assertGreater(tiny, whole)
+
+    def test_no_operands(self):
+        """Test that layers without operand information are not ranked."""
+        layer_info = {"dimensions": {"H": 4}, "tiling_key": "conv_1"}
+        configs = generate_all_tiling_configs(layer_info)
+        self.assertIsNone(self.cost_model.predict_cycles(layer_info, configs[0]))
+        self.assertEqual(self.cost_model.rank_configs(layer_info, configs, top_k=2), configs[:2])
+
+    def test_generate_top_k(self):
+        """Test that generate_tiling_configs keeps the best predicted candidates."""
+        all_configs, _ = filter_feasible_configs(self.matmul, generate_all_tiling_configs(self.matmul),
+                                                 self.cost_model.arch_config)
+        configs = generate_tiling_configs(self.matmul, 5, cost_model=self.cost_model)
+        self.assertEqual(len(configs), 5)
+
+        predicted = [self.cost_model.predict_cycles(self.matmul, config) for config in configs]
+        self.assertEqual(predicted, sorted(predicted))
+        best = min(self.cost_model.predict_cycles(self.matmul, config) for config in all_configs)
+        self.assertEqual(predicted[0], best)
+
+        # Exhaustive search with a cost model only prunes and reorders the candidates
+        ranked = generate_tiling_configs(self.matmul, -1, cost_model=self.cost_model)
+        self.assertEqual(len(ranked), len(all_configs))
+
+if __name__ == "__main__":
+    unittest.main()
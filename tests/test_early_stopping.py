@@ -0,0 +1,79 @@
+import unittest
+from optimizer.early_stopping import EarlyStopping, ConvergenceTracker, MAX_BOUND_CANDIDATES
+from optimizer.tiling_generator import TilingSpace
+
+class FixedCostModel:
+    """Cost model stub predicting the number of tiles in cycles."""
+
+    def predict_cycles(self, layer_info, tile_splits):
+        return 100 * tile_splits["H"]
+
+    def predict_time_us(self, layer_info, tile_splits):
+        return self.predict_cycles(layer_info, tile_splits) / 1000
+
+class TestEarlyStopping(unittest.TestCase):
+    """Test the per-layer early-stopping rules."""
+
+    def setUp(self):
+        """Set up a layer with four candidates."""
+        self.layer_info = {"operation": "conv_bias", "dimensions": {"H": 8}, "tiling_key": "conv_bias_1"}
+        self.configs = [{"H": 1}, {"H": 2}, {"H": 4}, {"H": 8}]
+
+    def test_patience(self):
+        """Test stopping after patience results without improvement."""
+        tracker = ConvergenceTracker("layer0", patience=2)
+        self.assertIsNone(tracker.update(1000))
+        self.assertIsNone(tracker.update(900))
+        self.assertIsNone(tracker.update(950))
+        self.assertIn("no improvement", tracker.update(900))
+        self.assertTrue(tracker.stopped)
+
+        # Results reported after the stop are ignored
+        self.assertIsNone(tracker.update(100))
+        self.assertEqual(tracker.best_metric, 900)
+
+    def test_min_delta(self):
+        """Test that improvements smaller than min_delta don't reset the patience."""
+        tracker = ConvergenceTracker("layer0", patience=2, min_delta=0.05)
+        tracker.update(1000)
+        self.assertIsNone(tracker.update(990))
+        self.assertIsNotNone(tracker.update(980))
+        self.assertEqual(tracker.best_metric, 980)
+
+    def test_lower_bound(self):
+        """Test stopping once the best is within the tolerance of the cost model bound."""
+        early_stopping = EarlyStopping(bound_tolerance=0.1, cost_model=FixedCostModel())
+        tracker = early_stopping.create_tracker("layer0", self.layer_info, self.configs)
+        self.assertEqual(tracker.lower_bound, 100)
+        self.assertIsNone(tracker.update(150))
+        self.assertIn("lower bound", tracker.update(105))
+
+    def test_bound_needs_supported_metric(self):
+        """Test that the bound rule is dropped for metrics the cost model can't predict."""
+        early_stopping = EarlyStopping(bound_tolerance=0.1, cost_model=FixedCostModel(), metric="simdtotalCycles")
+        self.assertFalse(early_stopping.enabled)
+        early_stopping = EarlyStopping(bound_tolerance=0.1, cost_model=FixedCostModel(), metric="totTime(us)")
+        self.assertEqual(early_stopping.lower_bound(self.layer_info, self.configs), 0.1)
+
+    def test_lower_bound_of_large_space(self):
+        """Test that the bound of a large space is found without predicting every candidate."""
+        class CountingCostModel:
+            calls = 0
+
+            def predict_cycles(self, layer_info, tile_splits):
+                self.calls += 1
+                # Fastest with H split 4 ways and W split 8 ways
+                return (1000 + abs(tile_splits["H"] - 4) + abs(tile_splits["W"] - 8)
+                        + tile_splits["C"] + tile_splits["N"] + tile_splits["K"])
+
+        layer_info = {"operation": "conv_bias", "dimensions": {"H": 4096, "W": 4096, "C": 64, "N": 64, "K": 64}}
+        space = TilingSpace(layer_info)
+        self.assertGreater(len(space), 10 * MAX_BOUND_CANDIDATES)
+
+        cost_model = CountingCostModel()
+        early_stopping = EarlyStopping(bound_tolerance=0.1, cost_model=cost_model)
+        self.assertEqual(early_stopping.lower_bound(layer_info, space), 1003)
+        self.assertLess(cost_model.calls, 2 * MAX_BOUND_CANDIDATES)
+
+if __name__ == "__main__":
+    unittest.main()
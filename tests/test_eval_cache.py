@@ -0,0 +1,101 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+from compiler.model_compiler import write_output_manifest
+from simulator.simulator import run_simulator_layers
+from simulator.eval_cache import EvaluationCache
+
+class TestEvaluationCache(unittest.TestCase):
+    """Test reusing simulator metrics of identical instruction streams."""
+
+    def setUp(self):
+        """Set up a cache and a helper to write compiled outputs."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.sim_path = os.path.join(self.temp_dir, "sim")
+        os.makedirs(self.sim_path)
+        self.cache = EvaluationCache("resnet50", os.path.join(self.temp_dir, "cache"))
+
+    def tearDown(self):
+        """Clean up temporary files."""
+        shutil.rmtree(self.temp_dir)
+
+    def make_output(self, exp_name, binaries):
+        """Write a compiled output with one binary per layer."""
+        output_dir = os.path.join(self.temp_dir, f"resnet50_genesys16x16_{exp_name}")
+        for layer_name, binary in binaries.items():
+            layer_dir = os.path.join(output_dir, layer_name)
+            os.makedirs(layer_dir)
+            with open(os.path.join(layer_dir, f"{layer_name.split('_', 1)[1]}_binary.txt"), 'w') as f:
+                f.write(binary)
+        with open(os.path.join(output_dir, "resnet50_arch_cfg.json"), 'w') as f:
+            f.write('{"ARRAY_N": 16}')
+        write_output_manifest(output_dir, exp_name)
+        return output_dir
+
+    def test_compute_key(self):
+        """Test that the key follows the instructions, not the output directory."""
+        output_a = self.make_output("test_0", {"layer0_conv_bias1": "0101"})
+        output_b = self.make_output("test_1", {"layer0_conv_bias1": "0101"})
+        output_c = self.make_output("test_2", {"layer0_conv_bias1": "0110"})
+
+        key = self.cache.compute_key(output_a, "layer0_conv_bias1")
+        self.assertEqual(key, self.cache.compute_key(output_b, "layer0_conv_bias1"))
+        self.assertNotEqual(key, self.cache.compute_key(output_c, "layer0_conv_bias1"))
+        self.assertIsNone(self.cache.compute_key(output_a, "layer1_relu2"))
+
+    @patch('simulator.simulator.simulate_output')
+    def test_duplicate_candidates_skip_simulation(self, mock_simulate):
+        """Test that a candidate with known instructions is not simulated again."""
+        mock_simulate.side_effect = lambda output_dir, layer_names, *args: {
+            layer_name: {"totCycles": 1000.0} for layer_name in layer_names
+        }
+        layers = ["layer0_conv_bias1", "layer1_relu2"]
+        output_a = self.make_output("test_0", {"layer0_conv_bias1": "0101", "layer1_relu2": "11"})
+        output_b = self.make_output("test_1", {"layer0_conv_bias1": "0101", "layer1_relu2": "11"})
+        output_c = self.make_output("test_2", {"layer0_conv_bias1": "0110", "layer1_relu2": "11"})
+
+        metrics = run_simulator_layers(output_a, layers, self.sim_path, eval_cache=self.cache)
+        self.assertEqual(metrics["layer0_conv_bias1"]["totCycles"], 1000.0)
+        self.assertEqual(mock_simulate.call_count, 1)
+
+        # Identical instructions - served from the cache
+        metrics = run_simulator_layers(output_b, layers, self.sim_path, eval_cache=self.cache)
+        self.assertEqual(metrics["layer1_relu2"]["totCycles"], 1000.0)
+        self.assertEqual(mock_simulate.call_count, 1)
+
+        # Only the changed layer is simulated
+        metrics = run_simulator_layers(output_c, layers, self.sim_path, eval_cache=self.cache)
+        self.assertEqual(mock_simulate.call_count, 2)
+        self.assertEqual(mock_simulate.call_args[0][1], ["layer0_conv_bias1"])
+        self.assertEqual(set(metrics), set(layers))
+
+        # The cache persists across runs, from the log until it is compacted
+        self.assertFalse(os.path.exists(self.cache.cache_file))
+        cache = EvaluationCache("resnet50", self.cache.cache_dir)
+        self.assertEqual(cache.get_stats()["entries"], 3)
+
+        self.cache.close()
+        self.assertFalse(os.path.exists(self.cache.log_file))
+        cache = EvaluationCache("resnet50", self.cache.cache_dir)
+        self.assertEqual(cache.get_stats()["entries"], 3)
+
+    def test_torn_log_entry(self):
+        """Test that an entry torn by an interrupted write is skipped and later entries still load."""
+        self.cache.put("a", {"totCycles": 1.0})
+        self.cache.close()
+        self.cache.put("b", {"totCycles": 2.0})
+        self.cache.log.close()
+        self.cache.log = None
+        with open(self.cache.log_file, 'a') as f:
+            f.write('{"key": "c", "metr')
+
+        cache = EvaluationCache("resnet50", self.cache.cache_dir)
+        cache.put("d", {"totCycles": 4.0})
+        cache.close()
+        cache = EvaluationCache("resnet50", self.cache.cache_dir)
+        self.assertEqual(sorted(cache.cache), ["a", "b", "d"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+from compiler import model_compiler
+from compiler.model_compiler import find_layer_node, compile_layer, read_output_manifest
+
+class TestLayerCompile(unittest.TestCase):
+    """Test mapping layers onto graph nodes and checking single-layer compiles."""
+
+    def setUp(self):
+        """Set up a layer from the default output."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.output_dir = os.path.join(self.temp_dir, "genesys_compiler_output")
+        self.model_path = os.path.join(self.temp_dir, "supported_2.onnx")
+        self.layer_name = "layer29_matmul4d4d30"
+        self.layer_info = {
+            "operation": "matmul4d4d",
+            "instance_id": 30,
+            "dimensions": {"B": 1, "C": 8, "N": 64, "M": 128, "P": 64},
+            "tile_splits": {"B": 1, "C": 1, "N": 1, "M": 2, "P": 1},
+            "tiling_key": "matmul4d4d_30",
+            "operands": [
+                {"name": "data", "unique_name": "_layers.0_self_attn_Softmax_output_0_Y", "kind": "input"},
+                {"name": "out", "unique_name": "_layers.0_self_attn_MatMul_1_output_0_Y", "kind": "output"}
+            ]
+        }
+        model_compiler._full_compile_layers.clear()
+
+    def tearDown(self):
+        """Clean up temporary files."""
+        shutil.rmtree(self.temp_dir)
+        model_compiler._full_compile_layers.clear()
+
+    def write_layer_output(self, model_name, experiment_name, dimensions, tile_splits):
+        """Write a compiled output with a single matmul layer."""
+        layer_dir = os.path.join(self.output_dir, f"{model_name}_{experiment_name}", "layer0_matmul4d4d1")
+        os.makedirs(layer_dir)
+        with open(os.path.join(layer_dir, "matmul4d4d1_json.json"), 'w') as f:
+            json.dump({"program": [{"operation": "matmul4d4d", "instance_id": 1, "tile_splits": tile_splits,
+                                    "iterable_dimensions": dimensions}]}, f)
+
+    def test_find_layer_node(self):
+        """Test that the layer maps onto the node producing its output, not the idx-th node."""
+        nodes = [SimpleNamespace(name=f"node{i}", output=[f"/layers.0/self_attn/Softmax_{i}_output_0"])
+                 for i in range(30)]
+        nodes.insert(3, SimpleNamespace(name="/layers.0/self_attn/MatMul_1",
+                                        output=["/layers.0/self_attn/MatMul_1_output_0"]))
+        self.assertIs(find_layer_node(nodes, self.layer_info), nodes[3])
+
+        # Expanded nodes have no graph tensor for the layer's output
+        expanded = dict(self.layer_info, operands=[
+            {"name": "out", "unique_name": "_layers.0_input_layernorm_Pow_expansion_0_Y", "kind": "output"}])
+        self.assertIsNone(find_layer_node(nodes, expanded))
+
+    def fake_compile(self, model_path, config_path, experiment_name, tiling_config=None, **kwargs):
+        """Compile a single-layer model into one layer, ignoring the requested M split."""
+        model_name = os.path.basename(model_path).split('.')[0]
+        tile_splits = dict(list(tiling_config.values())[0]["1"])
+        if model_name != "supported_2":
+            tile_splits["M"] = 1
+        self.write_layer_output(model_name, experiment_name, self.layer_info["dimensions"], tile_splits)
+        return True
+
+    @patch('compiler.model_compiler.extract_layer_model')
+    @patch('compiler.model_compiler.compile_model')
+    def test_single_layer_compile(self, mock_compile, mock_extract):
+        """Test that a matching single-layer compile is used on its own."""
+        mock_extract.return_value = os.path.join(self.temp_dir, "supported_2_layer29_matmul4d4d30.onnx")
+        mock_compile.side_effect = self.fake_compile
+        tile_splits = {"B": 1, "C": 1, "N": 1, "M": 1, "P": 4}
+
+        output_dir = compile_layer(self.model_path, None, "test_0", self.layer_name, self.layer_info,
+                                   tile_splits, output_dir=self.output_dir)
+        self.assertEqual(output_dir, os.path.join(self.output_dir, "supported_2_test_0"))
+        self.assertEqual(mock_compile.call_count, 1)
+        self.assertTrue(os.path.exists(os.path.join(output_dir, self.layer_name, "matmul4d4d30_json.json")))
+        self.assertEqual(read_output_manifest(output_dir)["experiment_name"], "supported_2_test_0")
+
+    @patch('compiler.model_compiler.extract_layer_model')
+    @patch('compiler.model_compiler.compile_model')
+    def test_mismatch_falls_back_to_full_compile(self, mock_compile, mock_extract):
+        """Test that a layer compiled differently than requested is compiled with the whole model."""
+        mock_extract.return_value = os.path.join(self.temp_dir, "supported_2_layer29_matmul4d4d30.onnx")
+        mock_compile.side_effect = self.fake_compile
+        tile_splits = {"B": 1, "C": 1, "N": 1, "M": 4, "P": 1}
+
+        output_dir = compile_layer(self.model_path, None, "test_0", self.layer_name, self.layer_info,
+                                   tile_splits, output_dir=self.output_dir)
+        self.assertEqual(output_dir, os.path.join(self.output_dir, "supported_2_test_0"))
+        self.assertEqual(mock_compile.call_count, 2)
+        _, kwargs = mock_compile.call_args
+        self.assertEqual(kwargs["tiling_config"], {"matmul4d4d_30": {"1": tile_splits}})
+        # The single-layer output is dropped
+        self.assertFalse(os.path.exists(os.path.join(self.output_dir,
+                                                     "supported_2_layer29_matmul4d4d30_test_0")))
+
+        # A layer without a graph node of its own is compiled whole from then on
+        mock_compile.reset_mock()
+        mock_compile.side_effect = lambda *args, **kwargs: True
+        mock_extract.return_value = None
+        self.assertIsNotNone(compile_layer(self.model_path, None, "test_1", self.layer_name, self.layer_info,
+                                           tile_splits, output_dir=self.output_dir))
+        self.assertIsNotNone(compile_layer(self.model_path, None, "test_2", self.layer_name, self.layer_info,
+                                           tile_splits, output_dir=self.output_dir))
+        self.assertEqual(mock_extract.call_count, 2)
+        self.assertEqual(mock_compile.call_count, 2)
+
+if __name__ == '__main__':
+    unittest.main()
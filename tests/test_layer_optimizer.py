@@ -2,9 +2,11 @@ import os
 import unittest
 import tempfile
 from unittest.mock import patch, MagicMock
+from optimizer.early_stopping import EarlyStopping
 from optimizer.layer_optimizer import (
     optimize_layer,
     optimize_layers_parallel,
+    optimize_layers_packed,
     build_final_tiling_config
 )
 
@@ -112,6 +114,47 @@ class TestLayerOptimizer(unittest.TestCase):
         self.assertEqual(best_metric, 1500)  # Best metric
         self.assertEqual(tiling_key, "conv_1")
     
+    @patch('optimizer.layer_optimizer.generate_tiling_configs')
+    @patch('optimizer.layer_optimizer.compile_layer')
+    @patch('optimizer.layer_optimizer.compile_model')
+    @patch('optimizer.layer_optimizer.run_simulator')
+    def test_optimize_layer_single_layer(self, mock_simulator, mock_compile,
+                                         mock_compile_layer, mock_generate_configs):
+        """Test that single-layer mode compiles only the target layer."""
+        mock_generate_configs.return_value = self.tiling_configs[:2]
+        layer_output_dir = os.path.join(self.temp_dir, "model_test_layer_test_0")
+        mock_compile_layer.return_value = layer_output_dir
+        mock_simulator.side_effect = [
+            {"totCycles": 2000, "totTime(us)": 5.0},
+            {"totCycles": 1500, "totTime(us)": 3.75}
+        ]
+        
+        result = optimize_layer(
+            model_path=self.model_path,
+            layer_name=self.layer_name,
+            layer_info=self.layer_info,
+            output_dir=self.temp_dir,
+            sim_path=self.sim_path,
+            metric="totCycles",
+            max_configs=2,
+            single_layer=True
+        )
+        
+        # The full model is never compiled
+        mock_compile.assert_not_called()
+        self.assertEqual(mock_compile_layer.call_count, 2)
+        _, kwargs = mock_compile_layer.call_args
+        self.assertEqual(kwargs["layer_name"], self.layer_name)
+        self.assertEqual(kwargs["tile_splits"], self.tiling_configs[1])
+        
+        # The simulator runs on the minimal output directory
+        sim_args, _ = mock_simulator.call_args
+        self.assertEqual(sim_args[0], layer_output_dir)
+        
+        _, best_config, best_metric, _ = result
+        self.assertEqual(best_config, self.tiling_configs[1])
+        self.assertEqual(best_metric, 1500)
+    
     @patch('optimizer.layer_optimizer.optimize_layer')
     def test_optimize_layers_parallel(self, mock_optimize_layer):
         """Test optimizing multiple layers in parallel."""
@@ -148,7 +191,251 @@ class TestLayerOptimizer(unittest.TestCase):
         self.assertIn("layer2", results)
         self.assertEqual(results["layer1"]["best_metric"], 1000.0)
         self.assertEqual(results["layer2"]["best_metric"], 800.0)
-    
+
+    @patch('optimizer.layer_optimizer.compile_model')
+    @patch('optimizer.layer_optimizer.run_simulator')
+    def test_optimize_layers_parallel_search(self, mock_simulator, mock_compile):
+        """Test that a search strategy proposes each layer's candidates within its budget."""
+        compiled = {}
+
+        def compile_side_effect(**kwargs):
+            compiled[kwargs["experiment_name"]] = kwargs["tiling_config"]
+            return True
+
+        def simulate_side_effect(test_output_dir, layer_name, *args, **kwargs):
+            # Fewer OH tiles are faster
+            experiment_name = test_output_dir.split("model_", 1)[1]
+            tile_splits = next(iter(compiled[experiment_name].values()))["1"]
+            return {"totCycles": 1000 + tile_splits["OH"]}
+
+        mock_compile.side_effect = compile_side_effect
+        mock_simulator.side_effect = simulate_side_effect
+
+        # Layers of different shapes, identical layers are only searched once
+        layer2_info = dict(self.layer_info, tiling_key="conv_2", dimensions=dict(self.layer_info["dimensions"], OC=32))
+        layers_info = [("layer1", self.layer_info), ("layer2", layer2_info)]
+        results = optimize_layers_parallel(
+            model_path=self.model_path,
+            layers_info=layers_info,
+            output_dir=self.temp_dir,
+            sim_path=self.sim_path,
+            max_configs_per_layer=5,
+            max_workers=3,
+            checkpoint_dir=self.temp_dir,
+            cache_dir=self.temp_dir,
+            enable_caching=False,
+            search_strategy="bayesian"
+        )
+
+        self.assertEqual(mock_compile.call_count, 10)
+        self.assertEqual(len({str(config) for config in compiled.values()}), 10)
+        self.assertEqual(set(results), {"layer1", "layer2"})
+        self.assertEqual(results["layer2"]["tiling_key"], "conv_2")
+
+    @patch('optimizer.checkpoint.CandidateJournal.record')
+    @patch('optimizer.layer_optimizer.compile_model')
+    @patch('optimizer.layer_optimizer.run_simulator')
+    def test_optimize_layers_parallel_search_journal_errors(self, mock_simulator, mock_compile, mock_record):
+        """Test that a search still finishes when its candidates can't be journaled."""
+        mock_compile.return_value = True
+        mock_simulator.return_value = {"totCycles": 1000}
+        mock_record.side_effect = OSError("No space left on device")
+
+        results = optimize_layers_parallel(
+            model_path=self.model_path,
+            layers_info=[("layer1", self.layer_info)],
+            output_dir=self.temp_dir,
+            sim_path=self.sim_path,
+            max_configs_per_layer=4,
+            max_workers=2,
+            checkpoint_dir=self.temp_dir,
+            cache_dir=self.temp_dir,
+            enable_caching=False,
+            search_strategy="bayesian"
+        )
+
+        self.assertEqual(mock_record.call_count, 4)
+        self.assertEqual(results["layer1"]["best_metric"], 1000)
+
+    @patch('optimizer.layer_optimizer.generate_tiling_configs')
+    @patch('optimizer.layer_optimizer.compile_model')
+    @patch('optimizer.layer_optimizer.run_simulator')
+    def test_optimize_layer_early_stopping(self, mock_simulator, mock_compile, mock_generate_configs):
+        """Test that a converged layer stops before testing every candidate."""
+        mock_generate_configs.return_value = self.tiling_configs
+        mock_compile.return_value = True
+        mock_simulator.side_effect = [{"totCycles": 1500}, {"totCycles": 1600}, {"totCycles": 1700},
+                                      {"totCycles": 1000}]
+
+        result = optimize_layer(
+            model_path=self.model_path,
+            layer_name=self.layer_name,
+            layer_info=self.layer_info,
+            output_dir=self.temp_dir,
+            sim_path=self.sim_path,
+            max_configs=4,
+            early_stopping=EarlyStopping(patience=2)
+        )
+
+        self.assertEqual(mock_compile.call_count, 3)
+        _, best_config, best_metric, _ = result
+        self.assertEqual(best_config, self.tiling_configs[0])
+        self.assertEqual(best_metric, 1500)
+
+    @patch('optimizer.layer_optimizer.compile_model')
+    @patch('optimizer.layer_optimizer.run_simulator')
+    def test_optimize_layers_parallel_early_stopping(self, mock_simulator, mock_compile):
+        """Test that early stopping drops queued candidates and records the reason."""
+        mock_compile.return_value = True
+        mock_simulator.return_value = {"totCycles": 1000}
+
+        results = optimize_layers_parallel(
+            model_path=self.model_path,
+            layers_info=[("layer1", self.layer_info)],
+            output_dir=self.temp_dir,
+            sim_path=self.sim_path,
+            max_configs_per_layer=10,
+            max_workers=2,
+            compile_workers=1,
+            sim_workers=1,
+            queue_size=1,
+            checkpoint_dir=self.temp_dir,
+            cache_dir=self.temp_dir,
+            enable_caching=False,
+            early_stopping=EarlyStopping(patience=2)
+        )
+
+        self.assertLess(mock_simulator.call_count, 10)
+        self.assertIn("no improvement", results["layer1"]["stop_reason"])
+
+    @patch('optimizer.layer_optimizer.compile_model')
+    @patch('optimizer.layer_optimizer.run_simulator')
+    def test_optimize_layers_parallel_late_results(self, mock_simulator, mock_compile):
+        """Test that results finishing after every queue has drained are still recorded."""
+        import time
+        mock_compile.return_value = True
+
+        def simulate_side_effect(test_output_dir, layer_name, *args, **kwargs):
+            # The last candidate is the best one and takes longest to simulate
+            if test_output_dir.endswith("_test_3"):
+                time.sleep(0.5)
+                return {"totCycles": 500}
+            return {"totCycles": 1000}
+
+        mock_simulator.side_effect = simulate_side_effect
+
+        results = optimize_layers_parallel(
+            model_path=self.model_path,
+            layers_info=[("layer1", self.layer_info)],
+            output_dir=self.temp_dir,
+            sim_path=self.sim_path,
+            max_configs_per_layer=4,
+            max_workers=5,
+            checkpoint_dir=self.temp_dir,
+            cache_dir=self.temp_dir,
+            enable_caching=False
+        )
+
+        self.assertEqual(results["layer1"]["best_metric"], 500)
+
+    @patch('optimizer.layer_optimizer.compile_model')
+    @patch('optimizer.layer_optimizer.run_simulator')
+    def test_optimize_layers_parallel_identical_layers(self, mock_simulator, mock_compile):
+        """Test that identical layers are evaluated once and share the result."""
+        mock_compile.return_value = True
+        mock_simulator.return_value = {"totCycles": 1000}
+        layers_info = [("layer1", self.layer_info), ("layer2", dict(self.layer_info, tiling_key="conv_2")),
+                       ("layer3", dict(self.layer_info, tiling_key="conv_3"))]
+
+        results = optimize_layers_parallel(
+            model_path=self.model_path,
+            layers_info=layers_info,
+            output_dir=self.temp_dir,
+            sim_path=self.sim_path,
+            max_configs_per_layer=4,
+            max_workers=3,
+            checkpoint_dir=self.temp_dir,
+            cache_dir=self.temp_dir
+        )
+
+        simulated_layers = {call.args[1] for call in mock_simulator.call_args_list}
+        self.assertEqual(simulated_layers, {"layer1"})
+        self.assertEqual(set(results), {"layer1", "layer2", "layer3"})
+        self.assertEqual(results["layer3"]["tiling_key"], "conv_3")
+        self.assertEqual(results["layer3"]["best_config"], results["layer1"]["best_config"])
+
+        # A second run takes all three layers from the cache without compiling
+        mock_compile.reset_mock()
+        results = optimize_layers_parallel(
+            model_path=self.model_path,
+            layers_info=layers_info,
+            output_dir=self.temp_dir,
+            sim_path=self.sim_path,
+            max_configs_per_layer=4,
+            checkpoint_dir=os.path.join(self.temp_dir, "fresh"),
+            cache_dir=self.temp_dir
+        )
+        mock_compile.assert_not_called()
+        self.assertEqual(results["layer2"]["tiling_key"], "conv_2")
+
+    @patch('optimizer.layer_optimizer.compile_model')
+    @patch('optimizer.layer_optimizer.run_simulator')
+    def test_optimize_layers_parallel_resumes_candidates(self, mock_simulator, mock_compile):
+        """Test that an interrupted layer only evaluates the candidates missing from the journal."""
+        from optimizer.checkpoint import CandidateJournal
+        compiled = []
+
+        def compile_side_effect(**kwargs):
+            compiled.append(next(iter(kwargs["tiling_config"].values()))["1"])
+            return True
+
+        mock_compile.side_effect = compile_side_effect
+        mock_simulator.return_value = {"totCycles": 1000}
+        layer_info = {"operation": "elem_add", "dimensions": {"H": 4, "W": 2}, "tiling_key": "elem_add_1"}
+
+        # The interrupted run evaluated two of the six candidates
+        journal = CandidateJournal("model", self.temp_dir)
+        journal.record("layer1", {"H": 1, "W": 1}, 2000)
+        journal.record("layer1", {"H": 2, "W": 2}, 500)
+        journal.close()
+
+        def run(checkpoint_dir=self.temp_dir, search_strategy=None):
+            return optimize_layers_parallel(
+                model_path=self.model_path,
+                layers_info=[("layer1", layer_info)],
+                output_dir=self.temp_dir,
+                sim_path=self.sim_path,
+                max_configs_per_layer=-1,
+                max_workers=3,
+                checkpoint_dir=checkpoint_dir,
+                cache_dir=self.temp_dir,
+                enable_caching=False,
+                search_strategy=search_strategy
+            )
+
+        results = run()
+        self.assertEqual(len(compiled), 4)
+        self.assertNotIn({"H": 1, "W": 1}, compiled)
+        self.assertNotIn({"H": 2, "W": 2}, compiled)
+        self.assertEqual(results["layer1"]["best_metric"], 500)
+        self.assertEqual(results["layer1"]["best_config"], {"H": 2, "W": 2})
+
+        # The finished layer is skipped entirely
+        results = run()
+        self.assertEqual(len(compiled), 4)
+        self.assertEqual(results["layer1"]["best_metric"], 500)
+
+        # A local search replays the journal and climbs on from the best journaled candidate
+        search_dir = os.path.join(self.temp_dir, "search")
+        journal = CandidateJournal("model", search_dir)
+        journal.record("layer1", {"H": 1, "W": 1}, 2000)
+        journal.record("layer1", {"H": 2, "W": 1}, 500)
+        journal.close()
+        del compiled[:]
+        results = run(search_dir, "local")
+        self.assertCountEqual(compiled, [{"H": 1, "W": 2}, {"H": 4, "W": 1}, {"H": 2, "W": 2}])
+        self.assertEqual(results["layer1"]["best_config"], {"H": 2, "W": 1})
+
     @patch('optimizer.layer_optimizer.OptimizationCache')
     @patch('optimizer.layer_optimizer.generate_tiling_configs')
     @patch('optimizer.layer_optimizer.compile_model')
@@ -193,6 +480,123 @@ class TestLayerOptimizer(unittest.TestCase):
         self.assertEqual(best_metric, cached_result["best_metric"])
         self.assertEqual(tiling_key, cached_result["tiling_key"])
     
+    @patch('optimizer.layer_optimizer.generate_tiling_configs')
+    @patch('optimizer.layer_optimizer.compile_model')
+    @patch('optimizer.layer_optimizer.run_simulator_layers')
+    def test_optimize_layers_packed(self, mock_simulator, mock_compile, mock_generate_configs):
+        """Test that packed rounds compile once per round and attribute rows per layer."""
+        layer2_info = dict(self.layer_info, tiling_key="conv_2")
+        layers_info = [("layer1", self.layer_info), ("layer2", layer2_info)]
+        mock_generate_configs.side_effect = [self.tiling_configs[:2], self.tiling_configs[2:3]]
+        mock_compile.return_value = True
+        
+        def simulate(output_dir, layer_names, sim_path, **kwargs):
+            if output_dir.endswith("packed_round_0"):
+                return {"layer1": {"totCycles": 2000}, "layer2": {"totCycles": 900}}
+            return {"layer1": {"totCycles": 1500}}
+        mock_simulator.side_effect = simulate
+        
+        results = optimize_layers_packed(
+            model_path=self.model_path,
+            layers_info=layers_info,
+            output_dir=self.temp_dir,
+            sim_path=self.sim_path,
+            max_configs_per_layer=2,
+            max_workers=1,
+            checkpoint_dir=self.temp_dir,
+            enable_caching=False
+        )
+        
+        # Two rounds for two layers instead of three separate compiles
+        self.assertEqual(mock_compile.call_count, 2)
+        first_round_tiling = mock_compile.call_args_list[0][1]["tiling_config"]
+        self.assertEqual(first_round_tiling, {
+            "conv_1": {"1": self.tiling_configs[0]},
+            "conv_2": {"1": self.tiling_configs[2]}
+        })
+        
+        self.assertEqual(results["layer1"]["best_config"], self.tiling_configs[1])
+        self.assertEqual(results["layer1"]["best_metric"], 1500)
+        self.assertEqual(results["layer2"]["best_config"], self.tiling_configs[2])
+        self.assertEqual(results["layer2"]["best_metric"], 900)
+    
+    @patch('optimizer.layer_optimizer.compile_model')
+    @patch('optimizer.layer_optimizer.run_simulator_layers')
+    def test_optimize_layers_packed_resumes_candidates(self, mock_simulator, mock_compile):
+        """Test that packed rounds journal their candidates and skip the ones journaled before."""
+        from optimizer.checkpoint import CandidateJournal
+        compiled = []
+
+        def compile_side_effect(**kwargs):
+            compiled.append(next(iter(kwargs["tiling_config"].values()))["1"])
+            return True
+
+        mock_compile.side_effect = compile_side_effect
+        mock_simulator.side_effect = lambda output_dir, layer_names, sim_path, **kwargs: {
+            layer_name: {"totCycles": 1000} for layer_name in layer_names
+        }
+        layer_info = {"operation": "elem_add", "dimensions": {"H": 4, "W": 2}, "tiling_key": "elem_add_1"}
+
+        # The interrupted run evaluated two of the six candidates
+        journal = CandidateJournal("model", self.temp_dir)
+        journal.record("layer1", {"H": 1, "W": 1}, 2000)
+        journal.record("layer1", {"H": 2, "W": 2}, 500)
+        journal.close()
+
+        def run():
+            return optimize_layers_packed(
+                model_path=self.model_path,
+                layers_info=[("layer1", layer_info)],
+                output_dir=self.temp_dir,
+                sim_path=self.sim_path,
+                max_configs_per_layer=-1,
+                max_workers=1,
+                checkpoint_dir=self.temp_dir,
+                enable_caching=False
+            )
+
+        results = run()
+        self.assertEqual(len(compiled), 4)
+        self.assertNotIn({"H": 1, "W": 1}, compiled)
+        self.assertNotIn({"H": 2, "W": 2}, compiled)
+        self.assertEqual(results["layer1"]["best_config"], {"H": 2, "W": 2})
+
+        # Every candidate is journaled and the finished layer is skipped entirely
+        journal = CandidateJournal("model", self.temp_dir)
+        self.assertEqual(len(journal.load()["layer1"]), 6)
+        self.assertTrue(journal.is_complete("layer1"))
+        results = run()
+        self.assertEqual(len(compiled), 4)
+        self.assertEqual(results["layer1"]["best_metric"], 500)
+
+    @patch('optimizer.layer_optimizer.compile_model')
+    @patch('optimizer.layer_optimizer.run_simulator')
+    def test_optimize_layer_journal(self, mock_simulator, mock_compile):
+        """Test that a sequential layer search journals its candidates and skips the ones journaled before."""
+        from optimizer.checkpoint import CandidateJournal
+        mock_compile.return_value = True
+        mock_simulator.return_value = {"totCycles": 1000}
+        layer_info = {"operation": "elem_add", "dimensions": {"H": 4, "W": 2}, "tiling_key": "elem_add_1"}
+
+        journal = CandidateJournal("model", self.temp_dir)
+        journal.record("layer1", {"H": 2, "W": 2}, 500)
+        journal.load()
+
+        def run():
+            return optimize_layer(model_path=self.model_path, layer_name="layer1", layer_info=layer_info,
+                                  output_dir=self.temp_dir, sim_path=self.sim_path, max_configs=-1,
+                                  journal=journal)
+
+        self.assertEqual(run(), ("layer1", {"H": 2, "W": 2}, 500, "elem_add_1"))
+        self.assertEqual(mock_compile.call_count, 5)
+        self.assertEqual(len(journal.evaluated("layer1")), 6)
+        self.assertTrue(journal.is_complete("layer1"))
+
+        # The finished layer keeps its journaled result
+        self.assertEqual(run(), ("layer1", {"H": 2, "W": 2}, 500, "elem_add_1"))
+        self.assertEqual(mock_compile.call_count, 5)
+        journal.close()
+
     def test_build_final_tiling_config(self):
         """Test building the final tiling configuration."""
         # Build the final config
@@ -0,0 +1,109 @@
+import time
+import threading
+import unittest
+from optimizer.pipeline import CompileSimulatePipeline
+
+class TestCompileSimulatePipeline(unittest.TestCase):
+    """Test the two-stage compile/simulate pipeline."""
+
+    def test_stages_overlap(self):
+        """Test that compiles and simulations of different candidates run at the same time."""
+        pipeline = CompileSimulatePipeline(
+            lambda task: time.sleep(0.05) or f"out_{task}",
+            lambda task, compiled: time.sleep(0.05) or {"task": task, "compiled": compiled},
+            compile_workers=1, sim_workers=1
+        )
+        results = []
+        start = time.time()
+        stats = pipeline.run(range(6), on_result=lambda task, result: results.append(result))
+        elapsed = time.time() - start
+
+        self.assertEqual(sorted(r["task"] for r in results), list(range(6)))
+        self.assertEqual(results[0]["compiled"], "out_0")
+        # Serial execution would take 12 x 0.05s
+        self.assertLess(elapsed, 0.5)
+        self.assertEqual(stats["compile"]["completed"], 6)
+        self.assertEqual(stats["simulate"]["completed"], 6)
+        self.assertGreater(stats["simulate"]["utilization"], 0.5)
+
+    def test_bounded_queue(self):
+        """Test that a slow simulate stage holds the compile stage back."""
+        simulated = []
+        lock = threading.Lock()
+
+        def simulate(task, compiled):
+            time.sleep(0.02)
+            with lock:
+                simulated.append(task)
+            return task
+
+        pipeline = CompileSimulatePipeline(lambda task: task, simulate, compile_workers=4, sim_workers=1,
+                                           queue_size=2)
+        stats = pipeline.run(range(10))
+
+        self.assertEqual(sorted(simulated), list(range(10)))
+        self.assertLessEqual(stats["max_queue_depth"], 2)
+
+    def test_failures(self):
+        """Test that failed compiles skip the simulate stage and are counted."""
+        def compile_fn(task):
+            if task == 2:
+                raise RuntimeError("compiler crashed")
+            return None if task % 2 else task
+
+        results = []
+        stats = CompileSimulatePipeline(compile_fn, lambda task, compiled: task).run(
+            range(6), on_result=lambda task, result: results.append(result))
+
+        self.assertEqual(sorted(results), [0, 4])
+        self.assertEqual(stats["compile"]["failed"], 4)
+        self.assertEqual(stats["simulate"]["completed"], 2)
+
+    def test_failure_callback(self):
+        """Test that failures of either stage are reported with their task."""
+        def compile_fn(task):
+            if task == 2:
+                raise RuntimeError("compiler crashed")
+            return None if task == 3 else task
+
+        results = []
+        failures = []
+        CompileSimulatePipeline(compile_fn, lambda task, compiled: None if task == 4 else task).run(
+            range(6), on_result=lambda task, result: results.append(result), on_failure=failures.append)
+
+        self.assertEqual(sorted(results), [0, 1, 5])
+        self.assertEqual(sorted(failures), [2, 3, 4])
+
+    def test_failing_input(self):
+        """Test that an error of the task iterable ends the run after its tasks and is raised."""
+        def tasks():
+            yield from range(3)
+            raise RuntimeError("proposal failed")
+
+        results = []
+        pipeline = CompileSimulatePipeline(lambda task: task, lambda task, compiled: task, compile_workers=2)
+        with self.assertRaises(RuntimeError):
+            pipeline.run(tasks(), on_result=lambda task, result: results.append(result))
+        self.assertEqual(sorted(results), [0, 1, 2])
+
+    def test_failing_callbacks(self):
+        """Test that workers keep going when the result and failure callbacks raise."""
+        results = []
+        def on_result(task, result):
+            results.append(result)
+            raise OSError("journal not writable")
+
+        failures = []
+        def on_failure(task):
+            failures.append(task)
+            raise OSError("journal not writable")
+
+        pipeline = CompileSimulatePipeline(lambda task: task if task % 2 else None, lambda task, compiled: task,
+                                           compile_workers=1, sim_workers=1, queue_size=1)
+        stats = pipeline.run(range(10), on_result=on_result, on_failure=on_failure)
+        self.assertEqual(sorted(results), [1, 3, 5, 7, 9])
+        self.assertEqual(sorted(failures), [0, 2, 4, 6, 8])
+        self.assertEqual(stats["simulate"]["completed"], 5)
+
+if __name__ == '__main__':
+    unittest.main()
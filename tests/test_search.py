@@ -0,0 +1,262 @@
+import os
+import math
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+from optimizer.search import (
+    SearchStrategy,
+    BayesianOptimization,
+    LocalSearch,
+    EvolutionarySearch,
+    create_search_strategy,
+    config_key,
+    search_in_progress,
+    np
+)
+from optimizer.tiling_generator import generate_all_tiling_configs, TilingConfig
+
+class TestSearchStrategies(unittest.TestCase):
+    """Test the adaptive search strategies."""
+
+    def setUp(self):
+        """Set up a layer whose metric is lowest at H=8, W=2, C=4."""
+        self.layer_info = {
+            "operation": "conv_bias",
+            "dimensions": {"H": 64, "W": 64, "C": 16},
+            "tile_splits": {"H": 1, "W": 1, "C": 1},
+            "tiling_key": "conv_bias_1"
+        }
+        self.candidates = generate_all_tiling_configs(self.layer_info)
+        self.best_metric = min(self.metric(config) for config in self.candidates)
+
+    def metric(self, config):
+        """Cycles that grow with the log distance of the splits from the optimum."""
+        h = config["H"].bit_length() - 1
+        w = config["W"].bit_length() - 1
+        c = config["C"].bit_length() - 1
+        return 1000 * 1.5 ** ((h - 3) ** 2 + (w - 1) ** 2 + 0.5 * (c - 2) ** 2)
+
+    def test_unknown_strategy(self):
+        """Test that an unknown strategy name is rejected."""
+        with self.assertRaises(ValueError):
+            create_search_strategy("annealing", self.layer_info, self.candidates, 10)
+
+    def test_budget(self):
+        """Test that the search stops after its budget and never repeats a candidate."""
+        search = create_search_strategy("bayesian", self.layer_info, self.candidates, 12, seed=0)
+        proposed = []
+        for config in search.iter_candidates():
+            proposed.append(config_key(config))
+            search.observe(config, self.metric(config))
+        self.assertEqual(len(proposed), 12)
+        self.assertEqual(len(set(proposed)), 12)
+        self.assertIsNone(search.propose())
+
+    def test_unreported_candidates_count_as_failed(self):
+        """Test that sequential iteration records candidates without a result as failures."""
+        search = BayesianOptimization(self.layer_info, self.candidates, 3, seed=0)
+        configs = list(search.iter_candidates())
+        self.assertEqual(len(configs), 3)
+        self.assertFalse(search.pending)
+        self.assertEqual(search.get_best(), (None, None))
+
+    @unittest.skipIf(np is None, "numpy is not installed")
+    def test_sequential_quality(self):
+        """Test that a small fraction of the candidates finds a near-optimal one."""
+        budget = len(self.candidates) // 10
+        search = BayesianOptimization(self.layer_info, self.candidates, budget, seed=0)
+        for config in search.iter_candidates():
+            search.observe(config, self.metric(config))
+        _, best_metric = search.get_best()
+        self.assertLessEqual(best_metric, 1.5 * self.best_metric)
+
+    @unittest.skipIf(np is None, "numpy is not installed")
+    def test_batch_proposals(self):
+        """Test that concurrent proposals spread out and results arriving late are used."""
+        budget = len(self.candidates) // 10
+        search = BayesianOptimization(self.layer_info, self.candidates, budget, seed=0)
+        in_flight = []
+        while True:
+            # Keep four candidates in flight like a pool of four workers
+            while len(in_flight) < 4:
+                config = search.propose()
+                if config is None:
+                    break
+                in_flight.append(config)
+            if not in_flight:
+                break
+            config = in_flight.pop(0)
+            search.observe(config, self.metric(config))
+
+        self.assertEqual(len(search.observations), budget)
+        _, best_metric = search.get_best()
+        self.assertLessEqual(best_metric, 1.5 * self.best_metric)
+
+    @unittest.skipIf(np is None, "numpy is not installed")
+    def test_singular_pending_kernel(self):
+        """Test that proposals go on when the kernel matrix with pending candidates isn't positive definite."""
+        search = BayesianOptimization(self.layer_info, self.candidates, 20, seed=0)
+        for _ in range(search.num_initial):
+            config = search.propose()
+            search.observe(config, self.metric(config))
+
+        cholesky = np.linalg.cholesky
+
+        def failing_cholesky(K):
+            if len(K) > len(search.observations):
+                raise np.linalg.LinAlgError("Matrix is not positive definite")
+            return cholesky(K)
+
+        with patch("optimizer.search.np.linalg.cholesky", side_effect=failing_cholesky):
+            in_flight = [search.propose() for _ in range(4)]
+        self.assertNotIn(None, in_flight)
+        self.assertEqual(len({config_key(config) for config in in_flight}), 4)
+
+    def conv_layer(self):
+        """A 7-dimensional conv layer and a metric with its optimum away from the compiled splits."""
+        layer_info = {
+            "operation": "conv_bias",
+            "dimensions": {"N": 1, "OC": 64, "IC": 64, "KH": 3, "KW": 3, "OH": 56, "OW": 56},
+            "tile_splits": {"N": 1, "OC": 1, "IC": 1, "KH": 1, "KW": 1, "OH": 1, "OW": 1},
+            "tiling_key": "conv_bias_1"
+        }
+        optimum = {"N": 1, "OC": 4, "IC": 2, "KH": 1, "KW": 1, "OH": 7, "OW": 4}
+
+        def metric(config):
+            return 1000 + sum(abs(math.log2(config[dim] / optimum[dim])) for dim in optimum) * 100
+
+        return layer_info, optimum, metric
+
+    def test_local_search_converges(self):
+        """Test that hill climbing reaches the optimum in a small fraction of the candidates."""
+        layer_info, optimum, metric = self.conv_layer()
+        candidates = generate_all_tiling_configs(layer_info)
+        search = LocalSearch(layer_info, candidates, -1)
+        evaluated = 0
+        for config in search.iter_candidates():
+            evaluated += 1
+            search.observe(config, metric(config))
+
+        self.assertEqual(search.get_best(), (optimum, 1000))
+        self.assertLess(evaluated, 100)
+        self.assertLess(evaluated, len(candidates) // 20)
+        self.assertTrue(search.finished)
+
+    def test_local_search_batches_neighbours(self):
+        """Test that all neighbours are proposed at once and the move waits for their results."""
+        search = LocalSearch(self.layer_info, self.candidates, -1, initial_config={"H": 4, "W": 4, "C": 2})
+        batch = []
+        while True:
+            config = search.propose(block=False)
+            if config is None:
+                break
+            batch.append(config)
+
+        self.assertEqual(batch[0], {"H": 4, "W": 4, "C": 2})
+        self.assertEqual(len(batch), 7)
+        self.assertFalse(search.finished)
+
+        for config in batch:
+            search.observe(config, self.metric(config))
+        moved = search.propose(block=False)
+        self.assertIsNotNone(moved)
+        self.assertNotIn(moved, batch)
+        self.assertEqual(search.moves, 1)
+
+    def test_replayed_search_continues(self):
+        """Test that a search replaying an interrupted run's results never proposes them again."""
+        layer_info, optimum, metric = self.conv_layer()
+        candidates = generate_all_tiling_configs(layer_info)
+        for name in ("local", "bayesian"):
+            search = create_search_strategy(name, layer_info, candidates, 30, seed=0)
+            records = {}
+            for config in search.iter_candidates():
+                records[config_key(config)] = metric(config)
+                search.observe(config, metric(config))
+                if len(records) == 10:
+                    break
+
+            resumed = create_search_strategy(name, layer_info, candidates, 30, seed=0)
+            # The journal holds compact configurations
+            resumed.replay({TilingConfig.from_dict(dict(key)): value for key, value in records.items()})
+            proposed = []
+            for config in resumed.iter_candidates():
+                proposed.append(config_key(config))
+                resumed.observe(config, metric(config))
+            self.assertFalse(set(proposed) & set(records), name)
+            self.assertEqual(len(records) + len(proposed), 30)
+            self.assertLessEqual(resumed.get_best()[1], min(records.values()))
+
+    def test_unproposed_mask(self):
+        """Test that the mask of unproposed candidates follows proposals and replays."""
+        with self.assertRaises(TypeError):
+            SearchStrategy(self.layer_info, self.candidates, 10)
+
+        search = BayesianOptimization(self.layer_info, self.candidates, -1, seed=0)
+        search.replay({config: self.metric(config) for config in self.candidates[:5]})
+        for _ in range(10):
+            config = search.propose()
+            search.observe(config, self.metric(config))
+        proposed = {search.index[key] for key in search.proposed}
+        self.assertEqual(len(proposed), 15)
+        self.assertEqual(search.num_unproposed, len(self.candidates) - 15)
+        self.assertEqual(set(search._unproposed()), set(range(len(self.candidates))) - proposed)
+        sample = search._sample_unproposed(len(self.candidates))
+        self.assertEqual(sorted(sample), sorted(search._unproposed()))
+
+    def test_evolutionary_search(self):
+        """Test that generations are proposed whole and converge on the optimum."""
+        layer_info, optimum, metric = self.conv_layer()
+        candidates = generate_all_tiling_configs(layer_info)
+        search = EvolutionarySearch(layer_info, candidates, -1, seed=0, population_size=16, generations=12)
+        self.assertEqual(search.budget, 16 * 12)
+
+        while not search.finished:
+            generation = []
+            while True:
+                config = search.propose(block=False)
+                if config is None:
+                    break
+                generation.append(config)
+            if not generation:
+                break
+            self.assertLessEqual(len(generation), 16)
+            for config in generation:
+                search.observe(config, metric(config))
+
+        self.assertLessEqual(len(search.observations), 16 * 12)
+        self.assertEqual(len(search.observations), len(search.proposed))
+        _, best_metric = search.get_best()
+        self.assertLess(best_metric, 1300)
+
+    def test_evolutionary_search_resumes(self):
+        """Test that an interrupted search resumes from its saved population."""
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        state_file = os.path.join(temp_dir, "layer0_search.json")
+        search = EvolutionarySearch(self.layer_info, self.candidates, -1, seed=0, population_size=8,
+                                    generations=4, state_file=state_file)
+
+        # Finish the first generation and leave half of the second one in flight
+        first = [search.propose(block=False) for _ in range(8)]
+        for config in first:
+            search.observe(config, self.metric(config))
+        second = [search.propose(block=False) for _ in range(4)]
+        for config in second[:2]:
+            search.observe(config, self.metric(config))
+        self.assertTrue(search_in_progress(state_file))
+
+        resumed = EvolutionarySearch(self.layer_info, self.candidates, -1, seed=1, population_size=8,
+                                     generations=4, state_file=state_file)
+        self.assertEqual(resumed.generation, 1)
+        # Results of the first generation are restored and never proposed again
+        self.assertEqual(len(resumed.observations), 8)
+        for config in iter(lambda: resumed.propose(block=False), None):
+            self.assertNotIn(config_key(config), {config_key(first_config) for first_config in first})
+            resumed.observe(config, self.metric(config))
+            if resumed.finished:
+                break
+
+if __name__ == "__main__":
+    unittest.main()
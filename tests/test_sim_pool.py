@@ -0,0 +1,107 @@
+import os
+import time
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+from compiler.model_compiler import write_output_manifest
+from simulator.simulator import run_simulator
+from simulator.sim_pool import SimulatorPool
+
+# Minimal stand-in for genesys_sim.genesys: writes one CSV row per layer directory
+FAKE_SIMULATOR = '''
+import os
+import sys
+import time
+
+def main():
+    output_dir = sys.argv[2]
+    if output_dir.endswith("_hang"):
+        time.sleep(600)
+    log_path = sys.argv[sys.argv.index("--log_path") + 1]
+    layers = sorted(d for d in os.listdir(output_dir) if os.path.isdir(os.path.join(output_dir, d)))
+    with open(log_path, "w") as f:
+        f.write("layerName,layerType,totCycles,totTime(us)\\n")
+        for i, layer in enumerate(layers):
+            f.write(f"{layer},systolic,{(i + 1) * 1000},{i + 1}.0\\n")
+
+if __name__ == "__main__":
+    main()
+'''
+
+class TestSimulatorPool(unittest.TestCase):
+    """Test the warm simulator worker pool."""
+    
+    def setUp(self):
+        """Set up a fake simulator and a compiled output directory."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.sim_path = os.path.join(self.temp_dir, "sim")
+        package_dir = os.path.join(self.sim_path, "genesys_sim")
+        os.makedirs(package_dir)
+        open(os.path.join(package_dir, "__init__.py"), 'w').close()
+        with open(os.path.join(package_dir, "genesys.py"), 'w') as f:
+            f.write(FAKE_SIMULATOR)
+        
+        self.output_dir = os.path.join(self.temp_dir, "model_test_0")
+        for layer_name in ["layer0_conv_bias1", "layer1_relu4d2"]:
+            os.makedirs(os.path.join(self.output_dir, layer_name))
+        write_output_manifest(self.output_dir, "test_0")
+    
+    def tearDown(self):
+        """Clean up temporary files."""
+        shutil.rmtree(self.temp_dir)
+    
+    def test_timed_out_job_restarts_workers(self):
+        """Test that a stuck job doesn't cost the pool its worker or hang close()."""
+        hang_dir = os.path.join(self.temp_dir, "model_hang")
+        os.makedirs(os.path.join(hang_dir, "layer0_conv_bias1"))
+        pool = SimulatorPool(self.sim_path, num_workers=1, timeout=5)
+        try:
+            self.assertIsNone(pool.simulate(hang_dir, "layer0_conv_bias1"))
+            # The only worker was stuck - a fresh one serves the next job
+            self.assertEqual(pool.simulate(self.output_dir, "layer0_conv_bias1", "totCycles"), 1000.0)
+        finally:
+            pool.close()
+
+        # Closing with a stuck job kills the workers instead of waiting for it
+        pool = SimulatorPool(self.sim_path, num_workers=1, timeout=600)
+        results = []
+        job = threading.Thread(target=lambda: results.append(pool.simulate(hang_dir, "layer0_conv_bias1")))
+        job.start()
+        while not pool.jobs:
+            time.sleep(0.01)
+        pool.close()
+        job.join(30)
+        self.assertFalse(job.is_alive())
+        self.assertEqual(results, [None])
+
+    def test_simulate_layers(self):
+        """Test that a warm worker returns metrics for every requested layer."""
+        with SimulatorPool(self.sim_path, num_workers=1) as pool:
+            metrics = pool.simulate_layers(self.output_dir, ["layer0_conv_bias1", "layer1_relu4d2"])
+            self.assertIsNotNone(metrics)
+            self.assertEqual(metrics["layer0_conv_bias1"]["totCycles"], 1000.0)
+            self.assertEqual(metrics["layer1_relu4d2"]["totCycles"], 2000.0)
+            
+            # The same worker serves later jobs
+            self.assertEqual(pool.simulate(self.output_dir, "layer1_relu4d2", "totCycles"), 2000.0)
+    
+    @patch('simulator.simulator.subprocess.run')
+    def test_run_simulator_with_pool(self, mock_run):
+        """Test that run_simulator dispatches to the pool when one is given."""
+        with SimulatorPool(self.sim_path, num_workers=1) as pool:
+            metrics = run_simulator(self.output_dir, "layer0_conv_bias1", self.sim_path, sim_pool=pool)
+        self.assertEqual(metrics["totCycles"], 1000.0)
+        mock_run.assert_not_called()
+    
+    def test_unavailable_simulator(self):
+        """Test that the pool disables itself if the simulator can't be imported."""
+        missing_sim_path = os.path.join(self.temp_dir, "missing_sim")
+        os.makedirs(missing_sim_path)
+        with SimulatorPool(missing_sim_path, num_workers=1) as pool:
+            self.assertIsNone(pool.simulate_layers(self.output_dir, ["layer0_conv_bias1"]))
+            self.assertFalse(pool.available)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,7 +4,8 @@ import tempfile
 import shutil
 import json
 from unittest.mock import patch, MagicMock
-from simulator.simulator import run_simulator, parse_simulator_output, parse_layer_output_files
+from simulator.simulator import run_simulator, parse_simulator_output, parse_layer_output_files, wait_for_output
+from compiler.model_compiler import write_output_manifest
 
 class TestSimulator(unittest.TestCase):
     """Test the simulator integration."""
@@ -32,27 +33,66 @@ class TestSimulator(unittest.TestCase):
     @patch('simulator.simulator.parse_simulator_output')
     def test_run_simulator_success(self, mock_parse, mock_exists, mock_chdir, mock_run):
         """Test successful simulator run."""
+        # Mark the compiled output as ready
+        os.makedirs(os.path.join(self.temp_dir, self.layer_name))
+        write_output_manifest(self.temp_dir, "test_experiment")
+        
         # Setup mocks
         mock_exists.return_value = True
         mock_run.return_value = MagicMock(stdout=b"Simulation complete", stderr=b"")
         mock_parse.return_value = {"totCycles": 1000, "totTime(us)": 2.5}
         
         # Run the simulator
+        timings = {}
         result = run_simulator(
             output_dir=self.temp_dir,
             layer_name=self.layer_name,
-            sim_path=self.sim_path
+            sim_path=self.sim_path,
+            timings=timings
         )
         
-        # Verify simulator was called correctly
-        mock_chdir.assert_any_call(self.sim_path)
+        # Verify simulator was run from its own directory without changing ours
+        mock_chdir.assert_not_called()
         mock_run.assert_called_once()
+        _, run_kwargs = mock_run.call_args
+        self.assertEqual(run_kwargs["cwd"], self.sim_path)
+        
+        # Verify the simulator logs to a private path outside the simulator directory
+        cmd = mock_run.call_args[0][0]
+        log_path = cmd[cmd.index("--log_path") + 1]
+        self.assertTrue(os.path.isabs(log_path))
+        self.assertFalse(log_path.startswith(self.sim_path))
         
         # Verify parse_simulator_output was called
         mock_parse.assert_called_once()
         
         # Verify correct result was returned
         self.assertEqual(result, {"totCycles": 1000, "totTime(us)": 2.5})
+        
+        # The time spent waiting for the output is reported with the candidate
+        self.assertLess(timings["wait_time"], 1.0)
+    
+    def test_wait_for_output_with_manifest(self):
+        """Test that an output with a manifest is ready without waiting."""
+        os.makedirs(os.path.join(self.temp_dir, self.layer_name))
+        write_output_manifest(self.temp_dir, "test_experiment")
+        
+        wait_time = wait_for_output(self.temp_dir, [self.layer_name], timeout=5)
+        self.assertIsNotNone(wait_time, "Output with manifest should be ready")
+        self.assertLess(wait_time, 1.0)
+        
+        # A manifest that doesn't list the layer fails immediately instead of waiting
+        self.assertIsNone(wait_for_output(self.temp_dir, ["other_layer"], timeout=5))
+    
+    def test_wait_for_output_without_manifest(self):
+        """Test that outputs without a manifest fall back to checking the layer files."""
+        layer_dir = os.path.join(self.temp_dir, self.layer_name)
+        os.makedirs(layer_dir)
+        self.assertIsNone(wait_for_output(self.temp_dir, [self.layer_name], timeout=0))
+        
+        with open(os.path.join(layer_dir, "layer_json.json"), 'w') as f:
+            json.dump({}, f)
+        self.assertIsNotNone(wait_for_output(self.temp_dir, [self.layer_name], timeout=0))
     
     def test_parse_simulator_output_with_test_metrics(self):
         """Test parsing metrics from the test metrics file."""
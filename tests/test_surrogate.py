@@ -0,0 +1,121 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+from optimizer.surrogate import SurrogateModel, extract_features, MIN_OBSERVATIONS, np
+from optimizer.tiling_generator import generate_all_tiling_configs, generate_tiling_configs
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestSurrogateModel(unittest.TestCase):
+    """Test the surrogate model trained on past evaluations."""
+
+    def setUp(self):
+        """Set up a layer whose metric is lowest at H split 8."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.layer_info = {
+            "operation": "conv_bias",
+            "dimensions": {"H": 64, "W": 64, "C": 1},
+            "current_tile_splits": {"H": 1, "W": 1, "C": 1},
+            "tiling_key": "conv_bias_1"
+        }
+
+    def tearDown(self):
+        """Clean up temporary files."""
+        shutil.rmtree(self.temp_dir)
+
+    def metric(self, config):
+        """Cycles that grow with the distance of both splits from 8 and 2 in log space."""
+        h = config["H"].bit_length() - 1
+        w = config["W"].bit_length() - 1
+        return 1000 * 2 ** ((h - 3) ** 2 + (w - 1) ** 2)
+
+    def test_extract_features(self):
+        """Test the log-scale candidate features."""
+        features = extract_features(self.layer_info, {"H": 4, "W": 1, "C": 1})
+        self.assertEqual(features["op=conv_bias"], 1.0)
+        self.assertEqual(features["log_dim:H"], 6)
+        self.assertEqual(features["log_split:H"], 2)
+        self.assertEqual(features["log_tile:H"], 4)
+        self.assertEqual(features["log_num_tiles_sq"], 4)
+
+    def test_falls_back_to_random_without_history(self):
+        """Test that too few observations give no prediction."""
+        surrogate = SurrogateModel("resnet50", self.temp_dir)
+        configs = generate_all_tiling_configs(self.layer_info)
+        self.assertIsNone(surrogate.predict(self.layer_info, configs))
+        self.assertEqual(len(surrogate.select(self.layer_info, configs, 3)), 3)
+
+    def test_select_after_training(self):
+        """Test that the fit ranks the optimum first and persists across instances."""
+        surrogate = SurrogateModel("resnet50", self.temp_dir, exploration=0.0)
+        configs = generate_all_tiling_configs(self.layer_info)
+        training = [config for config in configs if config["H"] != 8]
+        for config in training:
+            surrogate.add_observation(self.layer_info, config, self.metric(config))
+
+        self.assertEqual(surrogate.select(self.layer_info, configs, 1), [{"H": 8, "W": 2, "C": 1}])
+
+        reloaded = SurrogateModel("resnet50", self.temp_dir, exploration=0.0)
+        self.assertEqual(reloaded.num_observations, len(training))
+        self.assertEqual(reloaded.select(self.layer_info, configs, 1), [{"H": 8, "W": 2, "C": 1}])
+
+    def test_iter_candidates_refits(self):
+        """Test that results observed during iteration steer the next picks."""
+        surrogate = SurrogateModel("resnet50", self.temp_dir, exploration=0.0)
+        configs = generate_all_tiling_configs(self.layer_info)
+        picked = []
+        for config in surrogate.iter_candidates(self.layer_info, configs, 20):
+            picked.append(config)
+            surrogate.add_observation(self.layer_info, config, self.metric(config))
+
+        self.assertEqual(len(picked), 20)
+        self.assertEqual(len({str(config) for config in picked}), 20)
+        self.assertIn({"H": 8, "W": 2, "C": 1}, picked)
+
+    def test_history_is_appended(self):
+        """Test that every observation appends one record and a legacy history is still read."""
+        legacy = [{"operation": "conv_bias", "dimensions": self.layer_info["dimensions"],
+                   "tile_splits": {"H": 1, "W": 1, "C": 1}, "metric": 5000}]
+        with open(os.path.join(self.temp_dir, "resnet50_eval_history.json"), 'w') as f:
+            json.dump(legacy, f)
+
+        surrogate = SurrogateModel("resnet50", self.temp_dir)
+        self.assertEqual(surrogate.num_observations, 1)
+        surrogate.add_observation(self.layer_info, {"H": 8, "W": 2, "C": 1}, 1000)
+        surrogate.add_observation(self.layer_info, {"H": 4, "W": 2, "C": 1}, 2000, save=False)
+        with open(surrogate.history_file, 'r') as f:
+            self.assertEqual(len(f.readlines()), 1)
+        surrogate.flush()
+        with open(surrogate.history_file, 'a') as f:
+            f.write('{"operation": "conv_bias", "dimen')
+
+        reloaded = SurrogateModel("resnet50", self.temp_dir)
+        self.assertEqual(reloaded.num_observations, 3)
+        reloaded.add_observation(self.layer_info, {"H": 2, "W": 2, "C": 1}, 4000)
+        self.assertEqual(SurrogateModel("resnet50", self.temp_dir).num_observations, 4)
+
+    def test_load_past_results(self):
+        """Test seeding from checkpoint results of the same layers."""
+        surrogate = SurrogateModel("resnet50", self.temp_dir)
+        checkpoint_results = {
+            "layer0_conv_bias1": {"best_config": {"H": 8, "W": 2}, "best_metric": 1000, "tiling_key": "conv_bias_1"},
+            "layer1_conv_bias2": {"best_config": None, "best_metric": None, "tiling_key": "conv_bias_2"}
+        }
+        layers_info = [("layer0_conv_bias1", self.layer_info), ("layer1_conv_bias2", self.layer_info)]
+        surrogate.load_past_results(layers_info, checkpoint_results=checkpoint_results)
+        self.assertEqual(surrogate.num_observations, 1)
+        self.assertTrue(os.path.exists(surrogate.history_file))
+
+    def test_sampling_uses_surrogate(self):
+        """Test that sampled candidates beyond the anchors come from the surrogate."""
+        surrogate = SurrogateModel("resnet50", self.temp_dir, exploration=0.0)
+        for config in generate_all_tiling_configs(self.layer_info)[:MIN_OBSERVATIONS * 4]:
+            surrogate.add_observation(self.layer_info, config, self.metric(config))
+
+        configs = generate_tiling_configs(self.layer_info, 8, surrogate=surrogate)
+        self.assertEqual(len(configs), 8)
+        self.assertEqual(len({str(config) for config in configs}), 8)
+
+if __name__ == "__main__":
+    unittest.main()
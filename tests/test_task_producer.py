@@ -0,0 +1,93 @@
+import time
+import unittest
+from optimizer.task_producer import TaskProducer, prioritize_layers
+
+class TestTaskProducer(unittest.TestCase):
+    """Test streaming candidate tasks through a bounded queue."""
+
+    def setUp(self):
+        """Set up a large conv layer and a small elementwise layer."""
+        self.conv_layer = {
+            "operation": "conv_bias",
+            "dimensions": {"N": 1, "OC": 512, "IC": 512, "KH": 3, "KW": 3, "OH": 224, "OW": 224},
+            "tiling_key": "conv_bias_1"
+        }
+        self.add_layer = {
+            "operation": "elem_add",
+            "dimensions": {"H": 8, "W": 4},
+            "tiling_key": "elem_add_1"
+        }
+        self.layers_info = [("layer1", self.add_layer), ("layer0", self.conv_layer)]
+
+    def test_prioritize_layers(self):
+        """Test that the operations with the most candidates come first."""
+        ordered = prioritize_layers(self.layers_info, -1)
+        self.assertEqual([name for name, _ in ordered], ["layer0", "layer1"])
+
+    def test_first_task_is_immediate(self):
+        """Test that an exhaustive search of a huge space starts without generating it."""
+        start = time.time()
+        producer = TaskProducer(self.layers_info, -1, queue_size=4)
+        task = next(iter(producer))
+        self.assertLess(time.time() - start, 1.0)
+        producer.close()
+
+        self.assertEqual(task['layer_name'], "layer0")
+        self.assertEqual(task['tile_splits'], {dim: 1 for dim in self.conv_layer["dimensions"]})
+        self.assertEqual(task['total_configs'], 10 * 10 * 2 * 2 * 12 * 12)
+        # The producer never runs more than the queue capacity ahead
+        self.assertLessEqual(producer.produced, 1 + 4 + 1)
+
+    def test_close_wakes_blocked_producer(self):
+        """Test that closing ends a producer waiting for room in the full queue."""
+        producer = TaskProducer(self.layers_info, -1, queue_size=2).start()
+        while not producer.task_queue.full():
+            time.sleep(0.01)
+        producer.close()
+        producer.thread.join(timeout=5)
+        self.assertFalse(producer.thread.is_alive())
+
+    def test_layer_quantum(self):
+        """Test interleaving the layers round robin, or one layer at a time."""
+        # With 4 candidates each, both operations are equally complex and keep their order
+        tasks = list(TaskProducer(self.layers_info, 4, layer_quantum=1))
+        self.assertEqual([task['layer_name'] for task in tasks[:4]], ["layer1", "layer0", "layer1", "layer0"])
+        counts = {name: sum(task['layer_name'] == name for task in tasks) for name in ("layer0", "layer1")}
+
+        tasks = list(TaskProducer(self.layers_info, 4, layer_quantum=2))
+        self.assertEqual([task['layer_name'] for task in tasks[:4]], ["layer1", "layer1", "layer0", "layer0"])
+
+        tasks = list(TaskProducer(self.layers_info, 4, layer_quantum=0))
+        self.assertEqual([task['layer_name'] for task in tasks],
+                         ["layer1"] * counts["layer1"] + ["layer0"] * counts["layer0"])
+        self.assertEqual([task['config_idx'] for task in tasks[:4]], [0, 1, 2, 3])
+
+    def test_skip_stopped_layers(self):
+        """Test that a stopped layer's remaining candidates are dropped and its start is reported."""
+        started = []
+        producer = TaskProducer(self.layers_info, -1, skip=lambda layer_name: layer_name == "layer0",
+                                on_layer_start=lambda layer_name, layer_info, pool: started.append(
+                                    (layer_name, len(pool))))
+        tasks = list(producer)
+        self.assertEqual({task['layer_name'] for task in tasks}, {"layer1"})
+        self.assertEqual(len(tasks), 4 * 3)
+        # The stopped layer is never generated
+        self.assertEqual(started, [("layer1", 12)])
+
+    def test_failed_layer(self):
+        """Test that a layer whose candidates can't be generated is dropped on its own."""
+        broken_layer = {"operation": "broken", "tiling_key": "broken_1"}
+        producer = TaskProducer([("layer2", broken_layer)] + self.layers_info, 4)
+        tasks = list(producer)
+        self.assertEqual({task['layer_name'] for task in tasks}, {"layer0", "layer1"})
+        self.assertEqual(producer.failed_layers, ["layer2"])
+
+        # Any other producer error reaches the consumer instead of ending the stream early
+        def skip(layer_name):
+            raise RuntimeError("skip failed")
+
+        with self.assertRaises(RuntimeError):
+            list(TaskProducer(self.layers_info, 4, skip=skip))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,18 @@
+import json
 import unittest
 from optimizer.tiling_generator import (
     generate_all_tiling_configs,
     generate_tiling_configs,
-    select_dimensions_to_optimize
+    select_dimensions_to_optimize,
+    compute_tile_footprints,
+    filter_feasible_configs,
+    get_buffer_capacities,
+    get_dimension_alignment,
+    get_aligned_factors,
+    TilingSpace,
+    TilingConfig,
+    count_tiling_configs,
+    iter_tiling_configs
 )
 
 class TestTilingGenerator(unittest.TestCase):
@@ -122,5 +132,146 @@ class TestTilingGenerator(unittest.TestCase):
             self.assertIn("OH", config)
             self.assertIn("OW", config)
 
+    def test_buffer_feasibility_filter(self):
+        """Test pruning candidates whose tiles exceed the on-chip buffers."""
+        # 64 x 64 FXP32 elementwise layer feeding a 16-lane SIMD unit
+        layer_info = {
+            "dimensions": {"H": 64, "W": 64},
+            "tile_splits": {"H": 4, "W": 1},
+            "tiling_key": "elem_add_1",
+            "operands": [
+                {
+                    "name": "op1", "kind": "input", "bits": 32,
+                    "shape_symbols": {"H": 64, "W": 64},
+                    "data_path": ["DRAM", "VMEM1", "SIMD"],
+                    "tiling": {"VMEM1": {"H": 16, "W": 64}, "SIMD": {"H": 1, "W": 16}}
+                },
+                {
+                    "name": "out", "kind": "output", "bits": 32,
+                    "shape_symbols": {"H": 64, "W": 64},
+                    "data_path": ["SIMD", "VMEM1", "DRAM"],
+                    "tiling": {"VMEM1": {"H": 16, "W": 64}, "SIMD": {"H": 1, "W": 16}}
+                }
+            ]
+        }
+        arch_config = {"VMEM_DEPTH": 256, "SIMD_WIDTH": 16, "ACC_WIDTH": 32}
+        self.assertEqual(get_buffer_capacities(arch_config), {"VMEM1": 256 * 16 * 32, "VMEM2": 256 * 16 * 32})
+        
+        # Both operands share VMEM1, and W tiles narrower than the SIMD unit are padded to 16
+        self.assertEqual(compute_tile_footprints(layer_info, {"H": 4, "W": 1}), {"VMEM1": 2 * 16 * 64 * 32})
+        self.assertEqual(compute_tile_footprints(layer_info, {"H": 64, "W": 64}), {"VMEM1": 2 * 16 * 32})
+        
+        # Tiles of more than 2048 elements per operand don't fit
+        configs = generate_all_tiling_configs(layer_info)
+        feasible, pruned = filter_feasible_configs(layer_info, configs, arch_config)
+        self.assertEqual(len(feasible) + pruned, len(configs))
+        self.assertNotIn({"H": 1, "W": 1}, feasible)
+        self.assertIn({"H": 2, "W": 1}, feasible)
+        self.assertEqual(pruned, 1)
+        self.assertEqual(generate_tiling_configs(layer_info, -1, arch_config=arch_config), feasible)
+        
+        # A layer with no feasible candidate keeps the splits it was compiled with
+        tiny_config = {"VMEM_DEPTH": 1, "SIMD_WIDTH": 16, "ACC_WIDTH": 32}
+        feasible, pruned = filter_feasible_configs(layer_info, configs, tiny_config)
+        self.assertEqual(feasible, [{"H": 4, "W": 1}])
+        self.assertEqual(pruned, len(configs))
+        
+        # Also when the candidates are streamed as compact configurations
+        streamed = list(iter_tiling_configs(layer_info, tiny_config, compact=True))
+        self.assertEqual(streamed, [{"H": 4, "W": 1}])
+        self.assertIsInstance(streamed[0], TilingConfig)
+        self.assertIn(streamed[0], {TilingConfig.from_dict({"W": 1, "H": 4})})
+
+    def test_alignment_aware_generation(self):
+        """Test restricting and reordering factors to the array geometry."""
+        # 64 x 128 x 96 matmul: N spans the array rows, P the columns, M is streamed
+        layer_info = {
+            "dimensions": {"M": 64, "N": 128, "P": 96},
+            "operands": [
+                {
+                    "name": "data", "kind": "input", "bits": 8,
+                    "shape_symbols": {"M": 64, "N": 128},
+                    "data_path": ["DRAM", "IBUF", "pe_array"],
+                    "tiling": {"pe_array": {"M": 1, "N": 16}}
+                },
+                {
+                    "name": "out", "kind": "output", "bits": 32,
+                    "shape_symbols": {"M": 64, "P": 96},
+                    "data_path": ["DRAM", "OBUF", "pe_array", "OBUF", "DRAM"],
+                    "tiling": {"pe_array": {"M": 1, "P": 16}}
+                }
+            ]
+        }
+        arch_config = {"ARRAY_N": 32, "ARRAY_M": 16, "SIMD_WIDTH": 16}
+        self.assertEqual(get_dimension_alignment(layer_info), {"N": 16, "P": 16})
+        self.assertEqual(get_dimension_alignment(layer_info, arch_config), {"N": 32, "P": 16})
+        
+        self.assertEqual(get_aligned_factors(96, 16, "restrict"), [1, 2, 3, 6])
+        self.assertEqual(get_aligned_factors(96, 16, "reorder"), [1, 2, 3, 6, 4, 8, 12, 16, 24, 32, 48, 96])
+        
+        restricted = generate_all_tiling_configs(layer_info, arch_config, "restrict")
+        self.assertEqual(len(restricted), 7 * 3 * 4)
+        for config in restricted:
+            self.assertEqual((128 // config["N"]) % 32, 0)
+            self.assertEqual((96 // config["P"]) % 16, 0)
+        
+        reordered = generate_all_tiling_configs(layer_info, arch_config, "reorder")
+        self.assertEqual(len(reordered), len(generate_all_tiling_configs(layer_info)))
+        
+        with self.assertRaises(ValueError):
+            generate_all_tiling_configs(layer_info, arch_config, "round")
+
+    def test_lazy_tiling_space(self):
+        """Test counting, ranking and streaming the tiling space without materializing it."""
+        space = TilingSpace(self.complex_layer)
+        configs = generate_all_tiling_configs(self.complex_layer)
+        
+        # 7 * 1 * 6 * 2 * 2 * 8 * 8 configurations, counted without generating them
+        self.assertEqual(count_tiling_configs(self.complex_layer), 7 * 6 * 2 * 2 * 8 * 8)
+        self.assertEqual(len(space), len(configs))
+        
+        # Ranks follow the order of the exhaustive generator
+        for rank in (0, 1, 77, len(space) - 1):
+            self.assertEqual(space[rank], configs[rank])
+            self.assertEqual(space.rank_of(configs[rank]), rank)
+            self.assertEqual(space.to_config(space.indices_at(rank)), configs[rank])
+        with self.assertRaises(IndexError):
+            space.indices_at(len(space))
+        
+        # Iteration is lazy and re-iterable
+        stream = iter_tiling_configs(self.complex_layer)
+        self.assertEqual(next(stream), configs[0])
+        self.assertEqual(next(stream), configs[1])
+        self.assertEqual(list(space), configs)
+        self.assertEqual(sum(1 for _ in space.iter_indices()), len(space))
+
+    def test_compact_tiling_config(self):
+        """Test that compact configurations behave like dicts and deduplicate in sets."""
+        space = TilingSpace(self.simple_layer)
+        compact = list(space.iter_compact())
+        self.assertEqual(compact, list(space))
+        self.assertIs(compact[0].dims, compact[1].dims)
+        
+        config = TilingConfig.from_dict({"H": 4, "W": 2, "C": 3})
+        self.assertEqual(config, {"H": 4, "W": 2, "C": 3})
+        self.assertEqual(config["W"], 2)
+        self.assertEqual(config.get("N", 1), 1)
+        self.assertEqual(json.loads(json.dumps(config.to_dict())), {"H": 4, "W": 2, "C": 3})
+        with self.assertRaises(KeyError):
+            config["N"]
+        
+        # Equal configurations hash alike, whatever their dimension order
+        reordered = TilingConfig.from_dict({"C": 3, "H": 4, "W": 2})
+        self.assertEqual(config, reordered)
+        self.assertEqual(len({config, reordered, compact[0]}), 2)
+        self.assertEqual(len(set(compact + compact)), len(space))
+        
+        # The list generators return compact configurations sharing one dimension tuple too
+        for configs in (generate_all_tiling_configs(self.complex_layer),
+                        generate_tiling_configs(self.complex_layer, 10)):
+            self.assertTrue(all(isinstance(config, TilingConfig) for config in configs))
+            self.assertTrue(all(config.dims is configs[0].dims for config in configs))
+            self.assertEqual(len(set(configs)), len(configs))
+
 if __name__ == '__main__':
     unittest.main()